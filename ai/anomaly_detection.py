@@ -0,0 +1,204 @@
+# ai/anomaly_detection.py
+import logging
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Expected first-digit frequencies under Benford's law
+BENFORD_EXPECTED = np.log10(1 + 1 / np.arange(1, 10))
+
+
+@dataclass
+class AnomalyConfig:
+    window: int = 36
+    season_length: int = 12
+    min_history: int = 6
+    z_threshold: float = 3.5
+    seasonal_threshold: float = 3.5
+    benford_min_count: int = 100
+    benford_mad_threshold: float = 0.015
+    chunk_size: int = 200000
+    max_workers: Optional[int] = None
+
+
+def _nanmedian(values: np.ndarray, axis: int) -> np.ndarray:
+    # All-NaN rows are expected (short series); their median is simply NaN
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        return np.nanmedian(values, axis=axis)
+
+
+def score_matrix(matrix: np.ndarray, start: int, window: int, season_length: int,
+                 min_history: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Robust and seasonal z-scores for columns ``start..`` of a series × period matrix.
+
+    Each column is scored against the ``window`` columns before it, so the
+    result is the same whether periods arrive all at once or one at a time.
+    Returns (robust_z, seasonal_z, seasonal_baseline), each shaped
+    (n_series, n_columns - start).
+    """
+    n_series, n_cols = matrix.shape
+    out_shape = (n_series, max(0, n_cols - start))
+    robust_z = np.full(out_shape, np.nan)
+    seasonal_z = np.full(out_shape, np.nan)
+    baseline = np.full(out_shape, np.nan)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for k, t in enumerate(range(start, n_cols)):
+            current = matrix[:, t]
+            history = matrix[:, max(0, t - window):t]
+            enough = np.sum(~np.isnan(history), axis=1) >= min_history
+
+            median = _nanmedian(history, axis=1)
+            mad = _nanmedian(np.abs(history - median[:, None]), axis=1)
+            z = 0.6745 * (current - median) / mad
+            robust_z[:, k] = np.where(enough & (mad > 0), z, np.nan)
+
+            # Seasonal baseline: median of the same period in prior seasons
+            season_cols = np.arange(t - season_length, max(-1, t - window - 1), -season_length)
+            if season_cols.size and t - season_length >= 0:
+                base = _nanmedian(matrix[:, season_cols], axis=1)
+                lagged = history[:, season_length:] - history[:, :-season_length] \
+                    if history.shape[1] > season_length else np.empty((n_series, 0))
+                if lagged.shape[1]:
+                    lag_median = _nanmedian(lagged, axis=1)
+                    scale = 1.4826 * _nanmedian(np.abs(lagged - lag_median[:, None]), axis=1)
+                    sz = (current - base) / scale
+                    seasonal_z[:, k] = np.where(np.isfinite(sz), sz, np.nan)
+                baseline[:, k] = base
+    return robust_z, seasonal_z, baseline
+
+
+def _score_chunk(args):
+    return score_matrix(*args)
+
+
+def benford_test(amounts: np.ndarray) -> Dict[str, Any]:
+    """First-digit Benford conformity (mean absolute deviation and chi-square)"""
+    values = np.abs(amounts[np.isfinite(amounts)])
+    values = values[values >= 1]
+    if values.size == 0:
+        return {'count': 0}
+    first_digit = (values / 10 ** np.floor(np.log10(values))).astype(int)
+    first_digit = np.clip(first_digit, 1, 9)
+    observed = np.bincount(first_digit, minlength=10)[1:] / values.size
+    mad = float(np.mean(np.abs(observed - BENFORD_EXPECTED)))
+    chi_square = float(values.size * np.sum((observed - BENFORD_EXPECTED) ** 2 / BENFORD_EXPECTED))
+    return {'count': int(values.size), 'mad': round(mad, 4), 'chi_square': round(chi_square, 2),
+            'observed': np.round(observed, 4).tolist()}
+
+
+class AnomalyDetector:
+    """Incremental, vectorized anomaly detection over account × period series.
+
+    Series are held as a (series × period) NumPy matrix limited to the last
+    ``window`` periods. ``update`` appends newly loaded periods, scores only
+    those periods, and returns flagged values. Large series counts are scored
+    in row chunks on a process pool.
+    """
+
+    def __init__(self, key_columns: List[str], period_column: str = 'period',
+                 value_column: str = 'amount', config: Optional[AnomalyConfig] = None):
+        self.key_columns = [c.lower() for c in key_columns]
+        self.period_column = period_column.lower()
+        self.value_column = value_column.lower()
+        self.config = config or AnomalyConfig()
+        self.logger = logging.getLogger(__name__)
+        self.keys = pd.MultiIndex.from_tuples([], names=self.key_columns)
+        self.periods: List[Any] = []
+        self.matrix = np.empty((0, 0))
+
+    def _merge(self, df: pd.DataFrame) -> int:
+        """Merge new rows into the matrix; returns the index of the first new period column"""
+        pivot = df.pivot_table(index=self.key_columns, columns=self.period_column,
+                               values=self.value_column, aggfunc='sum')
+        if not isinstance(pivot.index, pd.MultiIndex):
+            pivot.index = pd.MultiIndex.from_arrays([pivot.index], names=self.key_columns)
+
+        last = self.periods[-1] if self.periods else None
+        new_periods = sorted(p for p in pivot.columns if last is None or p > last)
+        late = [p for p in pivot.columns if last is not None and p <= last]
+        if late:
+            self.logger.warning(f"Ignoring {len(late)} already-scored periods")
+
+        keys = self.keys.union(pivot.index) if len(self.keys) else pivot.index
+        periods = self.periods + new_periods
+        matrix = np.full((len(keys), len(periods)), np.nan)
+        if self.matrix.size:
+            matrix[keys.get_indexer(self.keys), :len(self.periods)] = self.matrix
+        if new_periods:
+            matrix[np.ix_(keys.get_indexer(pivot.index), np.arange(len(self.periods), len(periods)))] = \
+                pivot[new_periods].to_numpy(dtype=float)
+
+        start = len(self.periods)
+        self.keys, self.periods, self.matrix = keys, periods, matrix
+        return start
+
+    def _trim(self):
+        """Keep only the history needed to score the next period"""
+        keep = self.config.window + 1
+        if len(self.periods) > keep:
+            self.periods = self.periods[-keep:]
+            self.matrix = self.matrix[:, -keep:]
+
+    def _score(self, start: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        c = self.config
+        n = self.matrix.shape[0]
+        if n <= c.chunk_size:
+            return score_matrix(self.matrix, start, c.window, c.season_length, c.min_history)
+        chunks = [(self.matrix[i:i + c.chunk_size], start, c.window, c.season_length, c.min_history)
+                  for i in range(0, n, c.chunk_size)]
+        with ProcessPoolExecutor(max_workers=c.max_workers) as executor:
+            parts = list(executor.map(_score_chunk, chunks))
+        return tuple(np.vstack([p[i] for p in parts]) for i in range(3))
+
+    def update(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Load new periods from a long DataFrame and return anomalies among them"""
+        df = df.rename(columns=str.lower)
+        df = df.assign(**{self.value_column: pd.to_numeric(df[self.value_column], errors='coerce')})
+        start = self._merge(df)
+        if start >= len(self.periods):
+            return self._empty_flags()
+
+        robust_z, seasonal_z, baseline = self._score(start)
+        c = self.config
+        flagged = (np.abs(robust_z) > c.z_threshold) | (np.abs(seasonal_z) > c.seasonal_threshold)
+        rows, cols = np.nonzero(flagged)
+        new_periods = self.periods[start:]
+        values = self.matrix[:, start:]
+
+        flags = pd.DataFrame(list(self.keys[rows]), columns=self.key_columns)
+        flags[self.period_column] = [new_periods[j] for j in cols]
+        flags[self.value_column] = values[rows, cols]
+        flags['robust_z'] = np.round(robust_z[rows, cols], 2)
+        flags['seasonal_z'] = np.round(seasonal_z[rows, cols], 2)
+        flags['seasonal_baseline'] = baseline[rows, cols]
+        flags['reason'] = np.where(np.abs(robust_z[rows, cols]) > c.z_threshold,
+                                   'deviates from recent history', 'deviates from seasonal baseline')
+
+        self._trim()
+        return flags.reindex(flags[['robust_z', 'seasonal_z']].abs().max(axis=1)
+                             .sort_values(ascending=False).index).reset_index(drop=True)
+
+    def benford(self, df: pd.DataFrame, group_column: Optional[str] = None) -> pd.DataFrame:
+        """Benford first-digit test overall or per group; flags nonconforming groups"""
+        df = df.rename(columns=str.lower)
+        amounts = pd.to_numeric(df[self.value_column], errors='coerce')
+        groups = amounts.groupby(df[group_column.lower()]) if group_column else [('all', amounts)]
+        results = []
+        for name, values in groups:
+            result = benford_test(values.to_numpy(dtype=float))
+            if result['count'] >= self.config.benford_min_count:
+                result['group'] = name
+                result['nonconforming'] = result['mad'] > self.config.benford_mad_threshold
+                results.append(result)
+        return pd.DataFrame(results)
+
+    def _empty_flags(self) -> pd.DataFrame:
+        return pd.DataFrame(columns=self.key_columns + [
+            self.period_column, self.value_column, 'robust_z', 'seasonal_z', 'seasonal_baseline', 'reason'
+        ])
@@ -0,0 +1,91 @@
+# ai/currency_translation.py
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from database.fx_rates import FXRateService, RateNotFoundError
+
+# Current-rate method: balance sheet at closing rate, P&L at average, equity at historical
+ACCOUNT_RATE_TYPES = {
+    'ASSET': 'SPOT',
+    'LIABILITY': 'SPOT',
+    'REVENUE': 'AVERAGE',
+    'INCOME': 'AVERAGE',
+    'EXPENSE': 'AVERAGE',
+    'EQUITY': 'HISTORICAL',
+}
+CTA_ACCOUNT = 'CTA'
+
+
+def translate_balances(df: pd.DataFrame, rates: FXRateService, reporting_currency: str,
+                       period_date, rate_types: Optional[Dict[str, str]] = None) -> pd.DataFrame:
+    """Translate local-currency balances into ``reporting_currency``.
+
+    Expects lower-case ``entity``, ``account_code``, ``account_type``,
+    ``currency`` and ``amount`` columns; an optional ``rate_date`` column gives
+    the historical date for equity rows (defaulting to ``period_date``).
+    Rates are resolved per (currency, rate type) group in one vectorized
+    lookup. Raises RateNotFoundError listing every missing rate.
+    """
+    rate_types = rate_types or ACCOUNT_RATE_TYPES
+    df = df.rename(columns=str.lower).copy()
+    df['amount'] = pd.to_numeric(df['amount'], errors='coerce').fillna(0.0)
+    df['rate_type'] = df['account_type'].str.upper().map(rate_types).fillna('SPOT')
+    period_date = pd.Timestamp(period_date)
+    lookup_dates = pd.Series(period_date, index=df.index)
+    if 'rate_date' in df.columns:
+        historical = df['rate_type'] == 'HISTORICAL'
+        lookup_dates[historical] = pd.to_datetime(df.loc[historical, 'rate_date']).fillna(period_date)
+
+    df['rate'] = np.nan
+    for (currency, rate_type), idx in df.groupby(['currency', 'rate_type'], sort=False).groups.items():
+        values = rates.rates(currency, reporting_currency, rate_type, lookup_dates[idx])
+        if rate_type == 'HISTORICAL' and np.isnan(values).any():
+            # No historical rate recorded: fall back to the spot rate on that date
+            spot = rates.rates(currency, reporting_currency, 'SPOT', lookup_dates[idx])
+            values = np.where(np.isnan(values), spot, values)
+        df.loc[idx, 'rate'] = values
+
+    missing = df[df['rate'].isna()]
+    if not missing.empty:
+        pairs = sorted(set(zip(missing['currency'], missing['rate_type'])))
+        raise RateNotFoundError(
+            f"Missing {reporting_currency} rates for {period_date.date()}: "
+            + ", ".join(f"{c} {t}" for c, t in pairs)
+        )
+    df['translated_amount'] = np.round(df['amount'] * df['rate'], 2)
+    return df
+
+
+def compute_cta(translated: pd.DataFrame) -> pd.DataFrame:
+    """Cumulative translation adjustment per entity.
+
+    A balanced local trial balance stops balancing once its lines are
+    translated at different rates; the CTA is the plug that restores it
+    (debits positive, credits negative). Entities are sorted so the output
+    is reproducible.
+    """
+    totals = translated.groupby('entity', sort=True).agg(
+        currency=('currency', 'first'),
+        local_total=('amount', 'sum'),
+        translated_total=('translated_amount', 'sum'),
+    ).reset_index()
+    totals['cta'] = np.round(-totals['translated_total'], 2)
+    return totals
+
+
+def cta_entries(cta: pd.DataFrame, reporting_currency: str, cta_account: str = CTA_ACCOUNT) -> List[Dict]:
+    """Journal entries in the consolidation-entry format, one per entity with a non-zero CTA"""
+    entries = []
+    for row in cta.itertuples(index=False):
+        if row.cta == 0:
+            continue
+        entries.append({
+            'account_code': cta_account,
+            'description': f"Currency translation adjustment {row.entity} ({row.currency}->{reporting_currency})",
+            'debit_amount': float(row.cta) if row.cta > 0 else 0.0,
+            'credit_amount': float(-row.cta) if row.cta < 0 else 0.0,
+            'entity': row.entity,
+        })
+    return entries
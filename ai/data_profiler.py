@@ -0,0 +1,132 @@
+# ai/data_profiler.py
+import json
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+PERIOD_COLUMNS = ('period', 'period_date', 'fiscal_period', 'month')
+VALUE_COLUMNS = ('amount', 'variance', 'balance', 'actual_amount', 'value')
+KEY_COLUMNS = ('account_code', 'account', 'account_name', 'entity', 'entity_code')
+
+
+def _pick(df: pd.DataFrame, candidates, explicit: Optional[str]) -> Optional[str]:
+    if explicit:
+        return explicit
+    return next((c for c in candidates if c in df.columns), None)
+
+
+def _round(value, digits: int = 2):
+    if value is None or (isinstance(value, float) and not np.isfinite(value)):
+        return None
+    if isinstance(value, (float, np.floating)):
+        return round(float(value), digits)
+    if isinstance(value, np.integer):
+        return int(value)
+    return value
+
+
+def distribution(df: pd.DataFrame, max_columns: int = 8, top_k: int = 5) -> Dict[str, Any]:
+    """Summary statistics per numeric column and top values per low-cardinality text column"""
+    stats: Dict[str, Any] = {}
+    numeric = df.select_dtypes(include='number').columns[:max_columns]
+    if len(numeric):
+        described = df[numeric].describe(percentiles=[0.05, 0.25, 0.5, 0.75, 0.95]).T
+        described['sum'] = df[numeric].sum()
+        for col, row in described.iterrows():
+            stats[col] = {k: _round(v) for k, v in row.items()}
+    for col in df.select_dtypes(exclude='number').columns[:max_columns]:
+        counts = df[col].value_counts(dropna=True)
+        if 0 < len(counts) <= max(50, top_k):
+            stats[col] = {'distinct': int(len(counts)),
+                          'top': {str(k): int(v) for k, v in counts.head(top_k).items()}}
+        else:
+            stats[col] = {'distinct': int(df[col].nunique(dropna=True))}
+    return stats
+
+
+def period_deltas(df: pd.DataFrame, period_col: str, value_col: str, max_periods: int = 12) -> List[Dict]:
+    """Totals per period with absolute and percentage change versus the prior period"""
+    totals = df.groupby(period_col, sort=True)[value_col].sum().tail(max_periods)
+    deltas = totals.diff()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pct = np.where(totals.shift() != 0, deltas / totals.shift().abs() * 100, np.nan)
+    return [
+        {'period': str(p), 'total': _round(t), 'delta': _round(d), 'delta_pct': _round(c)}
+        for p, t, d, c in zip(totals.index, totals.values, deltas.values, pct)
+    ]
+
+
+def top_movers(df: pd.DataFrame, key_col: str, period_col: str, value_col: str, n: int = 5) -> List[Dict]:
+    """Keys with the largest change between the last two periods"""
+    pivot = df.pivot_table(index=key_col, columns=period_col, values=value_col, aggfunc='sum', fill_value=0)
+    if pivot.shape[1] < 2:
+        return []
+    pivot = pivot.reindex(sorted(pivot.columns), axis=1)
+    previous, latest = pivot.iloc[:, -2], pivot.iloc[:, -1]
+    change = latest - previous
+    order = change.abs().sort_values(ascending=False).index[:n]
+    return [
+        {'key': str(k), 'previous': _round(previous[k]), 'latest': _round(latest[k]), 'change': _round(change[k])}
+        for k in order
+    ]
+
+
+def largest(df: pd.DataFrame, key_col: Optional[str], value_col: str, n: int = 5) -> List[Dict]:
+    """Rows with the largest absolute values"""
+    idx = df[value_col].abs().nlargest(n).index
+    cols = [c for c in (key_col, value_col) if c]
+    return [{k: _round(v) for k, v in row.items()} for row in df.loc[idx, cols].to_dict(orient='records')]
+
+
+def outliers(df: pd.DataFrame, value_col: str, key_col: Optional[str] = None,
+             group_col: Optional[str] = None, threshold: float = 3.5, n: int = 5) -> Dict[str, Any]:
+    """Flag values whose robust z-score (median/MAD, optionally per group) exceeds ``threshold``"""
+    values = df[value_col].astype(float)
+    if group_col:
+        grouped = values.groupby(df[group_col])
+        median = grouped.transform('median')
+        mad = (values - median).abs().groupby(df[group_col]).transform('median')
+    else:
+        median = values.median()
+        mad = (values - median).abs().median()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = 0.6745 * (values - median) / mad
+    z = z.replace([np.inf, -np.inf], np.nan)
+    flagged = z.abs() > threshold
+    top = z[flagged].abs().sort_values(ascending=False).index[:n]
+    cols = [c for c in (key_col, group_col, value_col) if c]
+    examples = [dict({k: _round(v) for k, v in df.loc[i, cols].items()}, robust_z=_round(z[i]))
+                for i in top]
+    return {'count': int(flagged.sum()), 'threshold': threshold, 'examples': examples}
+
+
+def profile(df: pd.DataFrame, value_col: Optional[str] = None, period_col: Optional[str] = None,
+            key_col: Optional[str] = None, top_n: int = 5) -> Dict[str, Any]:
+    """Compact, prompt-sized profile of a full result set.
+
+    Column roles are taken from the arguments or guessed from common names
+    (case-insensitive). Sections that do not apply are left out.
+    """
+    df = df.rename(columns=str.lower)
+    value_col = _pick(df, VALUE_COLUMNS, value_col and value_col.lower())
+    period_col = _pick(df, PERIOD_COLUMNS, period_col and period_col.lower())
+    key_col = _pick(df, KEY_COLUMNS, key_col and key_col.lower())
+
+    payload: Dict[str, Any] = {'rows': int(len(df)), 'distribution': distribution(df, top_k=top_n)}
+    if df.empty or not value_col or value_col not in df.columns:
+        return payload
+
+    df = df.assign(**{value_col: pd.to_numeric(df[value_col], errors='coerce')}).dropna(subset=[value_col])
+    payload['largest'] = largest(df, key_col, value_col, top_n)
+    payload['outliers'] = outliers(df, value_col, key_col, key_col if period_col else None, n=top_n)
+    if period_col:
+        payload['period_totals'] = period_deltas(df, period_col, value_col)
+        if key_col:
+            payload['top_movers'] = top_movers(df, key_col, period_col, value_col, top_n)
+    return payload
+
+
+def to_prompt(payload: Dict[str, Any]) -> str:
+    """Serialize a profile compactly for a prompt"""
+    return json.dumps(payload, separators=(',', ':'), default=str)
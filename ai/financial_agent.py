@@ -1,18 +1,58 @@
 # ai/financial_agent.py
-import google.generativeai as genai
 import pandas as pd
-from typing import Dict, List, Any, Optional
+from typing import Callable, Dict, List, Any, Optional
 import json
 import logging
+import time
 from database.db_manager import DatabaseManager
+from database.table_stats import TableStatsService
+from concurrent.futures import ThreadPoolExecutor
+from database.query_templates import (QueryTemplateRegistry, VARIANCE_TEMPLATE, VARIANCE_PERIODS_TEMPLATE,
+                                      VARIANCE_PERIODS_ENTITY_TEMPLATE, period_binds)
+from ai.variance import compute_variances, summarize_by_period, top_variances, records
+from ai.sql_pipeline import SQLPipeline, SQLValidationError, GuardedQuery
+from ai.result_summary import ResultSummarizer
+from ai import data_profiler
+from ai.anomaly_detection import AnomalyDetector
+from ai.currency_translation import translate_balances, compute_cta, cta_entries
+from database.fx_rates import FXRateService
+from diagnostics.tracing import Tracer, traced
+from ai.model_registry import ModelRegistry
+from ai.model_router import ModelRouter, non_empty
+from ai.structured_output import (Schema, StructuredOutputError, generate_structured, CONSOLIDATION_ENTRIES,
+                                  ANALYSIS_ACTION)
 
 class FinancialAIAgent:
     """AI Agent for financial analysis and database operations"""
     
-    def __init__(self, api_key: str):
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel("models/gemini-2.0-flash")
+    # Which registry task (and so which configured model) serves each feature
+    FEATURE_TASKS = {
+        'run_analysis_loop': 'sql',
+        'generate_raw_sql': 'sql',
+        'analyze_variances': 'analysis',
+        'analyze_variances_batch': 'analysis',
+        'smart_insights': 'analysis',
+        'explain_anomalies': 'analysis',
+        'generate_consolidation_entries': 'consolidation',
+        'process_uploaded_file': 'extraction',
+    }
+
+    def __init__(self, registry: ModelRegistry, max_query_cost: int = 100000, query_row_limit: int = 1000):
+        self.registry = registry
+        self.router = ModelRouter()
         self.db_manager = DatabaseManager()
+        self.table_stats = TableStatsService(self.db_manager)
+        self.query_templates = QueryTemplateRegistry(self.db_manager, allowed_tables=self._schema_tables)
+        self.query_templates.register(VARIANCE_TEMPLATE)
+        self.query_templates.register(VARIANCE_PERIODS_TEMPLATE)
+        self.query_templates.register(VARIANCE_PERIODS_ENTITY_TEMPLATE)
+        self.sql_pipeline = SQLPipeline(
+            self.db_manager, self._generate_raw_sql, known_tables=self._schema_tables,
+            max_cost=max_query_cost, row_limit=query_row_limit
+        )
+        self.fx_rates = FXRateService(self.db_manager)
+        self.anomaly_detector = AnomalyDetector(['account_code'], 'period', 'amount')
+        self.tracer = Tracer()
         self.logger = logging.getLogger(__name__)
         
         # Financial consolidation context
@@ -28,98 +68,211 @@ class FinancialAIAgent:
         Always provide accurate, actionable financial advice based on the data.
         When generating SQL, use Oracle syntax and ensure queries are optimized.
         """
-    
+
+    def warm_up(self, timeout: float = 10.0):
+        """Verify the API key and the configured models with lightweight metadata calls"""
+        self.registry.warm_up(timeout=timeout)
+
+    def _generate(self, prompt: str, feature: str, message: str = "", validate=non_empty):
+        """Single entry point for model calls, dispatched by the shared router.
+
+        Prompts here are templates, so only ``message`` (the user's own words,
+        if any) and the prompt size inform the complexity classification.
+        """
+        return self.router.generate(prompt, feature, task=self.FEATURE_TASKS.get(feature, 'analysis'),
+                                    message=message, validate=validate)
+
+    def chat(self, prompt: str, message: str = "") -> str:
+        """Free-form assistant reply for the chat page"""
+        response = self.router.generate(prompt, "chat", task="chat", message=message)
+        return response.text.strip() if response.text else ""
+
+    def _generate_structured(self, prompt: str, feature: str, schema: Schema, message: str = "",
+                             on_item: Optional[Callable[[Any], None]] = None):
+        """Schema-constrained model call: validated JSON, streamed items, targeted retry on bad output"""
+        def generate(attempt_prompt: str, **kwargs):
+            return self.router.generate(attempt_prompt, feature, task=self.FEATURE_TASKS.get(feature, 'analysis'),
+                                        message=message, **kwargs)
+        return generate_structured(generate, prompt, schema, on_item=on_item)
+
+    def _row_estimates(self, tables: List[str]) -> Dict[str, Optional[int]]:
+        """Cached optimizer row estimates per table (None when unknown)"""
+        try:
+            self.table_stats.ensure_fresh()
+        except Exception as e:
+            self.logger.warning(f"Table statistics unavailable: {e}")
+        return {table: self.table_stats.estimated_rows(table) for table in tables}
+
+    def _join_lead(self, actual_table: str, budget_table: str) -> str:
+        """Alias of the smaller side of an actual/budget join"""
+        row_estimates = self._row_estimates([actual_table, budget_table])
+        if None not in row_estimates.values() and row_estimates[budget_table] < row_estimates[actual_table]:
+            return 'b'
+        return 'a'
+
+    def _schema_tables(self) -> List[str]:
+        """Tables of the current schema; the whitelist for templated identifiers"""
+        if self.table_stats.is_loaded:
+            return self.table_stats.table_names()
+        return self.db_manager.get_all_tables()
+
+    @traced("agent.analyze_financial_data")
     def analyze_financial_data(self, query: str, table_context: Optional[Dict] = None) -> str:
-        """Analyze financial data with AI"""
+        """Analyze financial data with AI, letting the model run read-only queries"""
+        return self.run_analysis_loop(query, table_context)['answer']
+
+    def run_analysis_loop(self, query: str, table_context: Optional[Dict] = None, max_steps: int = 4,
+                          max_rows: int = 100000, timeout_ms: int = 30000) -> Dict[str, Any]:
+        """Tool-calling loop: the model may request SQL, which is guarded, executed and summarized.
+
+        Each requested query goes through the SQL pipeline's validation and
+        cost guard, is streamed with at most ``max_rows`` rows and a per-call
+        timeout, and only its statistical summary is fed back to the model.
+        Returns the final answer plus the executed steps.
+        """
+        steps = []
         try:
             # Get relevant table data if table context provided
             data_context = ""
             if table_context:
                 for table_name, columns in table_context.items():
                     data_context += f"\nTable: {table_name}\nColumns: {', '.join(columns)}\n"
-            
-            # Enhanced prompt with database context
-            enhanced_prompt = f"""
-            {self.system_prompt}
-            
-            Database Context:
-            {data_context}
-            
-            User Query: {query}
-            
-            Provide a comprehensive analysis including:
-            1. Understanding of the financial question
-            2. Relevant SQL queries if needed
-            3. Financial insights and recommendations
-            4. Next steps or actions
-            """
-            
-            response = self.model.generate_content(enhanced_prompt)
-            return response.text if response.text else "Unable to generate response"
-            
+
+            for step in range(max_steps):
+                final_step = step == max_steps - 1
+                enhanced_prompt = f"""
+                {self.system_prompt}
+                
+                Database Context:
+                {data_context}
+                
+                User Query: {query}
+                
+                Queries already run (results are statistical summaries, not raw rows):
+                {json.dumps(steps, indent=2, default=str) if steps else "None"}
+                
+                Respond with a single JSON object and nothing else, either
+                {{"action": "query", "sql": "<one read-only Oracle SELECT>", "reason": "<why>"}}
+                to run a query, or
+                {{"action": "answer", "text": "<analysis>"}}
+                with a comprehensive analysis including the understanding of the question,
+                financial insights and recommendations, and next steps.
+                {"You have no queries left: answer now." if final_step else ""}
+                """
+
+                try:
+                    action = self._generate_structured(enhanced_prompt, 'run_analysis_loop', ANALYSIS_ACTION,
+                                                       message=query)
+                except StructuredOutputError as e:
+                    # The model answered in prose
+                    return {'answer': e.text or "Unable to generate response", 'steps': steps}
+                if action['action'] == 'answer' or final_step or not action.get('sql'):
+                    return {'answer': action.get('text') or action.get('reason') or "Unable to generate response",
+                            'steps': steps}
+                steps.append(self._run_tool_query(action['sql'], max_rows, timeout_ms))
+
+            return {'answer': "Unable to generate response", 'steps': steps}
+
         except Exception as e:
             self.logger.error(f"AI analysis failed: {e}")
-            return f"Error in analysis: {str(e)}"
+            return {'answer': f"Error in analysis: {str(e)}", 'steps': steps}
+
+    def _run_tool_query(self, sql: str, max_rows: int, timeout_ms: int) -> Dict[str, Any]:
+        """Guard, stream and summarize one model-requested query"""
+        step: Dict[str, Any] = {'sql': sql}
+        start = time.perf_counter()
+        try:
+            guarded = self.sql_pipeline.guard_sql(sql)
+            summarizer = ResultSummarizer()
+            for columns, rows in self.db_manager.iter_query(guarded.generated_sql, max_rows=max_rows,
+                                                            timeout_ms=timeout_ms):
+                summarizer.add_batch(columns, rows)
+            step['result'] = summarizer.summary(truncated=summarizer.rows >= max_rows)
+            if guarded.warnings:
+                step['warnings'] = guarded.warnings
+        except Exception as e:
+            self.logger.warning(f"Tool query failed: {e}")
+            step['error'] = str(e)
+        step['elapsed_ms'] = round((time.perf_counter() - start) * 1000, 1)
+        return step
     
+    @traced("agent.generate_sql_query")
     def generate_sql_query(self, natural_language_query: str, available_tables: List[str]) -> str:
-        """Generate SQL query from natural language"""
+        """Generate a validated, cost-checked SQL query from natural language"""
         try:
-            # Get table structures
-            table_info = {}
-            for table in available_tables:
-                table_info[table] = self.db_manager.get_table_info(table)
-            
-            prompt = f"""
-            Convert this natural language query to Oracle SQL:
-            "{natural_language_query}"
-            
-            Available tables and their structures:
-            {json.dumps(table_info, indent=2, default=str)}
-            
-            Requirements:
-            1. Use Oracle SQL syntax
-            2. Include appropriate JOINs if needed
-            3. Add WHERE clauses for filtering
-            4. Use proper aggregation functions
-            5. Optimize for performance
-            
-            Return only the SQL query without explanations.
-            """
-            
-            response = self.model.generate_content(prompt)
-            return response.text.strip() if response.text else ""
-            
+            return self.prepare_sql_query(natural_language_query, available_tables).sql
+        except SQLValidationError as e:
+            self.logger.warning(f"Generated SQL rejected: {e}")
+            return ""
         except Exception as e:
             self.logger.error(f"SQL generation failed: {e}")
             return ""
+
+    def prepare_sql_query(self, natural_language_query: str, available_tables: List[str]) -> GuardedQuery:
+        """Translate a question through the cached, validated NL→SQL pipeline.
+
+        Raises SQLValidationError (or QueryRejectedError) if the generated SQL
+        is unsafe or too expensive.
+        """
+        return self.sql_pipeline.prepare(natural_language_query, available_tables)
+
+    def _generate_raw_sql(self, natural_language_query: str, available_tables: List[str]) -> str:
+        """Ask the model for SQL; the text is not validated here"""
+        # Get table structures, listing the smallest tables first
+        row_estimates = self._row_estimates(available_tables)
+        table_info = {}
+        for table in self.table_stats.order_by_size(available_tables):
+            table_info[table] = {
+                'estimated_rows': row_estimates[table],
+                'columns': self.db_manager.get_table_info(table)
+            }
+        
+        prompt = f"""
+        Convert this natural language query to Oracle SQL:
+        "{natural_language_query}"
+        
+        Available tables and their structures:
+        {json.dumps(table_info, indent=2, default=str)}
+        
+        Requirements:
+        1. Use Oracle SQL syntax
+        2. Include appropriate JOINs if needed
+        3. Add WHERE clauses for filtering
+        4. Use proper aggregation functions
+        5. Optimize for performance: filter early, and when joining, drive the join
+           from the table with the smaller estimated_rows
+        
+        Return only the SQL query without explanations.
+        """
+        
+        response = self._generate(prompt, 'generate_raw_sql', message=natural_language_query)
+        return response.text.strip() if response.text else ""
     
+    @traced("agent.analyze_variances")
     def analyze_variances(self, actual_table: str, budget_table: str, period: str) -> Dict[str, Any]:
         """Analyze variances between actual and budget data"""
         try:
-            # Generate variance analysis query
-            variance_query = f"""
-            SELECT 
-                a.account_code,
-                a.account_name,
-                a.amount as actual_amount,
-                b.amount as budget_amount,
-                (a.amount - b.amount) as variance,
-                CASE 
-                    WHEN b.amount != 0 THEN ROUND(((a.amount - b.amount) / b.amount) * 100, 2)
-                    ELSE NULL 
-                END as variance_percentage
-            FROM {actual_table} a
-            FULL OUTER JOIN {budget_table} b ON a.account_code = b.account_code
-            WHERE a.period = '{period}' AND b.period = '{period}'
-            ORDER BY ABS(a.amount - b.amount) DESC
-            """
-            
-            variance_data = self.db_manager.execute_query(variance_query)
-            
+            # Let the smaller table lead the join (hash join build side)
+            smaller = self._join_lead(actual_table, budget_table)
+
+            # Identifiers are whitelisted and the period is bound, so every
+            # period reuses the same parsed statement
+            variance_data = self.query_templates.execute(
+                'variance', {'period': period},
+                actual_table=actual_table, budget_table=budget_table, lead=smaller
+            )
+            
+            # Profile every variance row instead of pasting a handful of them
+            variance_profile = data_profiler.profile(
+                pd.DataFrame(variance_data), value_col='variance', key_col='account_code'
+            )
+
             # AI analysis of variances
             analysis_prompt = f"""
-            Analyze these financial variances:
-            {json.dumps(variance_data[:20], indent=2, default=str)}  # Top 20 variances
+            Analyze these financial variances for period {period}
+            (statistical profile of all {len(variance_data)} accounts: distribution,
+            largest variances and robust outliers):
+            {data_profiler.to_prompt(variance_profile)}
             
             Provide:
             1. Key variance insights
@@ -128,7 +281,7 @@ class FinancialAIAgent:
             4. Recommendations for investigation
             """
             
-            ai_analysis = self.model.generate_content(analysis_prompt)
+            ai_analysis = self._generate(analysis_prompt, 'analyze_variances')
             
             return {
                 'variance_data': variance_data,
@@ -143,9 +296,121 @@ class FinancialAIAgent:
             self.logger.error(f"Variance analysis failed: {e}")
             return {'error': str(e)}
     
-    def generate_consolidation_entries(self, subsidiary_data: List[Dict], parent_company: str) -> List[Dict]:
-        """Generate consolidation elimination entries"""
+    @traced("agent.analyze_variances_batch")
+    def analyze_variances_batch(self, actual_table: str, budget_table: str, periods: List[str],
+                                entity_column: Optional[str] = None, entities: Optional[List[str]] = None,
+                                max_workers: int = 4, top_n: int = 5) -> Dict[str, Any]:
+        """Analyze variances for many periods (and entities) with one AI summary.
+
+        Periods are fetched in fixed-size bind chunks on a single prepared
+        cursor; when ``entities`` are given each entity is fetched in parallel
+        over the pool. Variances are computed in one vectorized pass and the
+        model is called once with per-period totals and the top movers.
+        ``variance_data`` holds JSON-friendly records, like the single-period
+        result, so job and batch results keep every row.
+        """
         try:
+            if not periods:
+                raise ValueError("At least one period is required")
+            if entities and not entity_column:
+                raise ValueError("entity_column is required when entities are given")
+
+            lead = self._join_lead(actual_table, budget_table)
+            binds = period_binds(periods)
+
+            def fetch(entity=None):
+                if entity is None:
+                    batches = self.query_templates.execute_batch(
+                        'variance_periods', binds,
+                        actual_table=actual_table, budget_table=budget_table, lead=lead
+                    )
+                else:
+                    batches = self.query_templates.execute_batch(
+                        'variance_periods_entity', [dict(b, entity=entity) for b in binds],
+                        actual_table=actual_table, budget_table=budget_table, lead=lead,
+                        entity_column=entity_column
+                    )
+                return [row for batch in batches for row in batch]
+
+            if entities:
+                with ThreadPoolExecutor(max_workers=min(max_workers, len(entities))) as executor:
+                    rows = [row for part in executor.map(self.tracer.bind(fetch), entities) for row in part]
+            else:
+                rows = fetch()
+
+            df = pd.DataFrame(rows)
+            df.columns = [c.lower() for c in df.columns]
+            if df.empty:
+                df = pd.DataFrame(columns=['period'] + (['entity'] if entities else []) +
+                                  ['account_code', 'account_name', 'actual_amount', 'budget_amount'])
+            df = compute_variances(df)
+            group_cols = ['period', 'entity'] if entities else ['period']
+            by_period = summarize_by_period(df, group_cols)
+            movers = top_variances(df, group_cols, top_n)
+
+            analysis_prompt = f"""
+            Analyze these financial variances across {len(periods)} periods
+            {f"and {len(entities)} entities" if entities else ""}.
+
+            Totals per {' and '.join(group_cols)}:
+            {json.dumps(records(by_period), indent=2, default=str)}
+
+            Largest variances per {' and '.join(group_cols)} (top {top_n}):
+            {json.dumps(records(movers[group_cols + ['account_code', 'account_name', 'actual_amount', 'budget_amount', 'variance', 'variance_percentage']]), default=str)}
+
+            Provide one consolidated review:
+            1. Trends in variances across periods
+            2. Accounts and entities with recurring significant variances
+            3. Potential causes
+            4. Recommendations for investigation
+            """
+            ai_analysis = self._generate(analysis_prompt, 'analyze_variances_batch')
+
+            return {
+                'variance_data': records(df),
+                'by_period': records(by_period),
+                'ai_analysis': ai_analysis.text if ai_analysis.text else "Analysis unavailable",
+                'summary': {
+                    'periods': len(periods),
+                    'entities': len(entities) if entities else None,
+                    'total_variances': len(df),
+                    'significant_variances': int(df['significant'].sum())
+                }
+            }
+
+        except Exception as e:
+            self.logger.error(f"Batch variance analysis failed: {e}")
+            return {'error': str(e)}
+    
+    @traced("agent.generate_consolidation_entries")
+    def generate_consolidation_entries(self, subsidiary_data: List[Dict], parent_company: str,
+                                       reporting_currency: Optional[str] = None, period_date=None,
+                                       on_entry: Optional[Callable[[Dict], None]] = None) -> List[Dict]:
+        """Generate consolidation elimination entries.
+
+        With ``reporting_currency`` set and subsidiary rows carrying
+        ``currency`` and ``account_type``, currency translation adjustments are
+        computed locally from the FX rate tables instead of by the model.
+        Entries are requested as schema-constrained JSON; ``on_entry`` receives
+        each validated entry as soon as it is available, while the model
+        response is still streaming.
+        """
+        try:
+            translation_entries = []
+            translation_note = "4. Currency translation adjustments"
+            if reporting_currency:
+                try:
+                    self.fx_rates.ensure_fresh()
+                except Exception as e:
+                    # Rates loaded from local files can still cover the translation
+                    self.logger.warning(f"FX rate refresh from database failed: {e}")
+                translated = translate_balances(pd.DataFrame(subsidiary_data), self.fx_rates, reporting_currency,
+                                                period_date or pd.Timestamp.now().normalize())
+                translation_entries = cta_entries(compute_cta(translated), reporting_currency)
+                subsidiary_data = records(translated)
+                translation_note = (f"(Amounts are already translated to {reporting_currency} in translated_amount; "
+                                    "currency translation adjustments are computed separately - do not create them.)")
+
             prompt = f"""
             Generate consolidation elimination entries for {parent_company} based on this subsidiary data:
             {json.dumps(subsidiary_data, indent=2, default=str)}
@@ -154,53 +419,56 @@ class FinancialAIAgent:
             1. Intercompany transactions
             2. Investment elimination
             3. Intercompany profits
-            4. Currency translation adjustments
+            {translation_note}
             
             Return as JSON array with: account_code, description, debit_amount, credit_amount
             """
             
-            response = self.model.generate_content(prompt)
-            
-            # Parse AI response to extract elimination entries
-            if response.text:
-                # Extract JSON from response
-                import re
-                json_match = re.search(r'\[.*\]', response.text, re.DOTALL)
-                if json_match:
-                    try:
-                        elimination_entries = json.loads(json_match.group())
-                        return elimination_entries
-                    except json.JSONDecodeError:
-                        pass
+            if on_entry:
+                for entry in translation_entries:
+                    on_entry(entry)
+            try:
+                elimination_entries = self._generate_structured(prompt, 'generate_consolidation_entries',
+                                                                CONSOLIDATION_ENTRIES, on_item=on_entry)
+            except StructuredOutputError as e:
+                self.logger.error(f"Consolidation entries did not match the schema: {e.errors[:5]}")
+                elimination_entries = e.partial
             
-            return []
+            return elimination_entries + translation_entries
             
         except Exception as e:
             self.logger.error(f"Consolidation entries generation failed: {e}")
             return []
     
-    def smart_insights(self, query: str) -> Dict[str, Any]:
+    def _fetch_frame(self, sql: str, max_rows: int, params: Optional[Dict] = None) -> pd.DataFrame:
+        """Stream a query into a DataFrame, stopping after ``max_rows`` rows"""
+        frames = [pd.DataFrame.from_records(rows, columns=columns)
+                  for columns, rows in self.db_manager.iter_query(sql, params, batch_size=5000, max_rows=max_rows)]
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+    @traced("agent.smart_insights")
+    def smart_insights(self, query: str, max_rows: int = 500000) -> Dict[str, Any]:
         """Generate smart financial insights"""
         try:
-            # Get recent financial data
+            # Profile all recent financial data, bounded by max_rows
             recent_data_query = """
-            SELECT * FROM (
-                SELECT * FROM financial_data 
-                WHERE period >= ADD_MONTHS(SYSDATE, -3)
-                ORDER BY period DESC
-            ) WHERE ROWNUM <= 100
+            SELECT * FROM financial_data 
+            WHERE period >= ADD_MONTHS(SYSDATE, -3)
             """
             
             try:
-                recent_data = self.db_manager.execute_query(recent_data_query)
-            except:
-                recent_data = []
+                recent_data = self._fetch_frame(recent_data_query, max_rows)
+            except Exception as e:
+                self.logger.warning(f"Recent financial data unavailable: {e}")
+                recent_data = pd.DataFrame()
             
             insights_prompt = f"""
             Provide smart financial insights based on:
             
             Query: {query}
-            Recent Financial Data: {json.dumps(recent_data[:10], indent=2, default=str)}
+            Recent Financial Data (statistical profile of {len(recent_data)} rows: distribution,
+            period-over-period totals, top movers and outliers):
+            {data_profiler.to_prompt(data_profiler.profile(recent_data))}
             
             Generate insights about:
             1. Financial trends
@@ -210,7 +478,7 @@ class FinancialAIAgent:
             5. Key performance indicators (KPIs)
             """
             
-            response = self.model.generate_content(insights_prompt)
+            response = self._generate(insights_prompt, 'smart_insights')
             
             return {
                 'insights': response.text if response.text else "No insights available",
@@ -222,6 +490,70 @@ class FinancialAIAgent:
             self.logger.error(f"Smart insights generation failed: {e}")
             return {'error': str(e)}
     
+    @traced("agent.detect_anomalies")
+    def detect_anomalies(self, max_rows: int = 5000000, explain: bool = True, top_n: int = 25) -> Dict[str, Any]:
+        """Score financial_data periods loaded since the last run and explain the flags.
+
+        The first run loads the detector's full history window; later runs
+        fetch and score only newer periods.
+        """
+        try:
+            detector = self.anomaly_detector
+            if detector.periods:
+                since = pd.Timestamp(detector.periods[-1]).to_pydatetime()
+                sql = """
+                SELECT account_code, period, SUM(amount) AS amount FROM financial_data
+                WHERE period > :since GROUP BY account_code, period
+                """
+                params = {'since': since}
+            else:
+                sql = """
+                SELECT account_code, period, SUM(amount) AS amount FROM financial_data
+                WHERE period >= ADD_MONTHS(TRUNC(SYSDATE, 'MM'), -:months) GROUP BY account_code, period
+                """
+                params = {'months': detector.config.window + 1}
+
+            data = self._fetch_frame(sql, max_rows, params)
+            if data.empty:
+                return {'flags': [], 'benford': [], 'explanation': "No new periods to score"}
+
+            flags = detector.update(data)
+            benford = detector.benford(data)
+            result = {
+                'flags': records(flags.head(top_n)),
+                'flag_count': len(flags),
+                'benford': records(benford.drop(columns='observed')) if not benford.empty else [],
+                'periods_scored': sorted({str(p) for p in data.rename(columns=str.lower)['period'].unique()}),
+            }
+            if explain and (len(flags) or (not benford.empty and benford['nonconforming'].any())):
+                result['explanation'] = self.explain_anomalies(flags, benford, top_n)
+            return result
+
+        except Exception as e:
+            self.logger.error(f"Anomaly detection failed: {e}")
+            return {'error': str(e)}
+
+    def explain_anomalies(self, flags: pd.DataFrame, benford: Optional[pd.DataFrame] = None,
+                          top_n: int = 25) -> str:
+        """Ask the model to explain locally flagged anomalies"""
+        prompt = f"""
+        {self.system_prompt}
+        
+        A local statistical engine flagged these account/period values ({len(flags)} flags in total,
+        strongest first). robust_z compares each value with the account's recent history;
+        seasonal_z compares it with the same period in prior years.
+        {data_profiler.to_prompt(records(flags.head(top_n)))}
+        
+        Benford first-digit test on amounts (mad above 0.015 is nonconforming):
+        {data_profiler.to_prompt(records(benford.drop(columns='observed')) if benford is not None and not benford.empty else [])}
+        
+        For each flag give the likely business explanation (timing, reclassification,
+        one-off event, data error), whether it needs follow-up, and what to check.
+        """
+        response = self._generate(prompt, 'explain_anomalies')
+        return response.text if response.text else "No explanation available"
+
+    @traced("agent.process_uploaded_file")
     def process_uploaded_file(self, file_content: str, file_type: str) -> str:
         """Process uploaded financial files with AI"""
         try:
@@ -238,7 +570,7 @@ class FinancialAIAgent:
             5. Recommendations for data integration
             """
             
-            response = self.model.generate_content(prompt)
+            response = self._generate(prompt, 'process_uploaded_file')
             return response.text if response.text else "Unable to process file"
             
         except Exception as e:
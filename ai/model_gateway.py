@@ -0,0 +1,188 @@
+# ai/model_gateway.py
+import hashlib
+import logging
+import random
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Dict, Optional, Tuple
+
+from google.api_core import exceptions as api_exceptions
+
+from diagnostics.model_telemetry import ModelTelemetry
+
+# Errors worth retrying: throttling, overload and timeouts
+TRANSIENT_ERRORS = (
+    api_exceptions.TooManyRequests,
+    api_exceptions.ResourceExhausted,
+    api_exceptions.ServiceUnavailable,
+    api_exceptions.InternalServerError,
+    api_exceptions.DeadlineExceeded,
+    api_exceptions.GatewayTimeout,
+    ConnectionError,
+    TimeoutError,
+)
+
+
+class RateLimitTimeout(TimeoutError):
+    """No rate-limit token became available in time"""
+
+
+class TokenBucket:
+    """Thread-safe token bucket: ``rate`` tokens per second, bursts up to ``capacity``"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._cond = threading.Condition()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens: float = 1.0, timeout: Optional[float] = None) -> float:
+        """Block until ``tokens`` are available; returns the seconds spent waiting"""
+        started = time.monotonic()
+        deadline = None if timeout is None else started + timeout
+        with self._cond:
+            while True:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return time.monotonic() - started
+                wait = (tokens - self._tokens) / self.rate
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise RateLimitTimeout(f"No model request slot within {timeout:.1f}s")
+                    wait = min(wait, remaining)
+                self._cond.wait(wait)
+
+    def configure(self, rate: float, capacity: float):
+        with self._cond:
+            self._refill()
+            self.rate = rate
+            self.capacity = capacity
+            self._tokens = min(self._tokens, capacity)
+            self._cond.notify_all()
+
+
+class _LeaderAborted(Exception):
+    """Handed to coalesced waiters when the leading call ended with a non-Exception BaseException"""
+
+
+class ModelGateway:
+    """Singleton gateway every generate_content call goes through.
+
+    * A token bucket keeps the whole process under ``requests_per_minute``.
+    * Transient API errors are retried with full-jitter exponential backoff.
+    * Identical concurrent requests (same model, prompt and options) are
+      coalesced: one call is made and every waiter gets its response.
+
+    Calls are made through ModelTelemetry, so each attempt is traced and
+    recorded with its retry number.
+    """
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self, requests_per_minute: float = 60, burst: Optional[float] = None, max_retries: int = 3,
+                 backoff_base: float = 1.0, backoff_cap: float = 30.0, acquire_timeout: float = 120.0):
+        if not hasattr(self, 'initialized'):
+            self.bucket = TokenBucket(requests_per_minute / 60.0, burst or max(1.0, requests_per_minute / 10))
+            self.max_retries = max_retries
+            self.backoff_base = backoff_base
+            self.backoff_cap = backoff_cap
+            self.acquire_timeout = acquire_timeout
+            self.telemetry = ModelTelemetry()
+            self.logger = logging.getLogger(__name__)
+            self._in_flight: Dict[Tuple, Future] = {}
+            self._flight_lock = threading.Lock()
+            self._stats = {'calls': 0, 'coalesced': 0, 'retries': 0, 'throttled_s': 0.0}
+            self.initialized = True
+
+    def configure(self, requests_per_minute: Optional[float] = None, burst: Optional[float] = None,
+                  max_retries: Optional[int] = None):
+        """Apply settings from configuration to the shared gateway"""
+        if requests_per_minute is not None:
+            self.bucket.configure(requests_per_minute / 60.0, burst or max(1.0, requests_per_minute / 10))
+        if max_retries is not None:
+            self.max_retries = max_retries
+
+    @staticmethod
+    def _key(model, prompt: str, kwargs: Dict[str, Any]) -> Tuple:
+        digest = hashlib.sha256(prompt.encode()).hexdigest()
+        return getattr(model, 'model_name', repr(model)), digest, repr(sorted(kwargs.items()))
+
+    def generate(self, model, prompt: str, feature: str, on_stream=None, **kwargs):
+        """Rate-limited, retried, coalesced ``model.generate_content(prompt)``.
+
+        ``on_stream`` (see ModelTelemetry.generate) only observes the leader's
+        call; coalesced waiters receive the finished response.
+        """
+        key = self._key(model, prompt, kwargs)
+        while True:
+            with self._flight_lock:
+                future = self._in_flight.get(key)
+                leader = future is None
+                if leader:
+                    future = self._in_flight[key] = Future()
+                else:
+                    self._stats['coalesced'] += 1
+            if leader:
+                break
+            try:
+                return future.result()
+            except _LeaderAborted:
+                # The leader's caller stopped; whichever waiter gets here first makes the call itself
+                continue
+
+        try:
+            result = self._call_with_retry(model, prompt, feature, on_stream=on_stream, **kwargs)
+        except BaseException as e:
+            self._release(key)
+            # Waiters share the call's errors, but not a cancellation or interrupt raised for the
+            # leader's caller (e.g. by its stream callback)
+            future.set_exception(e if isinstance(e, Exception) else _LeaderAborted())
+            raise
+        self._release(key)
+        future.set_result(result)
+        return result
+
+    def _release(self, key: Tuple):
+        with self._flight_lock:
+            self._in_flight.pop(key, None)
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+    def _call_with_retry(self, model, prompt: str, feature: str, **kwargs):
+        attempt = 0
+        while True:
+            waited = self.bucket.acquire(timeout=self.acquire_timeout)
+            self._stats['calls'] += 1
+            self._stats['throttled_s'] += waited
+            try:
+                return self.telemetry.generate(model, prompt, feature, retries=attempt, **kwargs)
+            except TRANSIENT_ERRORS as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+                attempt += 1
+                self._stats['retries'] += 1
+                self.logger.warning(f"Transient model error for {feature} ({type(e).__name__}); "
+                                    f"retry {attempt}/{self.max_retries} in {delay:.1f}s")
+                time.sleep(delay)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._flight_lock:
+            return dict(self._stats, in_flight=len(self._in_flight))
@@ -0,0 +1,95 @@
+# ai/model_registry.py
+import logging
+import threading
+from typing import Dict, List, Optional
+
+import google.generativeai as genai
+
+from ai.model_gateway import ModelGateway
+from config.config_manager import AIConfig
+
+# Tasks callers ask for; each maps to AIConfig.task_models[task] or AIConfig.model_name
+TASKS = ('chat', 'fast', 'extraction', 'sql', 'analysis', 'consolidation')
+
+
+class ModelNotConfiguredError(RuntimeError):
+    """The registry has no API key/configuration yet"""
+
+
+class ModelRegistry:
+    """Singleton owner of the Gemini client and its model instances.
+
+    ``configure`` applies AIConfig once (API key, optional endpoint) and every
+    caller then asks for a task rather than a model name, so routing a task
+    to a faster or stronger model is a configuration change. Model objects
+    are created once per name and reused, and all calls go through the
+    shared ModelGateway (rate limit, retry, coalescing, telemetry).
+    """
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if not hasattr(self, 'initialized'):
+            self.config: Optional[AIConfig] = None
+            self.gateway = ModelGateway()
+            self.logger = logging.getLogger(__name__)
+            self._models: Dict[str, genai.GenerativeModel] = {}
+            self._models_lock = threading.Lock()
+            self.initialized = True
+
+    def configure(self, config: AIConfig):
+        """Configure the client from AIConfig; a changed key or endpoint drops cached models"""
+        if not config.gemini_api_key:
+            raise ModelNotConfiguredError("No Gemini API key configured")
+        previous = self.config
+        if previous is None or (previous.gemini_api_key, previous.api_endpoint) != \
+                (config.gemini_api_key, config.api_endpoint):
+            if config.api_endpoint:
+                genai.configure(api_key=config.gemini_api_key, transport="rest",
+                                client_options={'api_endpoint': config.api_endpoint})
+            else:
+                genai.configure(api_key=config.gemini_api_key)
+            with self._models_lock:
+                self._models.clear()
+        self.config = config
+        self.gateway.configure(requests_per_minute=config.requests_per_minute, max_retries=config.max_retries)
+
+    @property
+    def is_configured(self) -> bool:
+        return self.config is not None
+
+    def model_name(self, task: str) -> str:
+        if self.config is None:
+            raise ModelNotConfiguredError("Model registry is not configured")
+        return self.config.task_models.get(task) or self.config.model_name
+
+    def model_for_name(self, name: str) -> genai.GenerativeModel:
+        with self._models_lock:
+            model = self._models.get(name)
+            if model is None:
+                model = self._models[name] = genai.GenerativeModel(name)
+            return model
+
+    def model(self, task: str = 'analysis') -> genai.GenerativeModel:
+        """The (cached) model instance that serves ``task``"""
+        return self.model_for_name(self.model_name(task))
+
+    def configured_models(self) -> List[str]:
+        return sorted({self.model_name(task) for task in TASKS})
+
+    def warm_up(self, timeout: float = 10.0):
+        """Verify the key and every routed model with lightweight metadata calls"""
+        for name in self.configured_models():
+            genai.get_model(name, request_options={'timeout': timeout})
+            self.model_for_name(name)
+
+    def generate(self, task: str, prompt: str, feature: Optional[str] = None, **kwargs):
+        """Generate with the model routed for ``task``; ``feature`` labels telemetry (defaults to task)"""
+        return self.gateway.generate(self.model(task), prompt, feature or task, **kwargs)
@@ -0,0 +1,214 @@
+# ai/model_router.py
+import logging
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from ai.model_registry import ModelRegistry
+from diagnostics.query_log import percentile
+from diagnostics.tracing import Tracer
+
+LOCAL, FAST, STRONG = 'local', 'fast', 'strong'
+ROUTES = (LOCAL, FAST, STRONG)
+
+# Baseline complexity per feature: 1 = reformat/summarize, 2 = explain, 3 = multi-step reasoning
+FEATURE_COMPLEXITY = {
+    'chat': 1,
+    'process_uploaded_file': 1,
+    'explain_anomalies': 2,
+    'smart_insights': 2,
+    'analyze_variances': 2,
+    'analyze_variances_batch': 3,
+    'generate_raw_sql': 3,
+    'run_analysis_loop': 3,
+    'generate_consolidation_entries': 3,
+}
+SQL_FEATURES = {'generate_raw_sql', 'run_analysis_loop'}
+
+_REASONING_RE = re.compile(r"\b(consolidat\w*|eliminat\w*|intercompany|reconcil\w*|forecast\w*|why|"
+                           r"root cause|recommend\w*|compare|trend\w*|impact)\b", re.IGNORECASE)
+_SQL_RE = re.compile(r"\b(sql|select\s+.+\s+from|query|join|which accounts|list all|show me)\b",
+                     re.IGNORECASE | re.DOTALL)
+_SMALLTALK_RE = re.compile(r"^\s*(hi|hello|hey|thanks?|thank you|ok|okay|good (morning|afternoon|evening))"
+                           r"[\s!.]*$", re.IGNORECASE)
+
+LARGE_PAYLOAD_CHARS = 20000
+
+
+@dataclass
+class RouteDecision:
+    route: str
+    complexity: int
+    payload_chars: int
+    needs_sql: bool
+    reason: str
+
+
+@dataclass
+class LocalResponse:
+    """Stands in for a model response when a request is answered without a model call"""
+    text: str
+
+
+def classify(message: str, feature: str, payload_chars: Optional[int] = None) -> RouteDecision:
+    """Route a request by feature baseline, reasoning cues, payload size and need for SQL"""
+    payload_chars = len(message) if payload_chars is None else payload_chars
+    complexity = FEATURE_COMPLEXITY.get(feature, 2)
+    reasons = [f"{feature} baseline {complexity}"]
+    if _REASONING_RE.search(message):
+        complexity += 1
+        reasons.append("reasoning cue")
+    if payload_chars > LARGE_PAYLOAD_CHARS:
+        complexity += 1
+        reasons.append(f"{payload_chars} chars")
+    needs_sql = feature in SQL_FEATURES or bool(_SQL_RE.search(message[:2000]))
+    if needs_sql:
+        reasons.append("needs SQL")
+    route = STRONG if needs_sql or complexity >= 3 else FAST
+    return RouteDecision(route, complexity, payload_chars, needs_sql, ", ".join(reasons))
+
+
+def smalltalk_handler(message: str, feature: str) -> Optional[str]:
+    if feature == 'chat' and _SMALLTALK_RE.match(message):
+        return "Hello! Ask me about your financial data, or attach a file and I'll tabulate and summarize it."
+    return None
+
+
+def non_empty(text: str) -> bool:
+    return bool(text and text.strip())
+
+
+@dataclass
+class _RouteStats:
+    calls: int = 0
+    accepted: int = 0
+    rejected: int = 0
+    errors: int = 0
+    escalated: int = 0
+    latencies_ms: deque = field(default_factory=lambda: deque(maxlen=1000))
+
+
+class ModelRouter:
+    """Singleton dispatcher between local handlers, a fast model and a strong model.
+
+    Requests are classified first; local handlers (``register_local``) are
+    tried before any model call. A fast-route response that raises or fails
+    its validator is escalated to the strong route. Per-route latency and
+    acceptance counts feed ``report``. The fast route uses the registry's
+    ``fast`` task model and the strong route the feature's own task model.
+    """
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if not hasattr(self, 'initialized'):
+            self.registry = ModelRegistry()
+            self.tracer = Tracer()
+            self.logger = logging.getLogger(__name__)
+            self._handlers: List[Callable[[str, str], Optional[str]]] = [smalltalk_handler]
+            self._stats: Dict[str, _RouteStats] = {route: _RouteStats() for route in ROUTES}
+            self._stats_lock = threading.Lock()
+            self.initialized = True
+
+    def register_local(self, handler: Callable[[str, str], Optional[str]]):
+        """Add ``handler(message, feature) -> text or None``; None passes the request on"""
+        self._handlers.append(handler)
+
+    def _record(self, route: str, elapsed_ms: float, accepted: Optional[bool], escalated: bool = False):
+        with self._stats_lock:
+            stats = self._stats[route]
+            stats.calls += 1
+            stats.latencies_ms.append(elapsed_ms)
+            if accepted is None:
+                stats.errors += 1
+            elif accepted:
+                stats.accepted += 1
+            else:
+                stats.rejected += 1
+            stats.escalated += escalated
+
+    def _try_local(self, message: str, feature: str) -> Optional[LocalResponse]:
+        start = time.perf_counter()
+        for handler in self._handlers:
+            try:
+                text = handler(message, feature)
+            except Exception as e:
+                self.logger.warning(f"Local handler {getattr(handler, '__name__', handler)} failed: {e}")
+                continue
+            if text is not None:
+                self._record(LOCAL, (time.perf_counter() - start) * 1000, True)
+                return LocalResponse(text)
+        return None
+
+    def generate(self, prompt: str, feature: str, task: str = 'analysis', message: Optional[str] = None,
+                 validate: Callable[[str], bool] = non_empty, **kwargs):
+        """Answer ``prompt`` on the cheapest adequate route.
+
+        ``message`` is the user-facing part used for classification (defaults
+        to the prompt); ``validate(text)`` decides whether a fast-route
+        answer is accepted or escalated.
+        """
+        message = prompt if message is None else message
+        decision = classify(message, feature, payload_chars=len(prompt))
+        with self.tracer.span("ai.route", feature=feature, route=decision.route, complexity=decision.complexity):
+            local = self._try_local(message, feature)
+            if local is not None:
+                return local
+
+            if decision.route == FAST:
+                start = time.perf_counter()
+                try:
+                    response = self.registry.generate('fast', prompt, feature, **kwargs)
+                    accepted = validate(response.text)
+                except Exception as e:
+                    self.logger.warning(f"Fast route failed for {feature}, escalating: {e}")
+                    response, accepted = None, None
+                self._record(FAST, (time.perf_counter() - start) * 1000, accepted, escalated=not accepted)
+                if accepted:
+                    return response
+
+            start = time.perf_counter()
+            try:
+                response = self.registry.generate(task, prompt, feature, **kwargs)
+            except Exception:
+                self._record(STRONG, (time.perf_counter() - start) * 1000, None)
+                raise
+            try:
+                accepted = validate(response.text)
+            except Exception:
+                accepted = False
+            self._record(STRONG, (time.perf_counter() - start) * 1000, accepted)
+            return response
+
+    def report(self) -> List[Dict[str, Any]]:
+        """Per-route calls, latency percentiles, acceptance rate and escalations"""
+        with self._stats_lock:
+            rows = []
+            for route, stats in self._stats.items():
+                ordered = sorted(stats.latencies_ms)
+                rows.append({
+                    'route': route,
+                    'calls': stats.calls,
+                    'p50_ms': round(percentile(ordered, 0.50), 1) if ordered else None,
+                    'p95_ms': round(percentile(ordered, 0.95), 1) if ordered else None,
+                    'accepted': stats.accepted,
+                    'rejected': stats.rejected,
+                    'errors': stats.errors,
+                    'escalated': stats.escalated,
+                    'quality': round(stats.accepted / stats.calls, 3) if stats.calls else None,
+                })
+            return rows
+
+    def reset(self):
+        with self._stats_lock:
+            self._stats = {route: _RouteStats() for route in ROUTES}
@@ -0,0 +1,113 @@
+# ai/result_summary.py
+import math
+import random
+from collections import Counter
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+class _ColumnSummary:
+    """Bounded-memory running statistics for one result column"""
+
+    def __init__(self, name: str, sample_size: int, top_k: int, seed: int):
+        self.name = name
+        self.count = 0
+        self.nulls = 0
+        self.numeric = 0
+        self.total = 0.0
+        self.minimum: Optional[float] = None
+        self.maximum: Optional[float] = None
+        self.sample: List[float] = []
+        self.sample_size = sample_size
+        self.top_k = top_k
+        self.counts: Counter = Counter()
+        self._rng = random.Random(seed)
+
+    def add(self, value: Any):
+        self.count += 1
+        if value is None:
+            self.nulls += 1
+            return
+        if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+            number = float(value)
+            if math.isnan(number):
+                self.nulls += 1
+                return
+            self.numeric += 1
+            self.total += number
+            self.minimum = number if self.minimum is None else min(self.minimum, number)
+            self.maximum = number if self.maximum is None else max(self.maximum, number)
+            # Reservoir sampling keeps quantile estimates unbiased in fixed memory
+            if len(self.sample) < self.sample_size:
+                self.sample.append(number)
+            else:
+                j = self._rng.randrange(self.numeric)
+                if j < self.sample_size:
+                    self.sample[j] = number
+        else:
+            self.counts[str(value)[:80]] += 1
+            # Space-saving prune: keep the counter bounded on high-cardinality columns
+            if len(self.counts) > self.top_k * 20:
+                self.counts = Counter(dict(self.counts.most_common(self.top_k * 10)))
+
+    def result(self) -> Dict[str, Any]:
+        summary: Dict[str, Any] = {'count': self.count, 'nulls': self.nulls}
+        if self.numeric:
+            ordered = sorted(self.sample)
+
+            def quantile(q):
+                return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 4)
+
+            summary.update({
+                'sum': round(self.total, 4),
+                'mean': round(self.total / self.numeric, 4),
+                'min': self.minimum,
+                'max': self.maximum,
+                'p25': quantile(0.25),
+                'p50': quantile(0.5),
+                'p75': quantile(0.75),
+                'p95': quantile(0.95),
+            })
+        if self.counts:
+            summary['distinct_seen'] = len(self.counts)
+            summary['top'] = self.counts.most_common(self.top_k)
+        return summary
+
+
+class ResultSummarizer:
+    """Streaming statistical summary of a query result.
+
+    Feed it row batches as they are fetched; memory stays bounded no matter
+    how many rows arrive. The summary (counts, sums, quantiles, top-k values
+    and a few sample rows) is what gets shown to the model instead of rows.
+    """
+
+    def __init__(self, sample_size: int = 1000, top_k: int = 5, sample_rows: int = 5, seed: int = 0):
+        self.sample_size = sample_size
+        self.top_k = top_k
+        self.sample_rows_limit = sample_rows
+        self.seed = seed
+        self.columns: List[str] = []
+        self.rows = 0
+        self.sample_rows: List[Dict[str, Any]] = []
+        self._summaries: List[_ColumnSummary] = []
+
+    def add_batch(self, columns: Sequence[str], rows: Iterable[Tuple]):
+        if not self._summaries:
+            self.columns = list(columns)
+            self._summaries = [_ColumnSummary(c, self.sample_size, self.top_k, self.seed + i)
+                               for i, c in enumerate(self.columns)]
+        for row in rows:
+            self.rows += 1
+            if len(self.sample_rows) < self.sample_rows_limit:
+                self.sample_rows.append(dict(zip(self.columns, row)))
+            for summary, value in zip(self._summaries, row):
+                summary.add(value)
+
+    def summary(self, truncated: bool = False) -> Dict[str, Any]:
+        return {
+            'rows': self.rows,
+            'truncated': truncated,
+            'columns': {s.name: s.result() for s in self._summaries},
+            'sample_rows': self.sample_rows,
+        }
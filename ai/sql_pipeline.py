@@ -0,0 +1,250 @@
+# ai/sql_pipeline.py
+import hashlib
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from database.db_manager import DatabaseManager, PlanEstimate
+
+
+class SQLValidationError(ValueError):
+    """Generated SQL failed local validation"""
+
+
+class QueryRejectedError(SQLValidationError):
+    """Generated SQL is valid but its estimated plan is too expensive"""
+
+
+_FORBIDDEN = {
+    'INSERT', 'UPDATE', 'DELETE', 'MERGE', 'DROP', 'ALTER', 'CREATE', 'TRUNCATE', 'RENAME',
+    'GRANT', 'REVOKE', 'BEGIN', 'DECLARE', 'EXECUTE', 'EXEC', 'CALL', 'COMMIT', 'ROLLBACK',
+    'SAVEPOINT', 'LOCK', 'PURGE', 'FLASHBACK',
+}
+_FORBIDDEN_PREFIXES = ('DBMS_', 'UTL_', 'SYS.', 'SYS_CONTEXT')
+_CLAUSE_KEYWORDS = {
+    'WHERE', 'GROUP', 'ORDER', 'HAVING', 'CONNECT', 'START', 'UNION', 'INTERSECT', 'MINUS',
+    'FETCH', 'OFFSET', 'JOIN', 'INNER', 'LEFT', 'RIGHT', 'FULL', 'CROSS', 'NATURAL', 'ON',
+    'USING', 'PIVOT', 'UNPIVOT', 'MODEL', 'PARTITION', 'SAMPLE',
+}
+# Words that can precede a parenthesized subquery or list rather than name a function
+_NON_CALL_KEYWORDS = _CLAUSE_KEYWORDS | {
+    'SELECT', 'WITH', 'FROM', 'AS', 'IN', 'EXISTS', 'AND', 'OR', 'NOT', 'ANY', 'ALL', 'SOME',
+    'WHEN', 'THEN', 'ELSE', 'BY', 'DISTINCT', 'LATERAL',
+}
+_TOKEN_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_$#]*(?:\.[A-Za-z_][A-Za-z0-9_$#]*)?|\(|\)|,|;|\S")
+_AGGREGATE_RE = re.compile(r"^\s*SELECT\s+(?:COUNT|SUM|AVG|MIN|MAX)\s*\(", re.IGNORECASE)
+
+
+def clean_generated_sql(text: str) -> str:
+    """Strip markdown fences, a trailing semicolon and surrounding whitespace"""
+    text = text.strip()
+    fenced = re.search(r"```(?:sql)?\s*(.*?)```", text, re.DOTALL | re.IGNORECASE)
+    if fenced:
+        text = fenced.group(1).strip()
+    return text.rstrip().rstrip(';').rstrip()
+
+
+def _strip_literals(sql: str) -> str:
+    """Blank out comments and string literals before tokenizing"""
+    sql = re.sub(r"/\*.*?\*/", " ", sql, flags=re.DOTALL)
+    sql = re.sub(r"--[^\n]*", " ", sql)
+    sql = re.sub(r"'(?:[^']|'')*'", "''", sql)
+    return sql
+
+
+def validate_sql(sql: str, known_tables: Optional[Iterable[str]] = None) -> List[str]:
+    """Check that ``sql`` is a single read-only query and return the tables it reads.
+
+    Raises SQLValidationError describing the first problem found.
+    """
+    if not sql:
+        raise SQLValidationError("Empty SQL")
+    stripped = _strip_literals(sql)
+    if '"' in stripped:
+        raise SQLValidationError("Quoted identifiers are not allowed")
+    tokens = _TOKEN_RE.findall(stripped)
+    upper = [t.upper() for t in tokens]
+
+    if not upper or upper[0] not in ('SELECT', 'WITH'):
+        raise SQLValidationError("Only SELECT queries are allowed")
+    if ';' in upper:
+        raise SQLValidationError("Multiple statements are not allowed")
+    for token in upper:
+        if token in _FORBIDDEN or token.startswith(_FORBIDDEN_PREFIXES):
+            raise SQLValidationError(f"Forbidden keyword: {token}")
+    for i, token in enumerate(upper[:-1]):
+        if token == 'FOR' and upper[i + 1] == 'UPDATE':
+            raise SQLValidationError("SELECT ... FOR UPDATE is not allowed")
+
+    # For each token, whether its innermost parenthesis is a function call's argument list;
+    # FROM there is part of EXTRACT(YEAR FROM d), TRIM(LEADING '0' FROM c) etc., not a table clause
+    in_call = []
+    stack: List[bool] = []
+    for i, token in enumerate(upper):
+        if token == '(':
+            previous = upper[i - 1] if i > 0 else ''
+            following = upper[i + 1] if i + 1 < len(upper) else ''
+            stack.append(bool(re.match(r"[A-Z_]", previous)) and previous not in _NON_CALL_KEYWORDS
+                         and following not in ('SELECT', 'WITH'))
+        elif token == ')':
+            if not stack:
+                raise SQLValidationError("Unbalanced parentheses")
+            stack.pop()
+        in_call.append(bool(stack) and stack[-1])
+    if stack:
+        raise SQLValidationError("Unbalanced parentheses")
+
+    # Names defined by WITH are not tables
+    cte_names = {upper[i - 1] for i, t in enumerate(upper) if t == 'AS' and i > 0
+                 and i + 1 < len(upper) and upper[i + 1] == '(' and upper[i - 1] not in ('AS', ')')}
+
+    tables = []
+    for i, token in enumerate(upper):
+        if token not in ('FROM', 'JOIN') or in_call[i]:
+            continue
+        j = i + 1
+        while j < len(upper):
+            name = upper[j]
+            if name == '(' or not re.match(r"[A-Z_]", name):
+                break
+            if name not in cte_names and name != 'DUAL':
+                tables.append(name)
+            # Skip an optional alias, then continue on comma-separated FROM lists
+            j += 1
+            if j < len(upper) and upper[j] == 'AS':
+                j += 1
+            if j < len(upper) and upper[j] not in _CLAUSE_KEYWORDS and re.match(r"[A-Z_]", upper[j]) \
+                    and upper[j] not in (',', ')'):
+                j += 1
+            if token == 'FROM' and j < len(upper) and upper[j] == ',':
+                j += 1
+                continue
+            break
+
+    if known_tables is not None:
+        known = {t.upper() for t in known_tables}
+        unknown = sorted({t for t in tables if t not in known})
+        if unknown:
+            raise SQLValidationError(f"Unknown tables: {', '.join(unknown)}")
+    return sorted(set(tables))
+
+
+def is_scalar_aggregate(sql: str) -> bool:
+    """SELECT of aggregates only (one row): no top-level GROUP BY, set operator or analytic OVER"""
+    if not _AGGREGATE_RE.match(sql):
+        return False
+    upper = [t.upper() for t in _TOKEN_RE.findall(_strip_literals(sql))]
+    if 'OVER' in upper:
+        return False
+    depth = 0
+    for i, token in enumerate(upper):
+        depth += token == '('
+        depth -= token == ')'
+        if depth == 0 and (token in ('UNION', 'INTERSECT', 'MINUS')
+                           or (token == 'GROUP' and i + 1 < len(upper) and upper[i + 1] == 'BY')):
+            return False
+    return True
+
+
+def add_row_limit(sql: str, limit: int) -> str:
+    return f"SELECT * FROM (\n{sql}\n) WHERE ROWNUM <= {int(limit)}"
+
+
+@dataclass
+class GuardedQuery:
+    """A generated query that passed validation and the plan cost guard"""
+    question: str
+    sql: str
+    generated_sql: str
+    tables: List[str]
+    plan: PlanEstimate
+    row_limited: bool = False
+    cached: bool = False
+    warnings: List[str] = field(default_factory=list)
+
+
+class SQLPipeline:
+    """NL→SQL with translation caching, local validation and an EXPLAIN PLAN guard.
+
+    Translations are cached per (question, tables, schema version), so an
+    unchanged schema never pays for the same model call twice. Every fresh
+    translation is validated locally, then explained; plans above
+    ``max_cost`` are rejected and plans expected to return more than
+    ``row_limit`` rows are wrapped in a ROWNUM limit.
+    """
+
+    def __init__(self, db_manager: DatabaseManager, generate: Callable[[str, List[str]], str],
+                 known_tables: Callable[[], Iterable[str]], max_cost: int = 100000,
+                 row_limit: int = 1000, cache_size: int = 256, schema_ttl_seconds: float = 60):
+        self.db_manager = db_manager
+        self.generate = generate
+        self.known_tables = known_tables
+        self.max_cost = max_cost
+        self.row_limit = row_limit
+        self.cache_size = cache_size
+        self.schema_ttl_seconds = schema_ttl_seconds
+        self.logger = logging.getLogger(__name__)
+        self._cache: "OrderedDict[Tuple, GuardedQuery]" = OrderedDict()
+        self._schema_version: Optional[str] = None
+        self._schema_checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def schema_version(self) -> str:
+        """Fingerprint of the schema's tables/views; re-read at most every schema_ttl_seconds"""
+        now = time.monotonic()
+        if self._schema_version is None or now - self._schema_checked_at >= self.schema_ttl_seconds:
+            row = self.db_manager.execute_query(
+                "SELECT COUNT(*) AS OBJECTS, MAX(LAST_DDL_TIME) AS LAST_DDL FROM USER_OBJECTS "
+                "WHERE OBJECT_TYPE IN ('TABLE', 'VIEW')"
+            )[0]
+            self._schema_version = hashlib.sha1(f"{row['OBJECTS']}|{row['LAST_DDL']}".encode()).hexdigest()[:12]
+            self._schema_checked_at = now
+        return self._schema_version
+
+    @staticmethod
+    def _normalize_question(question: str) -> str:
+        return " ".join(question.lower().split())
+
+    def prepare(self, question: str, available_tables: List[str]) -> GuardedQuery:
+        """Translate, validate and cost-check a question; raises SQLValidationError"""
+        key = (self._normalize_question(question), tuple(sorted(t.upper() for t in available_tables)),
+               self.schema_version())
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return replace(self._cache[key], cached=True)
+
+        guarded = self.guard_sql(self.generate(question, available_tables), question)
+        with self._lock:
+            self._cache[key] = guarded
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return guarded
+
+    def guard_sql(self, sql: str, question: str = "") -> GuardedQuery:
+        """Validate and cost-check SQL text (generated or model-requested) without caching"""
+        generated = clean_generated_sql(sql)
+        tables = validate_sql(generated, self.known_tables())
+        plan = self.db_manager.explain_plan(generated)
+
+        if plan.cost is not None and plan.cost > self.max_cost:
+            raise QueryRejectedError(
+                f"Estimated cost {plan.cost} exceeds limit {self.max_cost}"
+                + (f" (full scans: {', '.join(plan.full_scans)})" if plan.full_scans else "")
+            )
+
+        guarded = GuardedQuery(question, generated, generated, tables, plan)
+        if plan.full_scans:
+            guarded.warnings.append(f"Full table scans: {', '.join(plan.full_scans)}")
+        if not is_scalar_aggregate(generated) and (plan.cardinality is None or plan.cardinality > self.row_limit):
+            guarded.sql = add_row_limit(generated, self.row_limit)
+            guarded.row_limited = True
+        return guarded
+
+    def clear_cache(self):
+        with self._lock:
+            self._cache.clear()
@@ -0,0 +1,305 @@
+# ai/structured_output.py
+import json
+import logging
+import re
+from collections import Counter
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_TYPES = {
+    'string': (str,),
+    'number': (int, float),
+    'integer': (int,),
+    'boolean': (bool,),
+    'object': (dict,),
+    'array': (list,),
+}
+
+
+class StructuredOutputError(ValueError):
+    """The model did not return JSON matching the schema, even after retries.
+
+    ``partial`` holds the items that did validate (array schemas) and
+    ``text`` the last raw response.
+    """
+
+    def __init__(self, message: str, errors: List[str], text: str = "", partial: Optional[List[Any]] = None):
+        super().__init__(message)
+        self.errors = errors
+        self.text = text
+        self.partial = partial or []
+
+
+def _compile(node: Dict[str, Any]) -> Callable[[Any, str], List[str]]:
+    """Build a validator closure for one schema node (a JSON-schema subset Gemini also accepts)"""
+    expected = node.get('type', 'string')
+    python_types = _TYPES[expected]
+    nullable = node.get('nullable', False)
+    enum = set(node['enum']) if 'enum' in node else None
+    properties = {name: _compile(child) for name, child in node.get('properties', {}).items()}
+    required = tuple(node.get('required', ()))
+    items = _compile(node['items']) if 'items' in node else None
+
+    def validate(value: Any, path: str) -> List[str]:
+        if value is None:
+            return [] if nullable else [f"{path}: missing value"]
+        # bool is an int subclass; keep it out of numeric fields
+        if not isinstance(value, python_types) or (expected != 'boolean' and isinstance(value, bool)):
+            return [f"{path}: expected {expected}, got {type(value).__name__}"]
+        if enum is not None and value not in enum:
+            return [f"{path}: {value!r} is not one of {sorted(enum)}"]
+        errors: List[str] = []
+        if properties or required:
+            errors.extend(f"{path}.{name}: required" for name in required if name not in value)
+            for name, check in properties.items():
+                if name in value:
+                    errors.extend(check(value[name], f"{path}.{name}"))
+        if items is not None:
+            for i, item in enumerate(value):
+                errors.extend(items(item, f"{path}[{i}]"))
+        return errors
+
+    return validate
+
+
+def _gemini_schema(node: Dict[str, Any]) -> Dict[str, Any]:
+    converted = {}
+    for key, value in node.items():
+        if key == 'type':
+            converted[key] = value.upper()
+        elif key == 'properties':
+            converted[key] = {name: _gemini_schema(child) for name, child in value.items()}
+        elif key == 'items':
+            converted[key] = _gemini_schema(value)
+        else:
+            converted[key] = value
+    return converted
+
+
+class Schema:
+    """A response schema, compiled once into a validator"""
+
+    def __init__(self, name: str, definition: Dict[str, Any]):
+        self.name = name
+        self.definition = definition
+        self._validate = _compile(definition)
+        self.is_array = definition.get('type') == 'array'
+        self._validate_item = _compile(definition['items']) if self.is_array else None
+
+    def validate(self, value: Any) -> List[str]:
+        return self._validate(value, '$')
+
+    def validate_item(self, item: Any, index: int) -> List[str]:
+        return self._validate_item(item, f"$[{index}]")
+
+    def generation_config(self) -> Dict[str, Any]:
+        """``generation_config`` asking the model for JSON that matches this schema"""
+        return {'response_mime_type': 'application/json', 'response_schema': _gemini_schema(self.definition)}
+
+
+CONSOLIDATION_ENTRIES = Schema('consolidation_entries', {
+    'type': 'array',
+    'items': {
+        'type': 'object',
+        'properties': {
+            'account_code': {'type': 'string'},
+            'description': {'type': 'string'},
+            'debit_amount': {'type': 'number'},
+            'credit_amount': {'type': 'number'},
+        },
+        'required': ['account_code', 'description', 'debit_amount', 'credit_amount'],
+    },
+})
+
+ANALYSIS_ACTION = Schema('analysis_action', {
+    'type': 'object',
+    'properties': {
+        'action': {'type': 'string', 'enum': ['query', 'answer']},
+        'sql': {'type': 'string', 'nullable': True},
+        'reason': {'type': 'string', 'nullable': True},
+        'text': {'type': 'string', 'nullable': True},
+    },
+    'required': ['action'],
+})
+
+
+def parse_json(text: str) -> Any:
+    """Parse a JSON response, tolerating a markdown fence or prose around the value"""
+    text = text.strip()
+    fenced = re.search(r"```(?:json)?\s*(.*?)```", text, re.DOTALL | re.IGNORECASE)
+    if fenced:
+        text = fenced.group(1).strip()
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        starts = [i for i in (text.find('['), text.find('{')) if i != -1]
+        if not starts:
+            raise
+        value, _ = json.JSONDecoder().raw_decode(text, min(starts))
+        return value
+
+
+class JSONArrayStream:
+    """Incremental parser yielding the elements of a top-level JSON array as they complete.
+
+    ``feed`` accepts arbitrary text chunks; leading prose or a markdown fence
+    before the ``[`` is skipped. Each element is decoded as soon as its
+    closing bracket (or the following comma) arrives, so a long array is
+    usable before the response finishes. Elements that fail to decode are
+    reported in ``errors`` and skipped.
+    """
+
+    def __init__(self):
+        self._buffer: List[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._started = False
+        self.done = False
+        self.index = 0
+        self.errors: List[Tuple[int, str]] = []
+
+    def feed(self, chunk: str) -> Iterator[Tuple[int, Any]]:
+        for char in chunk:
+            if self.done:
+                return
+            if not self._started:
+                if char == '[':
+                    self._started = True
+                continue
+            if self._in_string:
+                self._buffer.append(char)
+                if self._escaped:
+                    self._escaped = False
+                elif char == '\\':
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+            if self._depth == 0 and char in ',]':
+                yield from self._emit()
+                if char == ']':
+                    self.done = True
+                continue
+            if char == '"':
+                self._in_string = True
+            elif char in '[{':
+                self._depth += 1
+            elif char in ']}':
+                self._depth -= 1
+            self._buffer.append(char)
+
+    def _emit(self) -> Iterator[Tuple[int, Any]]:
+        text = "".join(self._buffer).strip()
+        self._buffer = []
+        if not text:
+            return
+        index, self.index = self.index, self.index + 1
+        try:
+            yield index, json.loads(text)
+        except json.JSONDecodeError as e:
+            self.errors.append((index, f"$[{index}]: {e.msg}"))
+
+
+def _item_key(item: Any) -> str:
+    return json.dumps(item, sort_keys=True, default=str)
+
+
+class _StreamCollector:
+    """Feeds streamed chunks to a JSONArrayStream and emits each valid item as it completes.
+
+    A new stream (a retry or an escalation to another model) restarts the
+    parser. Emitted items are tracked by content, not position: a retry
+    returns only the corrected items, so indexes do not line up across
+    streams. ``flush`` emits the kept items that were never streamed.
+    """
+
+    def __init__(self, schema: Schema, on_item: Callable[[Any], None]):
+        self.schema = schema
+        self.on_item = on_item
+        self._emitted: Counter = Counter()
+        self._parser: Optional[JSONArrayStream] = None
+
+    def new_stream(self) -> Callable[[str], None]:
+        self._parser = JSONArrayStream()
+        return self.feed
+
+    def feed(self, chunk: str):
+        for index, item in self._parser.feed(chunk):
+            if not self.schema.validate_item(item, index):
+                self._emitted[_item_key(item)] += 1
+                self.on_item(item)
+
+    def flush(self, items: List[Any]):
+        for item in items:
+            key = _item_key(item)
+            if self._emitted[key]:
+                self._emitted[key] -= 1
+            else:
+                self.on_item(item)
+
+
+def _retry_prompt(prompt: str, schema: Schema, errors: List[str], invalid: List[Tuple[int, Any]]) -> str:
+    shown = "\n".join(errors[:10])
+    if invalid:
+        return (f"{prompt}\n\nThese items from your previous JSON answer were invalid:\n"
+                f"{json.dumps([item for _, item in invalid], default=str)}\nErrors:\n{shown}\n"
+                f"Return ONLY corrected versions of these items, as a JSON array, nothing else.")
+    return (f"{prompt}\n\nYour previous answer was not valid JSON for the required schema:\n{shown}\n"
+            f"Return only JSON matching this schema:\n{json.dumps(schema.definition)}")
+
+
+def generate_structured(generate: Callable[..., Any], prompt: str, schema: Schema,
+                        on_item: Optional[Callable[[Any], None]] = None, max_retries: int = 1) -> Any:
+    """Ask for schema-constrained JSON, validate it and retry only what failed.
+
+    ``generate(prompt, **kwargs)`` must return a response with ``.text`` and
+    pass ``generation_config`` and ``on_stream`` through to the model call.
+    For array schemas, valid items are handed to ``on_item`` while the
+    response is still streaming; a retry asks only for corrected versions
+    of the invalid items and keeps the valid ones. Raises
+    StructuredOutputError when retries are exhausted.
+    """
+    collector = _StreamCollector(schema, on_item) if schema.is_array and on_item else None
+    kept: List[Any] = []
+    attempt_prompt = prompt
+    text = ""
+    for attempt in range(max_retries + 1):
+        kwargs: Dict[str, Any] = {'generation_config': schema.generation_config()}
+        if collector is not None:
+            kwargs['on_stream'] = collector.new_stream
+        text = generate(attempt_prompt, **kwargs).text or ""
+        try:
+            value = parse_json(text)
+        except json.JSONDecodeError as e:
+            errors, invalid = [f"$: not valid JSON ({e.msg} at char {e.pos})"], []
+        else:
+            if not schema.is_array:
+                errors = schema.validate(value)
+                if not errors:
+                    return value
+                invalid = []
+            elif not isinstance(value, list):
+                errors, invalid = [f"$: expected array, got {type(value).__name__}"], []
+            else:
+                invalid = []
+                errors = []
+                for i, item in enumerate(value):
+                    item_errors = schema.validate_item(item, len(kept))
+                    if item_errors:
+                        invalid.append((i, item))
+                        errors.extend(item_errors)
+                    else:
+                        kept.append(item)
+                if not errors:
+                    break
+        logger.warning(f"Structured output for {schema.name} invalid (attempt {attempt + 1}): {errors[:3]}")
+        attempt_prompt = _retry_prompt(prompt, schema, errors, invalid)
+    else:
+        raise StructuredOutputError(f"Model output does not match schema {schema.name}", errors, text, kept)
+
+    # Items not already emitted during streaming (e.g. coalesced calls, retried items)
+    if collector is not None:
+        collector.flush(kept)
+    return kept
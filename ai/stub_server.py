@@ -0,0 +1,177 @@
+# ai/stub_server.py
+"""Local stand-in for the Gemini REST API, for offline and load testing.
+
+Serves ``POST /v1beta/models/<model>:generateContent`` and
+``:streamGenerateContent`` (SSE when ``alt=sse``) with canned or echoed
+text, configurable latency and injected 429/503 failures. Point the SDK at
+it with ``use_stub("http://127.0.0.1:8765")``.
+
+    python -m ai.stub_server --port 8765 --latency-ms 300 --fail-every 5
+"""
+import argparse
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional
+from urllib.parse import urlparse, parse_qs
+
+_PATH_RE = re.compile(r"^/v1(?:beta)?/models/(?P<model>[^:]+):(?P<method>generateContent|streamGenerateContent)$")
+
+
+def _prompt_text(body: dict) -> str:
+    return "\n".join(part.get('text', '') for content in body.get('contents', [])
+                     for part in content.get('parts', []))
+
+
+def _payload(text: str, prompt: str, finish: Optional[str] = "STOP", usage: bool = True) -> dict:
+    candidate = {'content': {'parts': [{'text': text}], 'role': 'model'}, 'index': 0}
+    if finish:
+        candidate['finishReason'] = finish
+    payload = {'candidates': [candidate]}
+    if usage:
+        prompt_tokens = max(1, len(prompt) // 4)
+        response_tokens = max(1, len(text) // 4)
+        payload['usageMetadata'] = {'promptTokenCount': prompt_tokens, 'candidatesTokenCount': response_tokens,
+                                    'totalTokenCount': prompt_tokens + response_tokens}
+    return payload
+
+
+class StubGeminiServer:
+    """Threaded HTTP server answering generateContent requests.
+
+    ``responder(model, prompt)`` produces the reply text (default: a short
+    echo). Every ``fail_every``-th request fails with ``fail_status``.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency_ms: float = 0.0,
+                 chunk_delay_ms: float = 0.0, fail_every: int = 0, fail_status: int = 429,
+                 responder: Optional[Callable[[str, str], str]] = None):
+        self.latency_ms = latency_ms
+        self.chunk_delay_ms = chunk_delay_ms
+        self.fail_every = fail_every
+        self.fail_status = fail_status
+        self.responder = responder or (lambda model, prompt: f"[stub {model}] {prompt[:200]}")
+        self.requests = 0
+        self._count_lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _next_request(self) -> int:
+        with self._count_lock:
+            self.requests += 1
+            return self.requests
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, status: int, payload: dict):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                parsed = urlparse(self.path)
+                match = _PATH_RE.match(parsed.path)
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"{}")
+                if not match:
+                    self._send_json(404, {'error': {'code': 404, 'message': f"Unknown path {parsed.path}",
+                                                    'status': 'NOT_FOUND'}})
+                    return
+
+                number = stub._next_request()
+                time.sleep(stub.latency_ms / 1000)
+                if stub.fail_every and number % stub.fail_every == 0:
+                    status = 'RESOURCE_EXHAUSTED' if stub.fail_status == 429 else 'UNAVAILABLE'
+                    self._send_json(stub.fail_status, {'error': {'code': stub.fail_status,
+                                                                 'message': "Injected stub failure",
+                                                                 'status': status}})
+                    return
+
+                model, prompt = match.group('model'), _prompt_text(body)
+                text = stub.responder(model, prompt)
+                if match.group('method') == 'generateContent':
+                    self._send_json(200, _payload(text, prompt))
+                    return
+
+                # Streamed: split the reply into a few chunks, usage on the last one
+                sse = parse_qs(parsed.query).get('alt') == ['sse']
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream" if sse else "application/json")
+                self.end_headers()
+                words = text.split(" ")
+                step = max(1, len(words) // 3)
+                chunks = [" ".join(words[i:i + step]) + (" " if i + step < len(words) else "")
+                          for i in range(0, len(words), step)] or [""]
+                payloads = [_payload(c, prompt, finish=None if i < len(chunks) - 1 else "STOP",
+                                     usage=i == len(chunks) - 1) for i, c in enumerate(chunks)]
+                if not sse:
+                    self.wfile.write(json.dumps(payloads).encode())
+                    return
+                for payload in payloads:
+                    self.wfile.write(f"data: {json.dumps(payload)}\r\n\r\n".encode())
+                    self.wfile.flush()
+                    time.sleep(stub.chunk_delay_ms / 1000)
+
+        return Handler
+
+    def start(self) -> "StubGeminiServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True, name="gemini-stub")
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def use_stub(url: str, api_key: str = "stub-key"):
+    """Point google.generativeai at a stub server (REST transport, plain HTTP)"""
+    import google.generativeai as genai
+    genai.configure(api_key=api_key, transport="rest", client_options={'api_endpoint': url})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m ai.stub_server", description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--chunk-delay-ms", type=float, default=0.0)
+    parser.add_argument("--fail-every", type=int, default=0)
+    parser.add_argument("--fail-status", type=int, choices=(429, 500, 503), default=429)
+    args = parser.parse_args(argv)
+
+    server = StubGeminiServer(args.host, args.port, args.latency_ms, args.chunk_delay_ms,
+                              args.fail_every, args.fail_status)
+    print(f"Gemini stub listening on {server.url}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,367 @@
+# ai/tabular_extraction.py
+import csv
+import html
+import os
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from ai import data_profiler
+
+# Canonical columns, in display order
+ROLES = ('account_code', 'account_name', 'account_type', 'period', 'currency', 'debit', 'credit', 'amount')
+NUMERIC_ROLES = ('debit', 'credit', 'amount')
+ROLE_LABELS = {
+    'account_code': "Account Code", 'account_name': "Account Name", 'account_type': "Account Type",
+    'period': "Period", 'currency': "Currency", 'debit': "Debit", 'credit': "Credit", 'amount': "Amount",
+}
+
+# Matched against normalized header text (lowercase, single spaces, no trailing punctuation)
+HEADER_PATTERNS = {
+    'account_code': re.compile(r"^(gl )?(account|acct|a/c|ledger)\.? ?(code|no\.?|number|num|#|id)$|^gl( code)?$|"
+                               r"^(account )?code$"),
+    'account_name': re.compile(r"^(account|acct|a/c|ledger)\.? ?(name|description|title)$|^description$|"
+                               r"^particulars$|^account$|^name$"),
+    'account_type': re.compile(r"^(account )?(type|class|classification|category)$"),
+    'debit': re.compile(r"^(debits?|dr)( amount| balance)?$"),
+    'credit': re.compile(r"^(credits?|cr)( amount| balance)?$"),
+    'amount': re.compile(r"^(net )?(amount|balance|value|total)( \(.*\))?$|^net$"),
+    'currency': re.compile(r"^(currency|ccy|cur|curr)( code)?$"),
+    'period': re.compile(r"^(period|month|date|posting date|fiscal period|as of|year)$"),
+}
+_HEADER_WORDS = re.compile(r"\b(?:account|acct|code|name|description|debit|credit|dr|cr|amount|balance|"
+                           r"currency|ccy|period|month|date|type|total)\b", re.IGNORECASE)
+
+_NUMBER_RE = (r"^\(?\s*[-+]?\s*(?:[$€£¥]\s*|[A-Z]{3}\s+)?[-+]?\d[\d.,' ]*"
+              r"(?:\s*[$€£¥]|\s+[A-Z]{3}|\s*(?:CR|DR|cr|dr))?\s*\)?\s*-?$")
+_EUROPEAN_RE = r"\d{1,3}(?:\.\d{3})+(?:,\d+)?(?!\d)|\d,\d{1,2}(?!\d)"
+_US_RE = r"\d{1,3}(?:,\d{3})+(?:\.\d+)?(?!\d)|\d\.\d{1,2}(?!\d)"
+_CURRENCY_RE = r"^[A-Z]{3}$"
+_PERIOD_RE = (r"^(?:\d{4}[-/.]\d{1,2}(?:[-/.]\d{1,2})?(?:[ T].*)?|\d{1,2}[-/.]\d{4}|\d{1,2}[-/.]\d{1,2}[-/.]\d{2,4}|"
+              r"(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*[\s\-'/]*\d{2,4}|(?:fy|q[1-4])[\s\-]?\d{2,4})$")
+_ACCOUNT_CODE_RE = r"^[A-Za-z]{0,3}[-.]?\d[\d.\-]{1,11}$"
+_TOTAL_ROW_RE = r"^\s*(?:grand\s+|sub\s*-?\s*)?totals?\b"
+
+
+@dataclass
+class NumberFormat:
+    decimal: str = '.'
+    thousands: str = ','
+    parentheses_negative: bool = False
+    trailing_minus: bool = False
+    currency_symbol: Optional[str] = None
+
+
+@dataclass
+class ExtractedTable:
+    table: pd.DataFrame
+    roles: Dict[str, str]
+    header_row: Optional[int]
+    number_formats: Dict[str, NumberFormat] = field(default_factory=dict)
+    unmapped: List[str] = field(default_factory=list)
+    dropped_total_rows: int = 0
+    sheet: Optional[str] = None
+
+    @property
+    def value_column(self) -> Optional[str]:
+        return 'amount' if 'amount' in self.table.columns else None
+
+    def totals(self) -> Dict[str, Any]:
+        totals = {role: round(float(self.table[role].sum()), 2) for role in NUMERIC_ROLES if role in self.table}
+        if 'debit' in totals and 'credit' in totals:
+            totals['balanced'] = abs(totals['debit'] - totals['credit']) <= 0.005 * max(
+                abs(totals['debit']), abs(totals['credit']), 1.0)
+        return totals
+
+
+def _normalize_header(value) -> str:
+    text = re.sub(r"\s+", " ", str(value)).strip().lower()
+    return text.rstrip(':.').strip()
+
+
+def detect_number_format(values: pd.Series) -> NumberFormat:
+    """Decimal/thousands separators, negative style and currency symbol of a text column"""
+    text = values.dropna().astype(str).str.strip()
+    text = text[text.str.contains(r"\d", regex=True)].head(1000)
+    if text.empty:
+        return NumberFormat()
+    european = int(text.str.contains(_EUROPEAN_RE, regex=True).sum())
+    us = int(text.str.contains(_US_RE, regex=True).sum())
+    symbols = text.str.extract(r"([$€£¥])", expand=False).dropna()
+    return NumberFormat(
+        decimal=',' if european > us else '.',
+        thousands='.' if european > us else ',',
+        parentheses_negative=bool(text.str.match(r"^\(.*\)$").any()),
+        trailing_minus=bool(text.str.contains(r"\d\s*-$", regex=True).any()),
+        currency_symbol=symbols.mode().iat[0] if not symbols.empty else None,
+    )
+
+
+def parse_numbers(values: pd.Series, fmt: Optional[NumberFormat] = None) -> pd.Series:
+    """Vectorized parse of formatted amounts; text that is not a number becomes NaN.
+
+    Handles thousands separators (including apostrophes and spaces), either
+    decimal separator, currency symbols or codes, ``(1,234.00)``, trailing
+    minus and ``CR`` suffixes as negatives.
+    """
+    if pd.api.types.is_bool_dtype(values):
+        return pd.Series(np.nan, index=values.index)
+    if pd.api.types.is_numeric_dtype(values):
+        return values.astype(float)
+    fmt = fmt or detect_number_format(values)
+    text = values.astype(str).str.strip()
+    valid = text.str.match(_NUMBER_RE) & ~values.isna()
+    negative = (text.str.match(r"^\(.*\)$") | text.str.match(r"^[^\d]*-") |
+                text.str.contains(r"\d\s*-$", regex=True) | text.str.upper().str.endswith("CR"))
+    digits = text.str.replace(rf"[^\d{re.escape(fmt.decimal)}]", "", regex=True)
+    if fmt.decimal != '.':
+        digits = digits.str.replace(fmt.decimal, ".", regex=False)
+    numbers = pd.to_numeric(digits.where(valid), errors='coerce')
+    return numbers.where(~negative, -numbers)
+
+
+def detect_header_row(raw: pd.DataFrame, max_scan: int = 25) -> Optional[int]:
+    """Index of the row that holds column headers in a sheet read with ``header=None``.
+
+    Rows are scored by header keywords and by how text-like they are compared
+    with the rows below them; None when no row looks like a header.
+    """
+    head = raw.head(max_scan)
+    if head.empty:
+        return None
+    stacked = head.stack()
+    text = stacked.astype(str).str.strip()
+    is_text = parse_numbers(text).isna() & text.ne("")
+    keywords = text.str.contains(_HEADER_WORDS, regex=True) & is_text
+    row_level = stacked.index.get_level_values(0)
+    filled = pd.Series(1, index=stacked.index).groupby(row_level).sum().reindex(head.index, fill_value=0)
+    text_ratio = is_text.groupby(row_level).mean().reindex(head.index, fill_value=0.0)
+    keyword_hits = keywords.groupby(row_level).sum().reindex(head.index, fill_value=0)
+    # A header is followed by less text-like rows
+    below = text_ratio[::-1].expanding().mean()[::-1].shift(-1).fillna(0.0)
+    score = keyword_hits * 2 + text_ratio + (text_ratio - below).clip(lower=0)
+    score[filled < 2] = -1
+    best = score.idxmax()
+    if score[best] < 1 or (keyword_hits[best] == 0 and text_ratio[best] < 0.8):
+        return None
+    return int(head.index.get_loc(best))
+
+
+def _content_role(series: pd.Series, numbers: pd.Series, taken) -> Optional[str]:
+    """Guess the role of an unlabelled column from its values, skipping roles already ``taken``"""
+    present = series.dropna()
+    if present.empty:
+        return None
+    text = present.astype(str).str.strip()
+    numeric_ratio = numbers.notna().sum() / len(present)
+    if pd.api.types.is_datetime64_any_dtype(series) or text.str.match(_PERIOD_RE, case=False).mean() >= 0.8:
+        return 'period'
+    if text.str.match(_CURRENCY_RE).mean() >= 0.9 and text.nunique() <= 20:
+        return 'currency'
+    is_integer = numbers.dropna().mod(1).eq(0).all()
+    if 'account_code' not in taken and text.str.match(_ACCOUNT_CODE_RE).mean() >= 0.9 \
+            and (numeric_ratio < 0.5 or is_integer) and text.nunique() >= 0.5 * len(text):
+        return 'account_code'
+    if numeric_ratio >= 0.8:
+        return 'amount'
+    if numeric_ratio < 0.2 and text.str.len().mean() >= 4:
+        return 'account_name'
+    return None
+
+
+def infer_roles(df: pd.DataFrame) -> Dict[str, str]:
+    """Map canonical roles to column names: header names first, then column contents"""
+    roles: Dict[str, str] = {}
+    for column in df.columns:
+        name = _normalize_header(column)
+        for role, pattern in HEADER_PATTERNS.items():
+            if role not in roles and pattern.match(name):
+                roles[role] = column
+                break
+
+    assigned = set(roles.values())
+    for column in df.columns:
+        if column in assigned:
+            continue
+        role = _content_role(df[column], parse_numbers(df[column]), roles.keys())
+        if role == 'amount' and ({'amount', 'debit', 'credit'} & roles.keys()):
+            continue
+        if role == 'account_name' and 'account_name' in roles:
+            # Keep the most descriptive text column
+            current = df[roles['account_name']].dropna().astype(str).str.len().mean()
+            if df[column].dropna().astype(str).str.len().mean() <= current:
+                continue
+        elif role is None or role in roles:
+            continue
+        roles[role] = column
+    return roles
+
+
+def extract_table(raw: pd.DataFrame, sheet: Optional[str] = None) -> Optional[ExtractedTable]:
+    """Normalize a sheet (read with ``header=None``) into canonical ledger columns.
+
+    Returns None unless the sheet has an account column and at least one
+    amount column.
+    """
+    raw = raw.dropna(how='all').dropna(axis=1, how='all')
+    if raw.empty:
+        return None
+    header_row = detect_header_row(raw)
+    if header_row is not None:
+        headers = [str(h).strip() if pd.notna(h) and str(h).strip() else f"column_{i + 1}"
+                   for i, h in enumerate(raw.iloc[header_row])]
+        body = raw.iloc[header_row + 1:]
+        header_row = raw.index[header_row]
+    else:
+        headers = [f"column_{i + 1}" for i in range(raw.shape[1])]
+        body = raw
+    # Disambiguate duplicate headers
+    seen: Dict[str, int] = {}
+    for i, name in enumerate(headers):
+        seen[name] = seen.get(name, 0) + 1
+        if seen[name] > 1:
+            headers[i] = f"{name}_{seen[name]}"
+    body = body.set_axis(headers, axis=1).reset_index(drop=True)
+
+    roles = infer_roles(body)
+    if not ({'account_code', 'account_name'} & roles.keys()) or not (set(NUMERIC_ROLES) & roles.keys()):
+        return None
+
+    table = pd.DataFrame(index=body.index)
+    formats: Dict[str, NumberFormat] = {}
+    for role in ROLES:
+        if role not in roles:
+            continue
+        column = body[roles[role]]
+        if role in NUMERIC_ROLES:
+            formats[role] = detect_number_format(column) if not pd.api.types.is_numeric_dtype(column) \
+                else NumberFormat()
+            table[role] = parse_numbers(column, formats[role])
+            if role in ('debit', 'credit'):
+                # The column already says which side; "(500.00)" in Credit is a 500 credit
+                table[role] = table[role].abs()
+        elif role == 'period' and pd.api.types.is_datetime64_any_dtype(column):
+            table[role] = column.dt.strftime('%Y-%m-%d')
+        else:
+            table[role] = column.where(column.isna(), column.astype(str).str.strip())
+    if 'amount' not in table and {'debit', 'credit'} <= set(table.columns):
+        table['amount'] = table['debit'].fillna(0.0) - table['credit'].fillna(0.0)
+
+    # Drop subtotal/total lines and rows without any amount
+    is_total = pd.Series(False, index=table.index)
+    if 'account_code' in table:
+        is_total |= table['account_code'].astype(str).str.contains(_TOTAL_ROW_RE, case=False, regex=True)
+    if 'account_name' in table:
+        code_missing = table['account_code'].isna() if 'account_code' in table else True
+        is_total |= table['account_name'].astype(str).str.contains(_TOTAL_ROW_RE, case=False, regex=True) \
+            & code_missing
+    has_amount = table[[r for r in NUMERIC_ROLES if r in table]].notna().any(axis=1)
+    table = table[~is_total & has_amount].reset_index(drop=True)
+    if table.empty:
+        return None
+
+    return ExtractedTable(
+        table=table, roles=roles, header_row=header_row, number_formats=formats,
+        unmapped=[c for c in body.columns if c not in roles.values()],
+        dropped_total_rows=int(is_total.sum()), sheet=sheet,
+    )
+
+
+def sniff_delimiter(lines: List[str], candidates: str = ',;\t|') -> Optional[str]:
+    """Delimiter splitting the most lines into the same number of fields (title lines may differ)"""
+    best, best_score, best_fields = None, 1, 0
+    for delimiter in candidates:
+        counts = Counter(line.count(delimiter) for line in lines if line.strip())
+        counts.pop(0, None)
+        if counts:
+            fields, score = counts.most_common(1)[0]
+            if score > best_score or (score == best_score and fields > best_fields):
+                best, best_score, best_fields = delimiter, score, fields
+    return best
+
+
+def read_delimited(file_path: str, sample_lines: int = 200) -> pd.DataFrame:
+    """Read delimited text with a sniffed delimiter; ragged title lines are allowed"""
+    with open(file_path, 'r', encoding='utf-8-sig', newline='') as f:
+        sample = [line for _, line in zip(range(sample_lines), f)]
+        delimiter = sniff_delimiter(sample)
+        if delimiter is None:
+            raise csv.Error("No consistent delimiter")
+        f.seek(0)
+        rows = list(csv.reader(f, delimiter=delimiter))
+    frame = pd.DataFrame(rows, dtype=object)
+    return frame.replace(r"^\s*$", np.nan, regex=True)
+
+
+def extract_from_file(file_path: str) -> List[ExtractedTable]:
+    """Extract ledger tables from every sheet of an Excel/CSV/text file"""
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension in ('.xlsx', '.xls'):
+        sheets = pd.read_excel(file_path, sheet_name=None, header=None)
+    elif extension in ('.csv', '.txt', '.tsv'):
+        try:
+            sheets = {None: read_delimited(file_path)}
+        except (csv.Error, UnicodeDecodeError):
+            return []
+    else:
+        return []
+    extracted = (extract_table(raw, sheet) for sheet, raw in sheets.items())
+    return [table for table in extracted if table is not None]
+
+
+def _format_cell(value, role: str) -> str:
+    if pd.isna(value):
+        return ""
+    if role in NUMERIC_ROLES:
+        return f"({abs(value):,.2f})" if value < 0 else f"{value:,.2f}"
+    return html.escape(str(value))
+
+
+def to_html(extracted: ExtractedTable, max_rows: int = 200) -> str:
+    """Render an extracted table as HTML for the chat view, with a totals row"""
+    columns = list(extracted.table.columns)
+    header = "".join(f"<th>{ROLE_LABELS[c]}</th>" for c in columns)
+    body = "".join(
+        "<tr>" + "".join(f"<td{' align=right' if c in NUMERIC_ROLES else ''}>{_format_cell(row[c], c)}</td>"
+                         for c in columns) + "</tr>"
+        for _, row in extracted.table.head(max_rows).iterrows()
+    )
+    totals = extracted.totals()
+    total_row = "<tr style='font-weight: bold;'>" + "".join(
+        f"<td align=right>{_format_cell(totals[c], c)}</td>" if c in totals else
+        ("<td>Total</td>" if i == 0 else "<td></td>") for i, c in enumerate(columns)) + "</tr>"
+    more = len(extracted.table) - max_rows
+    caption = f"<h3>{html.escape(str(extracted.sheet))}</h3>" if extracted.sheet else ""
+    note = f"<p style='color:#555555;'>{more} more rows not shown.</p>" if more > 0 else ""
+    return f"""
+        {caption}
+        <table border="1" cellpadding="5" cellspacing="0" style="border-collapse: collapse; font-family: Segoe UI;">
+            <thead style="background-color: #36d399; color: black;"><tr>{header}</tr></thead>
+            <tbody>{body}{total_row}</tbody>
+        </table>
+        {note}
+    """
+
+
+def commentary_context(extracted: ExtractedTable, top_n: int = 5) -> Dict[str, Any]:
+    """Prompt-sized facts about an extracted table for model commentary"""
+    table = extracted.table
+    context: Dict[str, Any] = {
+        'sheet': extracted.sheet,
+        'rows': int(len(table)),
+        'columns': {role: str(column) for role, column in extracted.roles.items()},
+        'totals': extracted.totals(),
+    }
+    for role in ('currency', 'period', 'account_type'):
+        if role in table:
+            context[f"{role}_values"] = table[role].dropna().astype(str).value_counts().head(10).to_dict()
+    if extracted.value_column:
+        key = 'account_name' if 'account_name' in table else 'account_code'
+        context['profile'] = data_profiler.profile(
+            table, value_col='amount', period_col='period' if 'period' in table else None, key_col=key,
+            top_n=top_n)
+    return context
@@ -0,0 +1,49 @@
+# ai/variance.py
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+SIGNIFICANT_VARIANCE = 10000
+
+
+def compute_variances(df: pd.DataFrame, threshold: float = SIGNIFICANT_VARIANCE) -> pd.DataFrame:
+    """Add variance, variance_percentage and significant columns in one vectorized pass.
+
+    Expects lower-case ``actual_amount`` and ``budget_amount`` columns; missing
+    sides of the FULL OUTER JOIN count as zero.
+    """
+    df = df.copy()
+    actual = pd.to_numeric(df['actual_amount'], errors='coerce').fillna(0.0)
+    budget = pd.to_numeric(df['budget_amount'], errors='coerce').fillna(0.0)
+    df['variance'] = actual - budget
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pct = np.where(budget != 0, (df['variance'] / budget) * 100, np.nan)
+    df['variance_percentage'] = np.round(pct, 2)
+    df['significant'] = df['variance'].abs() > threshold
+    return df
+
+
+def summarize_by_period(df: pd.DataFrame, group_cols: List[str]) -> pd.DataFrame:
+    """Totals and significant-variance counts per period (and entity)"""
+    summary = df.groupby(group_cols, sort=True).agg(
+        accounts=('account_code', 'size'),
+        actual_total=('actual_amount', 'sum'),
+        budget_total=('budget_amount', 'sum'),
+        variance_total=('variance', 'sum'),
+        significant_variances=('significant', 'sum'),
+    ).reset_index()
+    summary['significant_variances'] = summary['significant_variances'].astype(int)
+    return summary
+
+
+def top_variances(df: pd.DataFrame, group_cols: List[str], n: int = 5) -> pd.DataFrame:
+    """The ``n`` largest absolute variances within each group"""
+    ranked = df.assign(abs_variance=df['variance'].abs())
+    ranked = ranked.sort_values('abs_variance', ascending=False)
+    return ranked.groupby(group_cols, sort=False).head(n).drop(columns='abs_variance')
+
+
+def records(df: pd.DataFrame) -> List[Dict]:
+    """JSON-friendly records (NaN becomes None)"""
+    return df.astype(object).where(df.notna(), None).to_dict(orient='records')
@@ -0,0 +1,308 @@
+# benchmarks/fake_oracle.py
+"""SQLite stand-in for the Oracle session pool, for offline benchmarks.
+
+``FakeSessionPool`` has the acquire/release surface of ``oracledb.SessionPool``
+and hands out connections whose cursors translate the Oracle dialect the
+app emits (NVL, ADD_MONTHS, TRUNC, SYSDATE, ROWNUM limits, FETCH FIRST,
+DUAL, EXPLAIN PLAN) and report upper-case column names like Oracle. The
+data dictionary views the app reads (USER_TABLES, USER_TAB_COLUMNS,
+USER_SEGMENTS, USER_OBJECTS, PLAN_TABLE) are plain tables filled by
+``analyze()``.
+
+    pool = FakeSessionPool("bench.sqlite", max=10)
+    pool.install(DatabaseManager())
+
+Timings measure the app's own overhead plus SQLite, not Oracle; compare
+runs against each other, not against production.
+"""
+import datetime
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, List, Optional, Sequence
+
+_DICTIONARY_DDL = [
+    "CREATE TABLE IF NOT EXISTS DUAL (DUMMY TEXT)",
+    """CREATE TABLE IF NOT EXISTS USER_TABLES (TABLE_NAME TEXT PRIMARY KEY, NUM_ROWS INTEGER, BLOCKS INTEGER,
+       AVG_ROW_LEN INTEGER, LAST_ANALYZED TEXT)""",
+    """CREATE TABLE IF NOT EXISTS USER_TAB_COLUMNS (TABLE_NAME TEXT, COLUMN_NAME TEXT, DATA_TYPE TEXT,
+       DATA_LENGTH INTEGER, NULLABLE TEXT, DATA_DEFAULT TEXT, COLUMN_ID INTEGER)""",
+    "CREATE TABLE IF NOT EXISTS USER_SEGMENTS (SEGMENT_NAME TEXT, SEGMENT_TYPE TEXT, BYTES INTEGER)",
+    "CREATE TABLE IF NOT EXISTS USER_OBJECTS (OBJECT_NAME TEXT, OBJECT_TYPE TEXT, LAST_DDL_TIME TEXT)",
+    """CREATE TABLE IF NOT EXISTS PLAN_TABLE (STATEMENT_ID TEXT, ID INTEGER, OPERATION TEXT, OPTIONS TEXT,
+       OBJECT_NAME TEXT, COST INTEGER, CARDINALITY INTEGER, BYTES INTEGER)""",
+]
+DICTIONARY_TABLES = ('DUAL', 'USER_TABLES', 'USER_TAB_COLUMNS', 'USER_SEGMENTS', 'USER_OBJECTS', 'PLAN_TABLE')
+
+_BLOCK_SIZE = 8192
+_EXPLAIN_RE = re.compile(r"^\s*EXPLAIN\s+PLAN\s+SET\s+STATEMENT_ID\s*=\s*'([^']*)'\s+FOR\s+(.*)$",
+                         re.IGNORECASE | re.DOTALL)
+_ROWNUM_RE = re.compile(r"\bWHERE\s+ROWNUM\s*<=\s*(\d+)", re.IGNORECASE)
+_FETCH_FIRST_RE = re.compile(r"\bFETCH\s+FIRST\s+(\d+)\s+ROWS?\s+ONLY\b", re.IGNORECASE)
+_SYSDATE_RE = re.compile(r"\bSYSDATE\b", re.IGNORECASE)
+_BIND_RE = re.compile(r"(?<!:):([A-Za-z_][A-Za-z0-9_]*)")
+_TABLE_ALIAS_RE = re.compile(r"\b(?:FROM|JOIN)\s+([A-Za-z_][A-Za-z0-9_$#]*)(?:\s+(?:AS\s+)?([A-Za-z_][A-Za-z0-9_]*))?",
+                             re.IGNORECASE)
+_EQP_RE = re.compile(r"^(SCAN|SEARCH)\s+(\S+)(.*)$")
+
+
+def translate(sql: str) -> str:
+    """Rewrite the Oracle-only syntax the app emits into SQLite"""
+    sql = _ROWNUM_RE.sub(r"LIMIT \1", sql)
+    sql = _FETCH_FIRST_RE.sub(r"LIMIT \1", sql)
+    return _SYSDATE_RE.sub("CURRENT_TIMESTAMP", sql)
+
+
+def _parse_date(value: Any) -> Optional[datetime.datetime]:
+    if value is None:
+        return None
+    return datetime.datetime.fromisoformat(str(value).replace('T', ' ')[:19])
+
+
+def _add_months(value: Any, months: Any) -> Optional[str]:
+    date = _parse_date(value)
+    if date is None or months is None:
+        return None
+    month = date.month - 1 + int(months)
+    year, month = date.year + month // 12, month % 12 + 1
+    days = [31, 29 if year % 4 == 0 and (year % 100 != 0 or year % 400 == 0) else 28,
+            31, 30, 31, 30, 31, 31, 30, 31, 30, 31][month - 1]
+    return date.replace(year=year, month=month, day=min(date.day, days)).strftime("%Y-%m-%d")
+
+
+def _trunc(value: Any, fmt: str = 'DD') -> Any:
+    if isinstance(value, (int, float)):
+        return int(value)
+    date = _parse_date(value)
+    if date is None:
+        return None
+    fmt = (fmt or 'DD').upper()
+    if fmt in ('MM', 'MON', 'MONTH'):
+        date = date.replace(day=1)
+    elif fmt in ('YYYY', 'YEAR', 'Y'):
+        date = date.replace(month=1, day=1)
+    return date.strftime("%Y-%m-%d")
+
+
+def _bind_value(value: Any) -> Any:
+    # Dates are stored as ISO text; midnight datetimes compare equal to ADD_MONTHS/TRUNC results
+    if isinstance(value, datetime.datetime):
+        return value.strftime("%Y-%m-%d" if value.time() == datetime.time() else "%Y-%m-%d %H:%M:%S")
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    return value
+
+
+class FakeCursor:
+    """Cursor with the oracledb surface DatabaseManager uses"""
+
+    def __init__(self, connection: "FakeConnection"):
+        self.connection = connection
+        self._cursor = connection.raw.cursor()
+        self.arraysize = 100
+        self.description = None
+        self.rowcount = -1
+
+    @staticmethod
+    def _binds(params: Any) -> Any:
+        if isinstance(params, dict) or params is None:
+            return {k: _bind_value(v) for k, v in (params or {}).items()}
+        return [_bind_value(v) for v in params]
+
+    def _describe(self):
+        self.description = [(d[0].upper(),) + tuple(d[1:]) for d in self._cursor.description] \
+            if self._cursor.description else None
+
+    def execute(self, sql: str, params: Any = None):
+        explain = _EXPLAIN_RE.match(sql)
+        if explain:
+            self.connection.pool.explain(self._cursor, explain.group(1), translate(explain.group(2)))
+            self.description, self.rowcount = None, 0
+            return self
+        self.connection.start_call()
+        try:
+            self._cursor.execute(translate(sql), self._binds(params))
+        finally:
+            self.connection.end_call()
+        self._describe()
+        self.rowcount = self._cursor.rowcount
+        return self
+
+    def executemany(self, sql: str, params_list: Sequence[Any]):
+        self._cursor.executemany(translate(sql), [self._binds(p) for p in params_list])
+        self.description, self.rowcount = None, self._cursor.rowcount
+        return self
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchmany(self, size: Optional[int] = None):
+        return self._cursor.fetchmany(size or self.arraysize)
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def close(self):
+        self._cursor.close()
+
+
+class FakeConnection:
+    """Pooled SQLite connection; ``call_timeout`` (ms) interrupts long statements like Oracle's"""
+
+    def __init__(self, pool: "FakeSessionPool"):
+        self.pool = pool
+        self.raw = sqlite3.connect(pool.path, check_same_thread=False, timeout=30)
+        self.raw.create_function("NVL", 2, lambda value, default: default if value is None else value,
+                                 deterministic=True)
+        self.raw.create_function("ADD_MONTHS", 2, _add_months, deterministic=True)
+        self.raw.create_function("TRUNC", 1, _trunc, deterministic=True)
+        self.raw.create_function("TRUNC", 2, _trunc, deterministic=True)
+        self.call_timeout = 0
+        self._deadline: Optional[float] = None
+
+    def start_call(self):
+        if self.call_timeout:
+            self._deadline = time.monotonic() + self.call_timeout / 1000
+            self.raw.set_progress_handler(lambda: time.monotonic() > self._deadline, 10000)
+
+    def end_call(self):
+        if self._deadline is not None:
+            self.raw.set_progress_handler(None, 0)
+            self._deadline = None
+
+    def cursor(self) -> FakeCursor:
+        return FakeCursor(self)
+
+    def commit(self):
+        self.raw.commit()
+
+    def rollback(self):
+        self.raw.rollback()
+
+    def close(self):
+        self.raw.close()
+
+
+class FakeSessionPool:
+    """Bounded pool of FakeConnections over one SQLite file"""
+
+    def __init__(self, path: str, min: int = 1, max: int = 5):
+        self.path = path
+        self.min = min
+        self.max = max
+        self._idle: List[FakeConnection] = []
+        self._slots = threading.BoundedSemaphore(max)
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.busy = 0
+        with sqlite3.connect(path) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            for ddl in _DICTIONARY_DDL:
+                conn.execute(ddl)
+            if conn.execute("SELECT COUNT(*) FROM DUAL").fetchone()[0] == 0:
+                conn.execute("INSERT INTO DUAL VALUES ('X')")
+
+    def acquire(self) -> FakeConnection:
+        self._slots.acquire()
+        with self._lock:
+            self.busy += 1
+            if self._idle:
+                return self._idle.pop()
+            self.opened += 1
+        return FakeConnection(self)
+
+    def release(self, connection: FakeConnection):
+        connection.call_timeout = 0
+        with self._lock:
+            self.busy -= 1
+            self._idle.append(connection)
+        self._slots.release()
+
+    def close(self):
+        with self._lock:
+            for connection in self._idle:
+                connection.close()
+            self._idle.clear()
+
+    def install(self, db_manager) -> "FakeSessionPool":
+        """Make ``db_manager`` (a DatabaseManager) use this pool instead of Oracle"""
+        db_manager.close_pool()
+        db_manager.connection_pool = self
+        return self
+
+    # --- Data dictionary ---
+
+    def analyze(self, tables: Optional[List[str]] = None):
+        """Refresh the dictionary views for ``tables`` (default: every user table), like DBMS_STATS"""
+        now = time.strftime("%Y-%m-%d %H:%M:%S")
+        with sqlite3.connect(self.path) as conn:
+            if tables is None:
+                tables = [row[0].upper() for row in conn.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'")
+                    if row[0].upper() not in DICTIONARY_TABLES]
+            for table in tables:
+                table = table.upper()
+                columns = conn.execute(f"PRAGMA table_info({table})").fetchall()
+                num_rows = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                # Average stored width from a sample; SQLite has no per-table segment size
+                widths = [len(column[1]) for column in columns]
+                sample = conn.execute(f"SELECT * FROM {table} LIMIT 1000").fetchall()
+                if sample:
+                    widths = [sum(len(str(v)) if v is not None else 0 for v in row) / len(row) for row in zip(*sample)]
+                avg_row_len = max(1, int(sum(widths)))
+                blocks = num_rows * avg_row_len // _BLOCK_SIZE + 1
+
+                for view in ('USER_TABLES', 'USER_TAB_COLUMNS', 'USER_SEGMENTS', 'USER_OBJECTS'):
+                    name_column = {'USER_SEGMENTS': 'SEGMENT_NAME', 'USER_OBJECTS': 'OBJECT_NAME'}.get(view, 'TABLE_NAME')
+                    conn.execute(f"DELETE FROM {view} WHERE {name_column} = ?", (table,))
+                conn.execute("INSERT INTO USER_TABLES VALUES (?, ?, ?, ?, ?)",
+                             (table, num_rows, blocks, avg_row_len, now))
+                conn.execute("INSERT INTO USER_SEGMENTS VALUES (?, 'TABLE', ?)", (table, blocks * _BLOCK_SIZE))
+                conn.execute("INSERT INTO USER_OBJECTS VALUES (?, 'TABLE', ?)", (table, now))
+                conn.executemany(
+                    "INSERT INTO USER_TAB_COLUMNS VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(table, name.upper(), (data_type or 'VARCHAR2').upper(), 22 if 'NUM' in (data_type or '').upper() else 100,
+                      'N' if not_null else 'Y', default, cid + 1)
+                     for cid, name, data_type, not_null, default, _ in columns])
+
+    def explain(self, cursor: sqlite3.Cursor, statement_id: str, sql: str):
+        """Fill PLAN_TABLE from SQLite's query plan with crude Oracle-like cost/cardinality"""
+        stats = {row[0]: row[1:] for row in cursor.execute(
+            "SELECT TABLE_NAME, NUM_ROWS, BLOCKS, AVG_ROW_LEN FROM USER_TABLES")}
+        aliases = {}
+        for table, alias in _TABLE_ALIAS_RE.findall(sql):
+            aliases[table.upper()] = table.upper()
+            if alias:
+                aliases[alias.upper()] = table.upper()
+        binds = {name: None for name in _BIND_RE.findall(sql)}
+
+        rows = []
+        cost, cardinality, row_len = 1, 0, 0
+        for _, _, _, detail in cursor.execute("EXPLAIN QUERY PLAN " + sql, binds).fetchall():
+            match = _EQP_RE.match(detail)
+            table = aliases.get(match.group(2).upper()) if match else None
+            if table not in stats:
+                continue
+            num_rows, blocks, avg_row_len = stats[table]
+            full = match.group(1) == 'SCAN' and 'INDEX' not in match.group(3)
+            cost += blocks if full else max(1, blocks // 20)
+            cardinality = max(cardinality, num_rows if full else max(1, num_rows // 20))
+            row_len = max(row_len, avg_row_len)
+            rows.append((statement_id, len(rows) + 1, 'TABLE ACCESS', 'FULL' if full else 'BY INDEX ROWID',
+                         table, None, None, None))
+        rows.insert(0, (statement_id, 0, 'SELECT STATEMENT', None, None, cost, cardinality, cardinality * row_len))
+        cursor.executemany("INSERT INTO PLAN_TABLE VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+
+def open_pool(path: str, max: int = 10, fresh: bool = False) -> FakeSessionPool:
+    """Pool over ``path``; ``fresh`` deletes an existing database first"""
+    if fresh:
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+    return FakeSessionPool(path, max=max)
@@ -0,0 +1,46 @@
+# benchmarks/model_stub.py
+"""Deterministic Gemini stand-in for benchmarks, built on ai.stub_server.
+
+Replies depend only on the prompt, so repeated runs send the app the same
+text: SQL for NL→SQL prompts, JSON for the schema-constrained analysis
+and consolidation prompts, and a fixed-length commentary otherwise.
+"""
+import hashlib
+import json
+import random
+from typing import Optional
+
+from ai.stub_server import StubGeminiServer
+
+_WORDS = ("revenue cost margin variance budget actual accrual entity period account balance trend "
+          "driver forecast elimination intercompany translation reserve adjustment review").split()
+
+DEFAULT_SQL = ("SELECT account_code, SUM(amount) AS amount FROM financial_data "
+               "GROUP BY account_code ORDER BY amount DESC")
+
+
+class DeterministicResponder:
+    """``responder(model, prompt)`` for StubGeminiServer with prompt-seeded output"""
+
+    def __init__(self, response_words: int = 120, sql: str = DEFAULT_SQL):
+        self.response_words = response_words
+        self.sql = sql
+
+    def __call__(self, model: str, prompt: str) -> str:
+        if "Convert this natural language query to Oracle SQL" in prompt:
+            return f"```sql\n{self.sql}\n```"
+        if "Return as JSON array" in prompt:
+            return "[]"
+        seed = int.from_bytes(hashlib.sha1(prompt.encode()).digest()[:8], 'big')
+        rng = random.Random(seed)
+        text = " ".join(rng.choice(_WORDS) for _ in range(self.response_words)) + "."
+        if '"action": "answer"' in prompt:
+            return json.dumps({'action': 'answer', 'text': text})
+        return text
+
+
+def start_model_stub(latency_ms: float = 50.0, response_words: int = 120,
+                     sql: Optional[str] = None) -> StubGeminiServer:
+    """Start a stub server on a free port with deterministic replies"""
+    responder = DeterministicResponder(response_words, sql or DEFAULT_SQL)
+    return StubGeminiServer(latency_ms=latency_ms, responder=responder).start()
@@ -0,0 +1,263 @@
+# benchmarks/run.py
+"""Offline benchmark suite: DB, agent and file-ingestion paths against fakes.
+
+Oracle is replaced by a SQLite session pool loaded with the synthetic ledger
+from ``benchmarks.synthetic_data``,
+and Gemini by a local stub server with fixed latency and deterministic
+replies, so runs are reproducible without credentials. Results are written
+as JSON for regression tracking; ``--baseline`` compares p50s with a
+previous run and exits 1 on a regression beyond ``--tolerance``.
+
+    python -m benchmarks.run --rows 200000 --repeat 20 --latency-ms 50
+    python -m benchmarks.run --baseline results/benchmarks-main.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.fake_oracle import open_pool
+from benchmarks.model_stub import start_model_stub
+from benchmarks.synthetic_data import SyntheticConfig, load_dataset
+from diagnostics.query_log import percentile
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Case:
+    name: str
+    run: Callable[[int], Any]
+    # Agent methods report some failures in their return value rather than raising
+    valid: Optional[Callable[[Any], bool]] = None
+
+
+def _rows(result: Any) -> Optional[int]:
+    if isinstance(result, (list, pd.DataFrame)):
+        return len(result)
+    if isinstance(result, dict):
+        for key in ('variance_data', 'tables'):
+            if isinstance(result.get(key), list):
+                return len(result[key])
+    return None
+
+
+def measure(case: Case, repeat: int, warmup: int) -> Dict[str, Any]:
+    """Time ``repeat`` calls after ``warmup`` untimed ones; the iteration number is passed to the case"""
+    timings, errors, rows = [], 0, None
+    for i in range(warmup + repeat):
+        started = time.perf_counter()
+        try:
+            result = case.run(i)
+            if isinstance(result, dict) and 'error' in result:
+                raise RuntimeError(result['error'])
+            if case.valid is not None and not case.valid(result):
+                raise RuntimeError(f"Invalid result: {str(result)[:200]}")
+        except Exception as e:
+            errors += 1
+            logger.warning(f"{case.name} iteration {i} failed: {e}")
+            continue
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if i >= warmup:
+            timings.append(elapsed_ms)
+            rows = _rows(result)
+    ordered = sorted(timings)
+    return {
+        'name': case.name,
+        'repeat': len(ordered),
+        'errors': errors,
+        'rows': rows,
+        'p50_ms': round(percentile(ordered, 0.50), 3),
+        'p95_ms': round(percentile(ordered, 0.95), 3),
+        'mean_ms': round(sum(ordered) / len(ordered), 3) if ordered else 0.0,
+        'min_ms': round(ordered[0], 3) if ordered else 0.0,
+        'max_ms': round(ordered[-1], 3) if ordered else 0.0,
+    }
+
+
+def load_ledger(db_manager, pool, config: SyntheticConfig) -> List[str]:
+    """Bulk-load the synthetic ledger through ``execute_many`` and gather dictionary statistics"""
+    load_dataset(db_manager, config)
+    pool.analyze()
+    return config.period_labels()
+
+
+def _trial_balance_csv(path: str, rows: int, seed: int):
+    rng = np.random.default_rng(seed)
+    amounts = np.round(rng.lognormal(8, 1.5, rows), 2)
+    debit = rng.random(rows) < 0.5
+    pd.DataFrame({
+        'Account Code': [f"{1000 + i}" for i in range(rows)],
+        'Account Name': [f"Account {1000 + i}" for i in range(rows)],
+        'Debit': np.where(debit, amounts, 0.0),
+        'Credit': np.where(debit, 0.0, amounts),
+    }).to_csv(path, index=False)
+
+
+def build_cases(db_manager, agent, periods: List[str], file_path: str) -> List[Case]:
+    from ai.tabular_extraction import extract_from_file
+
+    latest = pd.Timestamp(periods[-1]).to_pydatetime()
+    with open(file_path, 'r', encoding='utf-8') as f:
+        file_content = f.read()
+
+    def rotating(i: int) -> str:
+        return periods[i % len(periods)]
+
+    def period_date(i: int):
+        return pd.Timestamp(rotating(i)).to_pydatetime()
+
+    return [
+        Case("db.execute_query.point", lambda i: db_manager.execute_query(
+            "SELECT account_code, SUM(amount) AS amount FROM financial_data "
+            "WHERE period = :period GROUP BY account_code", {'period': period_date(i)})),
+        Case("db.execute_query.range_aggregate", lambda i: db_manager.execute_query(
+            "SELECT account_code, period, SUM(amount) AS amount FROM financial_data "
+            "WHERE period >= ADD_MONTHS(:latest, -3) GROUP BY account_code, period",
+            {'latest': latest})),
+        Case("db.get_dataframe.period", lambda i: db_manager.get_dataframe(
+            "SELECT * FROM financial_data WHERE period = :period", {'period': period_date(i)})),
+        Case("agent.analyze_variances", lambda i: agent.analyze_variances("ACTUALS", "BUDGET", rotating(i))),
+        Case("agent.generate_sql_query.uncached", lambda i: agent.generate_sql_query(
+            f"total amount by account for quarter {i}", ["FINANCIAL_DATA"]), valid=bool),
+        Case("agent.generate_sql_query.cached", lambda i: agent.generate_sql_query(
+            "total amount by account", ["FINANCIAL_DATA"]), valid=bool),
+        Case("file.extract_tables", lambda i: extract_from_file(file_path), valid=bool),
+        Case("agent.process_uploaded_file", lambda i: agent.process_uploaded_file(file_content, "csv"),
+             valid=lambda text: not text.startswith("Error processing file")),
+    ]
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def compare(results: List[Dict[str, Any]], baseline: Dict[str, Any], tolerance: float) -> List[Dict[str, Any]]:
+    """Cases whose p50 grew by more than ``tolerance`` (a fraction) over the baseline run"""
+    previous = {r['name']: r for r in baseline.get('results', [])}
+    regressions = []
+    for result in results:
+        before = previous.get(result['name'])
+        if not before or not before['p50_ms']:
+            continue
+        change = result['p50_ms'] / before['p50_ms'] - 1
+        if change > tolerance:
+            regressions.append({'name': result['name'], 'baseline_p50_ms': before['p50_ms'],
+                                'p50_ms': result['p50_ms'], 'change': round(change, 3)})
+    return regressions
+
+
+def run(rows: int = 100000, periods: int = 24, accounts: int = 500, repeat: int = 10, warmup: int = 2,
+        latency_ms: float = 50.0, response_words: int = 120, file_rows: int = 2000, seed: int = 42,
+        skew: float = 1.1, only: Optional[List[str]] = None, workdir: Optional[str] = None) -> Dict[str, Any]:
+    """Build the fakes, run every case and return the JSON-ready report"""
+    from ai.financial_agent import FinancialAIAgent
+    from ai.model_registry import ModelRegistry
+    from config.config_manager import AIConfig
+    from database.db_manager import DatabaseManager
+
+    workdir = workdir or tempfile.mkdtemp(prefix="bench-")
+    db_manager = DatabaseManager()
+    pool = open_pool(os.path.join(workdir, "ledger.sqlite"), max=10, fresh=True).install(db_manager)
+    started = time.perf_counter()
+    period_labels = load_ledger(db_manager, pool, SyntheticConfig(rows=rows, periods=periods, accounts=accounts,
+                                                                  skew=skew, seed=seed))
+    load_s = time.perf_counter() - started
+    file_path = os.path.join(workdir, "trial_balance.csv")
+    _trial_balance_csv(file_path, file_rows, seed)
+
+    stub = start_model_stub(latency_ms=latency_ms, response_words=response_words)
+    try:
+        registry = ModelRegistry()
+        # Effectively unthrottled: the benchmark measures the app, not the rate limiter
+        registry.configure(AIConfig(gemini_api_key="stub-key", api_endpoint=stub.url,
+                                    requests_per_minute=1000000, max_retries=0))
+        agent = FinancialAIAgent(registry, max_query_cost=10 ** 9, query_row_limit=1000)
+
+        results = []
+        for case in build_cases(db_manager, agent, period_labels, file_path):
+            if only and not any(case.name.startswith(prefix) for prefix in only):
+                continue
+            logger.info(f"Running {case.name}")
+            results.append(measure(case, repeat, warmup))
+    finally:
+        stub.stop()
+        db_manager.close_pool()
+
+    return {
+        'started_at': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'commit': _git_commit(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'parameters': {'rows': rows, 'periods': periods, 'accounts': accounts, 'repeat': repeat,
+                       'warmup': warmup, 'latency_ms': latency_ms, 'response_words': response_words,
+                       'file_rows': file_rows, 'seed': seed, 'skew': skew},
+        'load_s': round(load_s, 2),
+        'model_requests': stub.requests,
+        'results': results,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000, help="FINANCIAL_DATA rows")
+    parser.add_argument("--periods", type=int, default=24)
+    parser.add_argument("--accounts", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="stub model latency per request")
+    parser.add_argument("--response-words", type=int, default=120, help="stub model reply length")
+    parser.add_argument("--file-rows", type=int, default=2000, help="rows in the ingested trial balance")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--skew", type=float, default=1.1, help="Zipf exponent for account/entity activity")
+    parser.add_argument("--only", nargs="*", help="run only cases whose name starts with one of these")
+    parser.add_argument("--output", help="result file (default: results/benchmarks-<timestamp>.json)")
+    parser.add_argument("--baseline", help="previous result file to compare p50s against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed p50 growth over the baseline")
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=getattr(logging, args.log_level),
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    # pandas warns on every read_sql through a non-SQLAlchemy connection
+    warnings.filterwarnings("ignore", message="pandas only supports SQLAlchemy")
+
+    report = run(args.rows, args.periods, args.accounts, args.repeat, args.warmup, args.latency_ms,
+                 args.response_words, args.file_rows, args.seed, args.skew, args.only)
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            report['regressions'] = compare(report['results'], json.load(f), args.tolerance)
+
+    output = args.output or os.path.join("results", time.strftime("benchmarks-%Y%m%d-%H%M%S.json"))
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+
+    print(f"{'case':<36} {'p50 ms':>9} {'p95 ms':>9} {'rows':>8} {'errors':>6}")
+    for result in report['results']:
+        print(f"{result['name']:<36} {result['p50_ms']:>9.1f} {result['p95_ms']:>9.1f} "
+              f"{result['rows'] if result['rows'] is not None else '-':>8} {result['errors']:>6}")
+    print(f"Results written to {output}")
+    for regression in report.get('regressions', []):
+        print(f"REGRESSION {regression['name']}: p50 {regression['baseline_p50_ms']} -> "
+              f"{regression['p50_ms']} ms ({regression['change']:+.0%})")
+    return 1 if report.get('regressions') else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,396 @@
+# benchmarks/synthetic_data.py
+"""Seeded synthetic ledger shaped like the tables the agent queries.
+
+Generates ENTITIES, CHART_OF_ACCOUNTS, FX_RATES, FINANCIAL_DATA and the
+ACTUALS / BUDGET pair used by the variance templates. Account and entity
+activity follow a Zipf distribution (``skew``), amounts are lognormal per
+account with monthly seasonality, and a share of rows are intercompany
+pairs booked by both sides in their own currency. FINANCIAL_DATA is built
+in fixed-size chunks with one RNG per chunk, so 10M+ rows never sit in
+memory at once and the same seed always yields the same rows.
+
+    python -m benchmarks.synthetic_data --rows 10000000 --format parquet --output data/synthetic
+    python -m benchmarks.synthetic_data --rows 1000000 --sqlite bench.sqlite
+    python -m benchmarks.synthetic_data --rows 1000000 --load --config config/config.json
+"""
+import argparse
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+ACCOUNT_TYPES = ('ASSET', 'LIABILITY', 'EQUITY', 'REVENUE', 'EXPENSE')
+# Share of the chart of accounts per type, and the leading digit of its codes
+_TYPE_SHARES = (0.25, 0.15, 0.05, 0.15, 0.40)
+_TYPE_PREFIX = {'ASSET': '1', 'LIABILITY': '2', 'EQUITY': '3', 'REVENUE': '4', 'EXPENSE': '5'}
+# Debit-normal types are booked positive, credit-normal negative
+_TYPE_SIGN = {'ASSET': 1.0, 'LIABILITY': -1.0, 'EQUITY': -1.0, 'REVENUE': -1.0, 'EXPENSE': 1.0}
+IC_RECEIVABLE = ('19999', 'Intercompany Receivable', 'ASSET')
+IC_PAYABLE = ('29999', 'Intercompany Payable', 'LIABILITY')
+
+# Oracle DDL; SQLite accepts the same type names
+TABLES: Dict[str, List[Tuple[str, str]]] = {
+    'ENTITIES': [('entity_code', 'VARCHAR2(10)'), ('entity_name', 'VARCHAR2(100)'), ('currency', 'VARCHAR2(3)'),
+                 ('parent_entity', 'VARCHAR2(10)'), ('ownership_pct', 'NUMBER(5,2)')],
+    'CHART_OF_ACCOUNTS': [('account_code', 'VARCHAR2(10)'), ('account_name', 'VARCHAR2(100)'),
+                          ('account_type', 'VARCHAR2(20)')],
+    'FX_RATES': [('from_currency', 'VARCHAR2(3)'), ('to_currency', 'VARCHAR2(3)'), ('rate_type', 'VARCHAR2(20)'),
+                 ('rate_date', 'DATE'), ('rate', 'NUMBER(18,8)')],
+    'FINANCIAL_DATA': [('entity_code', 'VARCHAR2(10)'), ('account_code', 'VARCHAR2(10)'),
+                       ('account_name', 'VARCHAR2(100)'), ('account_type', 'VARCHAR2(20)'), ('period', 'DATE'),
+                       ('currency', 'VARCHAR2(3)'), ('amount', 'NUMBER(18,2)'),
+                       ('counterparty_entity', 'VARCHAR2(10)')],
+    'ACTUALS': [('period', 'VARCHAR2(7)'), ('account_code', 'VARCHAR2(10)'), ('account_name', 'VARCHAR2(100)'),
+                ('amount', 'NUMBER(18,2)')],
+    'BUDGET': [('period', 'VARCHAR2(7)'), ('account_code', 'VARCHAR2(10)'), ('account_name', 'VARCHAR2(100)'),
+               ('amount', 'NUMBER(18,2)')],
+}
+INDEXES = {'FINANCIAL_DATA': ['period'], 'ACTUALS': ['period'], 'BUDGET': ['period'], 'FX_RATES': ['rate_date']}
+
+
+@dataclass
+class SyntheticConfig:
+    rows: int = 1000000
+    entities: int = 20
+    accounts: int = 500
+    periods: int = 24
+    start_period: str = "2023-01"
+    currencies: Tuple[str, ...] = ('USD', 'EUR', 'GBP', 'JPY', 'CAD')
+    reporting_currency: str = 'USD'
+    # Zipf exponent for account/entity activity; 0 is uniform
+    skew: float = 1.1
+    intercompany_share: float = 0.05
+    budget_noise: float = 0.08
+    # Share of budget lines with a deliberate large miss, and of actual lines with no budget
+    budget_outlier_share: float = 0.02
+    missing_budget_share: float = 0.01
+    # ACTUALS/BUDGET at entity grain (for analyze_variances_batch with entity_column='ENTITY_CODE')
+    entity_grain: bool = False
+    seed: int = 42
+    chunk_rows: int = 1000000
+
+    def period_starts(self) -> pd.DatetimeIndex:
+        return pd.date_range(pd.Period(self.start_period, 'M').start_time, periods=self.periods, freq='MS')
+
+    def period_labels(self) -> List[str]:
+        return [d.strftime("%Y-%m") for d in self.period_starts()]
+
+    def table_columns(self, table: str) -> List[Tuple[str, str]]:
+        columns = TABLES[table]
+        if self.entity_grain and table in ('ACTUALS', 'BUDGET'):
+            columns = [('entity_code', 'VARCHAR2(10)')] + columns
+        return columns
+
+
+def zipf_weights(n: int, skew: float, rng: np.random.Generator) -> np.ndarray:
+    """Normalized 1/rank^skew weights, randomly assigned to the n items"""
+    weights = 1.0 / np.arange(1, n + 1) ** skew
+    return rng.permutation(weights / weights.sum())
+
+
+@dataclass
+class Dimensions:
+    entities: pd.DataFrame
+    accounts: pd.DataFrame
+    fx_rates: pd.DataFrame
+    entity_weights: np.ndarray
+    account_weights: np.ndarray
+    account_scales: np.ndarray
+    account_signs: np.ndarray
+    # Units of reporting currency per unit of each entity's currency, per period: (entities, periods)
+    entity_rates: np.ndarray
+    seasonality: np.ndarray
+
+
+def build_dimensions(config: SyntheticConfig) -> Dimensions:
+    """Entities, chart of accounts, FX rates and the distributions FINANCIAL_DATA draws from"""
+    rng = np.random.default_rng([config.seed, 0])
+
+    codes = np.array([f"E{i + 1:03d}" for i in range(config.entities)])
+    currencies = np.array(config.currencies)[rng.integers(0, len(config.currencies), config.entities)]
+    currencies[0] = config.reporting_currency
+    entities = pd.DataFrame({
+        'entity_code': codes,
+        'entity_name': [f"Entity {i + 1}" for i in range(config.entities)],
+        'currency': currencies,
+        'parent_entity': np.where(np.arange(config.entities) == 0, None, codes[0]),
+        'ownership_pct': np.where(np.arange(config.entities) == 0, 100.0,
+                                  rng.choice([100.0, 100.0, 80.0, 60.0, 51.0], config.entities)),
+    })
+
+    counts = np.floor(np.array(_TYPE_SHARES) * config.accounts).astype(int)
+    counts[-1] += config.accounts - counts.sum()
+    types = np.repeat(ACCOUNT_TYPES, counts)
+    index = np.concatenate([np.arange(c) for c in counts])
+    account_codes = [f"{_TYPE_PREFIX[t]}{i:04d}" for t, i in zip(types, index)]
+    accounts = pd.DataFrame({
+        'account_code': account_codes,
+        'account_name': [f"{t.title()} {code}" for t, code in zip(types, account_codes)],
+        'account_type': types,
+    })
+    accounts = pd.concat([accounts, pd.DataFrame([IC_RECEIVABLE, IC_PAYABLE], columns=accounts.columns)],
+                         ignore_index=True)
+
+    # Monthly log random walk per currency against the reporting currency
+    periods = config.period_starts()
+    others = [c for c in config.currencies if c != config.reporting_currency]
+    base = {'EUR': 1.08, 'GBP': 1.27, 'JPY': 0.0068, 'CAD': 0.74, 'CHF': 1.12, 'AUD': 0.66, 'INR': 0.012}
+    walk = np.exp(np.cumsum(rng.normal(0, 0.02, (len(others), len(periods))), axis=1))
+    rates = {c: base.get(c, rng.uniform(0.1, 2.0)) * walk[i] for i, c in enumerate(others)}
+    rates[config.reporting_currency] = np.ones(len(periods))
+    fx_frames = []
+    for currency in others:
+        spot = rates[currency]
+        average = np.concatenate([[spot[0]], (spot[1:] + spot[:-1]) / 2])
+        for rate_type, dates, values in (('SPOT', periods + pd.offsets.MonthEnd(0), spot),
+                                         ('AVERAGE', periods, average),
+                                         ('HISTORICAL', periods[:1], spot[:1])):
+            fx_frames.append(pd.DataFrame({'from_currency': currency, 'to_currency': config.reporting_currency,
+                                           'rate_type': rate_type, 'rate_date': dates,
+                                           'rate': np.round(values, 8)}))
+    fx_rates = pd.concat(fx_frames, ignore_index=True) if fx_frames else \
+        pd.DataFrame(columns=[c for c, _ in TABLES['FX_RATES']])
+
+    # Monthly rates are applied at period average, like the P&L
+    entity_rates = np.vstack([rates[c] for c in currencies])
+    seasonality = 1 + 0.15 * np.sin(2 * np.pi * (periods.month.values - 1) / 12) \
+        + np.where(periods.month.values == 12, 0.25, 0.0)
+    return Dimensions(
+        entities=entities,
+        accounts=accounts,
+        fx_rates=fx_rates,
+        entity_weights=zipf_weights(config.entities, config.skew, rng),
+        account_weights=zipf_weights(config.accounts, config.skew, rng),
+        account_scales=rng.lognormal(7.5, 1.5, config.accounts),
+        account_signs=np.array([_TYPE_SIGN[t] for t in types]),
+        entity_rates=entity_rates,
+        seasonality=seasonality,
+    )
+
+
+def _chunk(config: SyntheticConfig, dims: Dimensions, index: int,
+           rows: int) -> Tuple[pd.DataFrame, Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """A FINANCIAL_DATA chunk plus its row-aligned (entity, period, account) positions"""
+    rng = np.random.default_rng([config.seed, 1, index])
+    periods = config.period_starts()
+    pairs = int(rows * config.intercompany_share / 2) if config.entities > 1 else 0
+    n = rows - 2 * pairs
+
+    account = rng.choice(config.accounts, n, p=dims.account_weights)
+    entity = rng.choice(config.entities, n, p=dims.entity_weights)
+    period = rng.integers(0, config.periods, n)
+    # About 3% reversals book against the account's normal side
+    sign = np.where(rng.random(n) < 0.03, -1.0, 1.0) * dims.account_signs[account]
+    amount = dims.account_scales[account] * rng.lognormal(0, 0.6, n) * dims.seasonality[period] * sign
+
+    # Intercompany: A books a receivable, B the matching payable in B's own currency
+    ic_from = rng.choice(config.entities, pairs, p=dims.entity_weights)
+    ic_to = (ic_from + rng.integers(1, max(config.entities, 2), pairs)) % max(config.entities, 1)
+    ic_period = rng.integers(0, config.periods, pairs)
+    ic_amount = rng.lognormal(9, 1.2, pairs)
+    ic_mirror = -ic_amount * dims.entity_rates[ic_from, ic_period] / dims.entity_rates[ic_to, ic_period]
+
+    # The two intercompany accounts follow the regular ones in dims.accounts
+    all_account = np.concatenate([account, np.repeat([config.accounts, config.accounts + 1], pairs)])
+    all_entity = np.concatenate([entity, ic_from, ic_to])
+    all_period = np.concatenate([period, ic_period, ic_period])
+    currencies = dims.entities['currency'].values
+    entity_codes = dims.entities['entity_code'].values
+    frame = pd.DataFrame({
+        'entity_code': entity_codes[all_entity],
+        'account_code': dims.accounts['account_code'].values[all_account],
+        'account_name': dims.accounts['account_name'].values[all_account],
+        'account_type': dims.accounts['account_type'].values[all_account],
+        'period': periods[all_period],
+        'currency': currencies[all_entity],
+        'amount': np.round(np.concatenate([amount, ic_amount, ic_mirror]), 2),
+        'counterparty_entity': np.concatenate([np.full(n, None, dtype=object),
+                                               entity_codes[ic_to], entity_codes[ic_from]]),
+    })
+    return frame, (all_entity, all_period, all_account)
+
+
+def iter_financial_data(config: SyntheticConfig, dims: Optional[Dimensions] = None) -> Iterator[pd.DataFrame]:
+    """FINANCIAL_DATA in chunks of ``config.chunk_rows``; chunk i depends only on (seed, i)"""
+    dims = dims or build_dimensions(config)
+    for index, start in enumerate(range(0, config.rows, config.chunk_rows)):
+        yield _chunk(config, dims, index, min(config.chunk_rows, config.rows - start))[0]
+
+
+def actuals_and_budget(config: SyntheticConfig, totals: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """ACTUALS from summed FINANCIAL_DATA (in reporting currency) and a noisy BUDGET around them"""
+    rng = np.random.default_rng([config.seed, 2])
+    actuals = totals.copy()
+    actuals['amount'] = np.round(actuals['amount'], 2)
+    factor = rng.normal(1.0, config.budget_noise, len(actuals))
+    outliers = rng.random(len(actuals)) < config.budget_outlier_share
+    factor[outliers] *= rng.choice([0.5, 1.6], outliers.sum())
+    budget = actuals.assign(amount=np.round(actuals['amount'] * factor, 2))
+    budget = budget[rng.random(len(budget)) >= config.missing_budget_share]
+    return actuals, budget.reset_index(drop=True)
+
+
+def generate(config: SyntheticConfig) -> Iterator[Tuple[str, pd.DataFrame]]:
+    """(table, frame) pairs for every table; FINANCIAL_DATA comes as several chunks"""
+    dims = build_dimensions(config)
+    yield 'ENTITIES', dims.entities
+    yield 'CHART_OF_ACCOUNTS', dims.accounts
+    yield 'FX_RATES', dims.fx_rates
+
+    # Sum in reporting currency on integer keys so entities in different currencies add up;
+    # string group-bys over every chunk cost ten times the generation itself
+    accounts = len(dims.accounts)
+    entities = config.entities if config.entity_grain else 1
+    sums = np.zeros(entities * config.periods * accounts)
+    seen = np.zeros(len(sums), dtype=bool)
+    for index, start in enumerate(range(0, config.rows, config.chunk_rows)):
+        chunk, (entity, period, account) = _chunk(config, dims, index, min(config.chunk_rows, config.rows - start))
+        yield 'FINANCIAL_DATA', chunk
+        key = ((entity if config.entity_grain else 0) * config.periods + period) * accounts + account
+        sums += np.bincount(key, chunk['amount'].values * dims.entity_rates[entity, period], minlength=len(sums))
+        seen[key] = True
+
+    key = np.flatnonzero(seen)
+    entity, rest = np.divmod(key, config.periods * accounts)
+    period, account = np.divmod(rest, accounts)
+    totals = pd.DataFrame({
+        'period': np.asarray(config.period_labels())[period],
+        'account_code': dims.accounts['account_code'].values[account],
+        'account_name': dims.accounts['account_name'].values[account],
+        'amount': sums[key],
+    })
+    if config.entity_grain:
+        totals.insert(0, 'entity_code', dims.entities['entity_code'].values[entity])
+    actuals, budget = actuals_and_budget(config, totals)
+    yield 'ACTUALS', actuals
+    yield 'BUDGET', budget
+
+
+def _pyarrow_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def write_dataset(config: SyntheticConfig, output_dir: str, fmt: str = 'parquet') -> Dict[str, List[str]]:
+    """Write every table under ``output_dir``; FINANCIAL_DATA as one part file per chunk.
+
+    Falls back to CSV when Parquet support (pyarrow) is not installed.
+    """
+    if fmt == 'parquet' and not _pyarrow_available():
+        logger.warning("Parquet support (pyarrow) is not installed; writing CSV instead")
+        fmt = 'csv'
+    os.makedirs(output_dir, exist_ok=True)
+    files: Dict[str, List[str]] = {}
+    for table, frame in generate(config):
+        parts = files.setdefault(table, [])
+        path = os.path.join(output_dir, f"{table.lower()}-{len(parts):05d}.{fmt}")
+        if fmt == 'parquet':
+            frame.to_parquet(path, index=False)
+        else:
+            frame.to_csv(path, index=False)
+        parts.append(path)
+        logger.info(f"Wrote {len(frame)} rows to {path}")
+    return files
+
+
+def create_tables(db_manager, config: SyntheticConfig, drop: bool = False):
+    """Create (optionally dropping first) the synthetic tables and their period indexes"""
+    for table in TABLES:
+        if drop:
+            try:
+                db_manager.execute_non_query(f"DROP TABLE {table}")
+            except Exception:
+                pass
+        columns = ", ".join(f"{name} {sql_type}" for name, sql_type in config.table_columns(table))
+        db_manager.execute_non_query(f"CREATE TABLE {table} ({columns})")
+        for column in INDEXES.get(table, []):
+            db_manager.execute_non_query(f"CREATE INDEX {table}_{column.upper()}_IX ON {table} ({column})")
+
+
+def load_dataset(db_manager, config: SyntheticConfig, batch_size: int = 10000, create: bool = True,
+                 drop: bool = False) -> Dict[str, int]:
+    """Bulk-load every table through ``execute_many`` in ``batch_size`` batches; returns rows per table"""
+    if create:
+        create_tables(db_manager, config, drop=drop)
+    loaded: Dict[str, int] = {}
+    for table, frame in generate(config):
+        names = [name for name, _ in config.table_columns(table)]
+        sql = f"INSERT INTO {table} ({', '.join(names)}) VALUES ({', '.join(':' + n for n in names)})"
+        frame = frame[names].astype(object).where(frame[names].notna(), None)
+        for start in range(0, len(frame), batch_size):
+            batch = frame.iloc[start:start + batch_size]
+            db_manager.execute_many(sql, batch.to_dict('records'))
+        loaded[table] = loaded.get(table, 0) + len(frame)
+        logger.info(f"Loaded {loaded[table]} rows into {table}")
+    return loaded
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.synthetic_data", description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000000, help="FINANCIAL_DATA rows")
+    parser.add_argument("--entities", type=int, default=20)
+    parser.add_argument("--accounts", type=int, default=500)
+    parser.add_argument("--periods", type=int, default=24)
+    parser.add_argument("--start-period", default="2023-01")
+    parser.add_argument("--skew", type=float, default=1.1, help="Zipf exponent for account/entity activity")
+    parser.add_argument("--intercompany-share", type=float, default=0.05)
+    parser.add_argument("--entity-grain", action="store_true", help="ACTUALS/BUDGET per entity")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk-rows", type=int, default=1000000)
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--output", help="directory for Parquet/CSV files")
+    target.add_argument("--sqlite", help="load into a SQLite file usable with benchmarks.fake_oracle")
+    target.add_argument("--load", action="store_true", help="load into the configured Oracle database")
+    parser.add_argument("--format", choices=("parquet", "csv"), default="parquet")
+    parser.add_argument("--config", default="config/config.json")
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument("--drop", action="store_true", help="drop existing tables before loading")
+    parser.add_argument("--log-level", default="INFO")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=getattr(logging, args.log_level),
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    config = SyntheticConfig(rows=args.rows, entities=args.entities, accounts=args.accounts, periods=args.periods,
+                             start_period=args.start_period, skew=args.skew,
+                             intercompany_share=args.intercompany_share, entity_grain=args.entity_grain,
+                             seed=args.seed, chunk_rows=args.chunk_rows)
+    started = time.perf_counter()
+    if args.output:
+        files = write_dataset(config, args.output, args.format)
+        print(f"Wrote {sum(len(parts) for parts in files.values())} files to {args.output}")
+    else:
+        from database.db_manager import DatabaseManager
+
+        db_manager = DatabaseManager()
+        if args.sqlite:
+            from benchmarks.fake_oracle import open_pool
+
+            pool = open_pool(args.sqlite, fresh=args.drop).install(db_manager)
+        else:
+            from config.config_manager import ConfigManager
+            from database.db_manager import DatabaseConfig
+
+            db_config = ConfigManager(args.config).get_config().database
+            if not db_manager.configure(DatabaseConfig(db_config.host, db_config.port, db_config.service_name,
+                                                       db_config.username, db_config.password,
+                                                       connect_timeout=db_config.connect_timeout)):
+                raise SystemExit("Database connection failed")
+        loaded = load_dataset(db_manager, config, args.batch_size, drop=args.drop)
+        if args.sqlite:
+            pool.analyze()
+        db_manager.close_pool()
+        print(", ".join(f"{table}: {rows}" for table, rows in loaded.items()))
+    print(f"Done in {time.perf_counter() - started:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
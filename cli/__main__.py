@@ -0,0 +1,36 @@
+# cli/__main__.py
+"""Headless entry point.
+
+    python -m cli batch --spec nightly.json [--output results/nightly] [--workers 4]
+"""
+import argparse
+import sys
+from typing import List, Optional
+
+from cli.batch import load_spec, run_batch
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m cli", description="Run agent workloads without the GUI")
+    sub = parser.add_subparsers(dest="command", required=True)
+    batch = sub.add_parser("batch", help="run the jobs in a spec file on a process pool")
+    batch.add_argument("--spec", required=True, help="JSON job spec")
+    batch.add_argument("--output", help="output directory (default: spec output_dir or results/<timestamp>)")
+    batch.add_argument("--workers", type=int, help="worker processes (default: spec workers or CPU count)")
+    batch.add_argument("--config", help="configuration file (default: config/config.json or environment)")
+    batch.add_argument("--pool-size", type=int, default=2, help="Oracle sessions per worker process")
+    batch.add_argument("--log-level", default="INFO")
+    args = parser.parse_args(argv)
+
+    try:
+        spec = load_spec(args.spec)
+    except (OSError, ValueError) as e:
+        print(f"Invalid spec: {e}", file=sys.stderr)
+        return 2
+    manifest = run_batch(spec, args.output, args.workers, args.config, args.pool_size, args.log_level)
+    print(f"{manifest['succeeded']} succeeded, {manifest['failed']} failed in {manifest['elapsed_s']} s")
+    return 1 if manifest['failed'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,216 @@
+# cli/batch.py
+"""Headless batch runner: agent and database operations from a JSON job spec.
+
+Spec format::
+
+    {
+      "output_dir": "results/nightly",
+      "workers": 4,
+      "jobs": [
+        {"name": "variance-2024-03", "operation": "analyze_variances",
+         "args": {"actual_table": "ACTUALS", "budget_table": "BUDGET", "period": "2024-03"}},
+        {"operation": "get_dataframe", "args": {"query": "SELECT * FROM financial_data"},
+         "format": "parquet"},
+        {"operation": "process_uploaded_file", "args": {"file_content": "@inbox/tb.txt", "file_type": "txt"}}
+      ]
+    }
+
+String arguments starting with ``@`` are replaced by the named file's text.
+Jobs run in a process pool; each result is written to ``<output_dir>/<name>``
+(JSON, or CSV/Parquet for DataFrames) and a ``manifest.json`` lists every
+job's status, timing and output file. No Qt is imported.
+
+The configured ``requests_per_minute`` is a budget for the whole batch: each
+worker process gets an equal share for its own model gateway.
+"""
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import replace
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+# operation -> (target, method)
+OPERATIONS = {
+    'execute_query': ('db', 'execute_query'),
+    'get_dataframe': ('db', 'get_dataframe'),
+    'get_table_info': ('db', 'get_table_info'),
+    'get_all_tables': ('db', 'get_all_tables'),
+    'analyze_variances': ('agent', 'analyze_variances'),
+    'analyze_variances_batch': ('agent', 'analyze_variances_batch'),
+    'generate_consolidation_entries': ('agent', 'generate_consolidation_entries'),
+    'generate_sql_query': ('agent', 'generate_sql_query'),
+    'analyze_financial_data': ('agent', 'analyze_financial_data'),
+    'smart_insights': ('agent', 'smart_insights'),
+    'detect_anomalies': ('agent', 'detect_anomalies'),
+    'process_uploaded_file': ('agent', 'process_uploaded_file'),
+}
+
+logger = logging.getLogger(__name__)
+
+# Per-process state, set up by _init_worker
+_config_path: Optional[str] = None
+_pool_size = 2
+_model_processes = 1
+_agent = None
+
+
+class SpecError(ValueError):
+    """The job spec is malformed"""
+
+
+def load_spec(path: str) -> Dict[str, Any]:
+    """Read and validate a job spec; jobs without a name get ``NNN-<operation>``"""
+    with open(path, 'r', encoding='utf-8') as f:
+        spec = json.load(f)
+    jobs = spec.get('jobs')
+    if not isinstance(jobs, list) or not jobs:
+        raise SpecError("Spec needs a non-empty 'jobs' list")
+    names = set()
+    for i, job in enumerate(jobs):
+        if job.get('operation') not in OPERATIONS:
+            raise SpecError(f"Job {i}: unknown operation {job.get('operation')!r}; "
+                            f"expected one of {sorted(OPERATIONS)}")
+        job.setdefault('name', f"{i:03d}-{job['operation']}")
+        job.setdefault('args', {})
+        if job['name'] in names:
+            raise SpecError(f"Duplicate job name {job['name']!r}")
+        names.add(job['name'])
+    spec['base_dir'] = os.path.dirname(os.path.abspath(path))
+    return spec
+
+
+def _resolve_args(args: Dict[str, Any], base_dir: str) -> Dict[str, Any]:
+    resolved = {}
+    for key, value in args.items():
+        if isinstance(value, str) and value.startswith('@'):
+            with open(os.path.join(base_dir, value[1:]), 'r', encoding='utf-8') as f:
+                value = f.read()
+        resolved[key] = value
+    return resolved
+
+
+def _init_worker(config_path: Optional[str], pool_size: int, log_level: str, model_processes: int = 1):
+    global _config_path, _pool_size, _model_processes
+    _config_path, _pool_size, _model_processes = config_path, pool_size, model_processes
+    logging.basicConfig(level=getattr(logging, log_level),
+                        format='%(asctime)s - %(processName)s - %(name)s - %(levelname)s - %(message)s')
+
+
+def _database():
+    from config.config_manager import ConfigManager
+    from database.db_manager import DatabaseManager, DatabaseConfig
+
+    db_manager = DatabaseManager()
+    if db_manager.connection_pool is None:
+        config = ConfigManager(_config_path or "config/config.json").get_config().database
+        if not db_manager.configure(DatabaseConfig(config.host, config.port, config.service_name, config.username,
+                                                   config.password, connect_timeout=config.connect_timeout),
+                                    pool_size=_pool_size):
+            raise ConnectionError("Database connection failed")
+    return db_manager
+
+
+def _get_agent():
+    global _agent
+    if _agent is None:
+        from ai.financial_agent import FinancialAIAgent
+        from ai.model_registry import ModelRegistry
+        from config.config_manager import ConfigManager
+
+        config = ConfigManager(_config_path or "config/config.json").get_config().ai
+        _database()
+        # Every process has its own gateway token bucket; together they must stay within the configured rate
+        config = replace(config, requests_per_minute=max(1, config.requests_per_minute // _model_processes))
+        registry = ModelRegistry()
+        registry.configure(config)
+        _agent = FinancialAIAgent(registry, max_query_cost=config.sql_max_cost, query_row_limit=config.sql_row_limit)
+    return _agent
+
+
+def _write_result(result: Any, path_stem: str, fmt: Optional[str]) -> str:
+    if isinstance(result, pd.DataFrame):
+        if fmt == 'parquet':
+            try:
+                result.to_parquet(path_stem + '.parquet', index=False)
+                return path_stem + '.parquet'
+            except ImportError:
+                logger.warning("Parquet support (pyarrow) is not installed; writing CSV instead")
+        result.to_csv(path_stem + '.csv', index=False)
+        return path_stem + '.csv'
+    with open(path_stem + '.json', 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2, default=str)
+    return path_stem + '.json'
+
+
+def run_job(job: Dict[str, Any], output_dir: str, base_dir: str = ".") -> Dict[str, Any]:
+    """Run one job in this process and write its result; returns its manifest entry"""
+    target, method = OPERATIONS[job['operation']]
+    entry = {'name': job['name'], 'operation': job['operation'], 'pid': os.getpid()}
+    started = time.perf_counter()
+    try:
+        owner = _get_agent() if target == 'agent' else _database()
+        result = getattr(owner, method)(**_resolve_args(job['args'], base_dir))
+        if isinstance(result, dict) and 'error' in result:
+            raise RuntimeError(result['error'])
+        entry['output'] = _write_result(result, os.path.join(output_dir, job['name']), job.get('format'))
+        entry['status'] = 'succeeded'
+        if isinstance(result, (list, pd.DataFrame)):
+            entry['rows'] = len(result)
+    except Exception as e:
+        logger.error(f"Job {job['name']} failed: {e}")
+        entry['status'] = 'failed'
+        entry['error'] = f"{type(e).__name__}: {e}"
+    entry['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 1)
+    return entry
+
+
+def run_batch(spec: Dict[str, Any], output_dir: Optional[str] = None, workers: Optional[int] = None,
+              config_path: Optional[str] = None, pool_size: int = 2, log_level: str = "INFO") -> Dict[str, Any]:
+    """Run every job in the spec on a process pool and write ``manifest.json``.
+
+    ``workers=1`` runs the jobs in this process, in order.
+    """
+    output_dir = output_dir or spec.get('output_dir') or os.path.join("results", time.strftime("%Y%m%d-%H%M%S"))
+    workers = workers or spec.get('workers') or os.cpu_count() or 1
+    os.makedirs(output_dir, exist_ok=True)
+    base_dir = spec.get('base_dir', ".")
+    started_at = time.time()
+    entries: List[Dict[str, Any]] = []
+
+    # Processes that can end up calling the model at the same time share its rate limit
+    agent_jobs = sum(OPERATIONS[job['operation']][0] == 'agent' for job in spec['jobs'])
+    init_args = (config_path, pool_size, log_level, max(1, min(workers, agent_jobs)))
+    if workers == 1:
+        _init_worker(*init_args)
+        entries = [run_job(job, output_dir, base_dir) for job in spec['jobs']]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=init_args) as executor:
+            futures = {executor.submit(run_job, job, output_dir, base_dir): job for job in spec['jobs']}
+            for future in as_completed(futures):
+                job = futures[future]
+                try:
+                    entry = future.result()
+                except Exception as e:
+                    # The worker process itself died
+                    entry = {'name': job['name'], 'operation': job['operation'], 'status': 'failed',
+                             'error': f"{type(e).__name__}: {e}"}
+                logger.info(f"{entry['name']}: {entry['status']} ({entry.get('elapsed_ms', '-')} ms)")
+                entries.append(entry)
+
+    order = {job['name']: i for i, job in enumerate(spec['jobs'])}
+    entries.sort(key=lambda e: order[e['name']])
+    manifest = {
+        'started_at': time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(started_at)),
+        'elapsed_s': round(time.time() - started_at, 2),
+        'workers': workers,
+        'succeeded': sum(e['status'] == 'succeeded' for e in entries),
+        'failed': sum(e['status'] == 'failed' for e in entries),
+        'jobs': entries,
+    }
+    with open(os.path.join(output_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
@@ -2,7 +2,7 @@
 import os
 import json
 from typing import Dict, Any, Optional
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, field
 import logging
 from dotenv import load_dotenv
 load_dotenv()
@@ -15,11 +15,24 @@ class DatabaseConfig:
     service_name: str
     username: str
     password: str
+    connect_timeout: float = 10.0
+    connect_retries: int = 3
+    retry_delay: float = 2.0
 
 @dataclass
 class AIConfig:
     gemini_api_key: str
     model_name: str = "models/gemini-2.0-flash"
+    connect_timeout: float = 10.0
+    connect_retries: int = 2
+    retry_delay: float = 2.0
+    sql_max_cost: int = 100000
+    sql_row_limit: int = 1000
+    requests_per_minute: int = 60
+    max_retries: int = 3
+    # Per-task model overrides, e.g. {"chat": "models/gemini-2.0-flash-lite"}
+    task_models: Dict[str, str] = field(default_factory=dict)
+    api_endpoint: Optional[str] = None
 
 @dataclass
 class AppConfig:
@@ -27,6 +40,12 @@ class AppConfig:
     ai: AIConfig
     debug: bool = False
     log_level: str = "INFO"
+    refresh_interval_seconds: int = 60
+    prefetch_idle_seconds: float = 2.0
+    # Shared local service (python -m service.server); when set, DB and AI calls go through it
+    service_url: Optional[str] = None
+    # Shared secret for the service; when unset both sides use the service's generated token file
+    service_token: Optional[str] = None
 
 class ConfigManager:
     """Manage application configuration"""
@@ -65,14 +84,27 @@ class ConfigManager:
                 port=int(os.getenv('DB_PORT', '1521')),
                 service_name=os.getenv('DB_SERVICE_NAME', 'XE'),
                 username=os.getenv('DB_USERNAME', 'hr'),
-                password=os.getenv('DB_PASSWORD', 'password')
+                password=os.getenv('DB_PASSWORD', 'password'),
+                connect_timeout=float(os.getenv('DB_CONNECT_TIMEOUT', '10')),
+                connect_retries=int(os.getenv('DB_CONNECT_RETRIES', '3'))
             ),
             ai=AIConfig(
                 gemini_api_key=os.getenv('GEMINI_API_KEY', ''),
-                model_name=os.getenv('GEMINI_MODEL', 'models/gemini-2.0-flash')
+                model_name=os.getenv('GEMINI_MODEL', 'models/gemini-2.0-flash'),
+                connect_timeout=float(os.getenv('GEMINI_CONNECT_TIMEOUT', '10')),
+                sql_max_cost=int(os.getenv('SQL_MAX_COST', '100000')),
+                sql_row_limit=int(os.getenv('SQL_ROW_LIMIT', '1000')),
+                requests_per_minute=int(os.getenv('GEMINI_REQUESTS_PER_MINUTE', '60')),
+                max_retries=int(os.getenv('GEMINI_MAX_RETRIES', '3')),
+                task_models=json.loads(os.getenv('GEMINI_TASK_MODELS', '{}')),
+                api_endpoint=os.getenv('GEMINI_API_ENDPOINT') or None
             ),
             debug=os.getenv('DEBUG', 'False').lower() == 'true',
-            log_level=os.getenv('LOG_LEVEL', 'INFO')
+            log_level=os.getenv('LOG_LEVEL', 'INFO'),
+            refresh_interval_seconds=int(os.getenv('REFRESH_INTERVAL_SECONDS', '60')),
+            prefetch_idle_seconds=float(os.getenv('PREFETCH_IDLE_SECONDS', '2')),
+            service_url=os.getenv('SERVICE_URL') or None,
+            service_token=os.getenv('SERVICE_TOKEN') or None
         )
     
     def _dict_to_config(self, config_dict: Dict[str, Any]) -> AppConfig:
@@ -81,7 +113,11 @@ class ConfigManager:
             database=DatabaseConfig(**config_dict['database']),
             ai=AIConfig(**config_dict['ai']),
             debug=config_dict.get('debug', False),
-            log_level=config_dict.get('log_level', 'INFO')
+            log_level=config_dict.get('log_level', 'INFO'),
+            refresh_interval_seconds=config_dict.get('refresh_interval_seconds', 60),
+            prefetch_idle_seconds=config_dict.get('prefetch_idle_seconds', 2.0),
+            service_url=config_dict.get('service_url'),
+            service_token=config_dict.get('service_token')
         )
     
     def save_config(self, config: AppConfig):
@@ -93,7 +129,11 @@ class ConfigManager:
                 'database': asdict(config.database),
                 'ai': asdict(config.ai),
                 'debug': config.debug,
-                'log_level': config.log_level
+                'log_level': config.log_level,
+                'refresh_interval_seconds': config.refresh_interval_seconds,
+                'prefetch_idle_seconds': config.prefetch_idle_seconds,
+                'service_url': config.service_url,
+                'service_token': config.service_token
             }
             
             with open(self.config_path, 'w') as f:
@@ -141,10 +181,16 @@ def create_sample_config():
         },
         "ai": {
             "gemini_api_key": "your_gemini_api_key",
-            "model_name": "models/gemini-2.0-flash"
+            "model_name": "models/gemini-2.0-flash",
+            "task_models": {
+                "fast": "models/gemini-2.0-flash-lite",
+                "consolidation": "models/gemini-2.5-pro"
+            }
         },
         "debug": True,
-        "log_level": "DEBUG"
+        "log_level": "DEBUG",
+        "refresh_interval_seconds": 60,
+        "prefetch_idle_seconds": 2.0
     }
     
     os.makedirs("config", exist_ok=True)
@@ -0,0 +1,152 @@
+# database/analytics_engine.py
+import logging
+import statistics
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from database.db_manager import DatabaseManager
+from diagnostics.tracing import Tracer
+from database.table_stats import TableStatsService
+
+
+@dataclass
+class AnalyticQuery:
+    """A named analytic query shown on the analytics page.
+
+    Either ``sql`` is executed over the pool, or ``loader`` is called to
+    produce the rows from a cached source such as TableStatsService.
+    """
+    name: str
+    label: str
+    sql: str = ""
+    params: Dict[str, Any] = field(default_factory=dict)
+    loader: Optional[Callable[[], List[Dict]]] = None
+
+
+@dataclass
+class AnalyticResult:
+    name: str
+    label: str
+    rows: List[Dict] = field(default_factory=list)
+    elapsed_ms: float = 0.0
+    error: Optional[str] = None
+
+
+def top_tables_query(stats_service: TableStatsService, n: int = 5) -> AnalyticQuery:
+    """Largest tables of the current schema, served from cached statistics"""
+    def load():
+        stats_service.ensure_fresh()
+        return [{'TABLE_NAME': s.table_name, 'ROWS': s.estimated_rows}
+                for s in stats_service.top_tables(n)]
+    return AnalyticQuery("top_tables_by_rows", f"Top {n} Tables by Row Count", loader=load)
+
+
+DEFAULT_ANALYTIC_QUERIES = [
+    AnalyticQuery(
+        "financial_rows_by_period",
+        "Financial Data Rows by Period",
+        """SELECT period, row_count FROM (
+             SELECT period, COUNT(*) AS row_count
+             FROM financial_data
+             GROUP BY period
+             ORDER BY period DESC
+         ) WHERE ROWNUM <= 12"""
+    ),
+]
+
+
+class AnalyticsEngine:
+    """Registry of named analytic queries executed concurrently over the pool.
+
+    ``run_all`` hands each result to ``on_result`` as soon as its query
+    finishes, so callers can render partial results. Every run is recorded in
+    a bounded per-query timing history used to spot slow analytics.
+    """
+
+    def __init__(self, db_manager: DatabaseManager, queries: Optional[List[AnalyticQuery]] = None,
+                 max_workers: int = 4, history_size: int = 50, slow_threshold_ms: float = 2000.0):
+        self.db_manager = db_manager
+        self.max_workers = max_workers
+        self.history_size = history_size
+        self.slow_threshold_ms = slow_threshold_ms
+        self.logger = logging.getLogger(__name__)
+        self._queries: Dict[str, AnalyticQuery] = {}
+        self._history: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+        for query in queries or []:
+            self.register(query)
+
+    def register(self, query: AnalyticQuery):
+        self._queries[query.name] = query
+        with self._lock:
+            self._history.setdefault(query.name, deque(maxlen=self.history_size))
+
+    @property
+    def queries(self) -> List[AnalyticQuery]:
+        return list(self._queries.values())
+
+    def run(self, name: str) -> AnalyticResult:
+        """Execute a single registered query and record its timing"""
+        query = self._queries[name]
+        start = time.perf_counter()
+        try:
+            if query.loader:
+                rows = query.loader()
+            else:
+                rows = self.db_manager.execute_query(query.sql, query.params)
+            result = AnalyticResult(query.name, query.label, rows)
+        except Exception as e:
+            self.logger.error(f"Analytic query {name} failed: {e}")
+            result = AnalyticResult(query.name, query.label, error=str(e))
+        result.elapsed_ms = (time.perf_counter() - start) * 1000
+
+        with self._lock:
+            self._history[name].append(result.elapsed_ms)
+        if result.elapsed_ms >= self.slow_threshold_ms:
+            self.logger.warning(f"Slow analytic query {name}: {result.elapsed_ms:.0f} ms")
+        return result
+
+    def run_all(self, names: Optional[List[str]] = None,
+                on_result: Optional[Callable[[AnalyticResult], None]] = None) -> List[AnalyticResult]:
+        """Run queries concurrently, streaming each result to ``on_result``.
+
+        Returns all results in registry order once every query has finished.
+        """
+        names = names or list(self._queries)
+        results = {}
+        workers = max(1, min(self.max_workers, len(names)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="analytics") as executor:
+            futures = {executor.submit(Tracer.bind(self.run), name): name for name in names}
+            for future in as_completed(futures):
+                result = future.result()
+                results[result.name] = result
+                if on_result:
+                    on_result(result)
+        return [results[name] for name in names]
+
+    def timing_history(self, name: str) -> List[float]:
+        with self._lock:
+            return list(self._history.get(name, []))
+
+    def timing_summary(self) -> List[Dict[str, Any]]:
+        """Per-query run count and latency statistics, slowest median first"""
+        summary = []
+        for name in self._queries:
+            history = self.timing_history(name)
+            if not history:
+                continue
+            summary.append({
+                'query': name,
+                'runs': len(history),
+                'last_ms': round(history[-1], 1),
+                'median_ms': round(statistics.median(history), 1),
+                'max_ms': round(max(history), 1),
+            })
+        return sorted(summary, key=lambda s: s['median_ms'], reverse=True)
+
+    def slow_queries(self) -> List[Dict[str, Any]]:
+        return [s for s in self.timing_summary() if s['median_ms'] >= self.slow_threshold_ms]
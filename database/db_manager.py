@@ -3,10 +3,15 @@ import oracledb as cx_Oracle
 import logging
 from typing import Optional, Dict, Any, List
 import threading
+import time
+import uuid
 from contextlib import contextmanager
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import pandas as pd
 
+from diagnostics.tracing import Tracer, sql_hash
+from diagnostics.query_log import QueryLog
+
 @dataclass
 class DatabaseConfig:
     host: str
@@ -14,10 +19,20 @@ class DatabaseConfig:
     service_name: str
     username: str
     password: str
+    connect_timeout: float = 10.0
+    statement_cache_size: int = 50
     
     def get_dsn(self) -> str:
         return cx_Oracle.makedsn(self.host, self.port, service_name=self.service_name)
 
+@dataclass
+class PlanEstimate:
+    """Optimizer estimates for the top of an EXPLAIN PLAN"""
+    cost: Optional[int] = None
+    cardinality: Optional[int] = None
+    bytes: Optional[int] = None
+    full_scans: List[str] = field(default_factory=list)
+
 class DatabaseManager:
     """Singleton Database Manager for Oracle connections"""
     _instance = None
@@ -35,6 +50,9 @@ class DatabaseManager:
             self.config: Optional[DatabaseConfig] = None
             self.connection_pool: Optional[cx_Oracle.SessionPool] = None
             self.logger = logging.getLogger(__name__)
+            self.tracer = Tracer()
+            self.query_log = QueryLog()
+            self._local = threading.local()
             self.initialized = True
     
     def configure(self, config: DatabaseConfig, pool_size: int = 5):
@@ -50,7 +68,9 @@ class DatabaseManager:
                 max=pool_size,
                 increment=1,
                 threaded=True,
-                getmode=cx_Oracle.SPOOL_ATTRVAL_WAIT
+                getmode=cx_Oracle.SPOOL_ATTRVAL_WAIT,
+                tcp_connect_timeout=config.connect_timeout,
+                stmtcachesize=config.statement_cache_size
             )
             self.logger.info("Database connection pool created successfully")
             return True
@@ -66,7 +86,10 @@ class DatabaseManager:
         
         connection = None
         try:
+            started = time.perf_counter()
             connection = self.connection_pool.acquire()
+            # Pool wait is reported separately from statement time by _instrument
+            self._local.wait_ms = getattr(self._local, 'wait_ms', 0.0) + (time.perf_counter() - started) * 1000
             yield connection
         except cx_Oracle.Error as e:
             self.logger.error(f"Database operation failed: {e}")
@@ -75,9 +98,40 @@ class DatabaseManager:
             if connection:
                 self.connection_pool.release(connection)
     
+    @staticmethod
+    def _row_width(cursor) -> int:
+        """Upper-bound bytes per fetched row from the column descriptions"""
+        return sum(desc[3] or desc[2] or 0 for desc in cursor.description or [])
+
+    @staticmethod
+    def _round_trips(rows: int, arraysize: int) -> int:
+        """Estimated round trips for execute + fetchall: one per arraysize batch plus the final empty fetch"""
+        return 1 + rows // max(arraysize, 1) + 1
+
+    @contextmanager
+    def _instrument(self, operation: str, query: str, **attributes):
+        """Trace a statement and add it to the query log; pool wait is excluded from elapsed"""
+        self._local.wait_ms = 0.0
+        started = time.perf_counter()
+        error = None
+        with self.tracer.span(f"db.{operation}", sql_hash=sql_hash(query), **attributes) as span:
+            try:
+                yield span
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                raise
+            finally:
+                wait_ms = self._local.wait_ms
+                span.set(wait_ms=round(wait_ms, 2))
+                self.query_log.record(
+                    query, operation, (time.perf_counter() - started) * 1000 - wait_ms,
+                    rows=max(span.attributes.get('rows') or 0, 0),
+                    round_trips=span.attributes.get('round_trips', 1), wait_ms=wait_ms, error=error
+                )
+
     def execute_query(self, query: str, params: Optional[Dict] = None) -> List[Dict]:
         """Execute SELECT query and return results as list of dictionaries"""
-        with self.get_connection() as conn:
+        with self._instrument("execute_query", query) as span, self.get_connection() as conn:
             cursor = conn.cursor()
             try:
                 cursor.execute(query, params or {})
@@ -85,17 +139,86 @@ class DatabaseManager:
                 results = []
                 for row in cursor.fetchall():
                     results.append(dict(zip(columns, row)))
+                span.set(rows=len(results), bytes=len(results) * self._row_width(cursor),
+                         round_trips=self._round_trips(len(results), cursor.arraysize))
                 return results
             finally:
                 cursor.close()
     
+    def iter_query(self, query: str, params: Optional[Dict] = None, batch_size: int = 500,
+                   max_rows: Optional[int] = None, timeout_ms: Optional[int] = None):
+        """Stream a SELECT as (columns, rows) batches without materializing the result.
+
+        Stops after ``max_rows`` rows; ``timeout_ms`` bounds every round trip.
+        The pooled connection is held until the generator is exhausted or closed.
+        """
+        # Generator bodies run across the caller's yields, so the span is recorded afterwards
+        started = self.tracer.now_us()
+        fetched = 0
+        fetches = 0
+        width = 0
+        error = None
+        self._local.wait_ms = 0.0
+        with self.get_connection() as conn:
+            previous_timeout = conn.call_timeout
+            if timeout_ms:
+                conn.call_timeout = timeout_ms
+            cursor = conn.cursor()
+            cursor.arraysize = batch_size
+            try:
+                cursor.execute(query, params or {})
+                columns = [desc[0] for desc in cursor.description]
+                width = self._row_width(cursor)
+                while max_rows is None or fetched < max_rows:
+                    limit = batch_size if max_rows is None else min(batch_size, max_rows - fetched)
+                    rows = cursor.fetchmany(limit)
+                    fetches += 1
+                    if not rows:
+                        break
+                    fetched += len(rows)
+                    yield columns, rows
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                raise
+            finally:
+                cursor.close()
+                conn.call_timeout = previous_timeout
+                wait_ms = self._local.wait_ms
+                # Includes time the caller spent between batches; the connection is held throughout
+                elapsed_us = self.tracer.now_us() - started
+                self.tracer.record("db.iter_query", started, elapsed_us, sql_hash=sql_hash(query),
+                                   rows=fetched, bytes=fetched * width, round_trips=1 + fetches,
+                                   wait_ms=round(wait_ms, 2))
+                self.query_log.record(query, "iter_query", elapsed_us / 1000 - wait_ms, rows=fetched,
+                                      round_trips=1 + fetches, wait_ms=wait_ms, error=error)
+    
+    def execute_query_batch(self, query: str, params_list: List[Dict]) -> List[List[Dict]]:
+        """Execute one SELECT for many parameter sets on a single prepared cursor"""
+        with self._instrument("execute_query_batch", query, executions=len(params_list)) as span, \
+                self.get_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.prepare(query)
+                batches = []
+                for params in params_list:
+                    cursor.execute(None, params)
+                    columns = [desc[0] for desc in cursor.description]
+                    batches.append([dict(zip(columns, row)) for row in cursor.fetchall()])
+                rows = sum(len(b) for b in batches)
+                span.set(rows=rows, bytes=rows * self._row_width(cursor),
+                         round_trips=sum(self._round_trips(len(b), cursor.arraysize) for b in batches))
+                return batches
+            finally:
+                cursor.close()
+    
     def execute_non_query(self, query: str, params: Optional[Dict] = None) -> int:
         """Execute INSERT, UPDATE, DELETE queries"""
-        with self.get_connection() as conn:
+        with self._instrument("execute_non_query", query) as span, self.get_connection() as conn:
             cursor = conn.cursor()
             try:
                 cursor.execute(query, params or {})
                 conn.commit()
+                span.set(rows=cursor.rowcount, round_trips=2)
                 return cursor.rowcount
             except Exception as e:
                 conn.rollback()
@@ -105,11 +228,13 @@ class DatabaseManager:
     
     def execute_many(self, query: str, params_list: List[Dict]) -> int:
         """Execute query with multiple parameter sets"""
-        with self.get_connection() as conn:
+        with self._instrument("execute_many", query, executions=len(params_list)) as span, \
+                self.get_connection() as conn:
             cursor = conn.cursor()
             try:
                 cursor.executemany(query, params_list)
                 conn.commit()
+                span.set(rows=cursor.rowcount, round_trips=2)
                 return cursor.rowcount
             except Exception as e:
                 conn.rollback()
@@ -119,8 +244,40 @@ class DatabaseManager:
     
     def get_dataframe(self, query: str, params: Optional[Dict] = None) -> pd.DataFrame:
         """Execute query and return results as pandas DataFrame"""
-        with self.get_connection() as conn:
-            return pd.read_sql(query, conn, params=params)
+        with self._instrument("get_dataframe", query) as span, self.get_connection() as conn:
+            df = pd.read_sql(query, conn, params=params)
+            span.set(rows=len(df), bytes=int(df.memory_usage(deep=False).sum()))
+            return df
+    
+    def explain_plan(self, query: str) -> PlanEstimate:
+        """Estimate cost/cardinality of a query without running it.
+
+        PLAN_TABLE is session-private, so explain, read and clean up all
+        happen on the same pooled connection.
+        """
+        statement_id = uuid.uuid4().hex[:30]
+        with self._instrument("explain_plan", query) as span, self.get_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(f"EXPLAIN PLAN SET STATEMENT_ID = '{statement_id}' FOR {query}")
+                cursor.execute(
+                    """SELECT ID, OPERATION, OPTIONS, OBJECT_NAME, COST, CARDINALITY, BYTES
+                       FROM PLAN_TABLE WHERE STATEMENT_ID = :statement_id ORDER BY ID""",
+                    {'statement_id': statement_id}
+                )
+                estimate = PlanEstimate()
+                for plan_id, operation, options, object_name, cost, cardinality, plan_bytes in cursor.fetchall():
+                    if plan_id == 0:
+                        estimate.cost, estimate.cardinality, estimate.bytes = cost, cardinality, plan_bytes
+                    if operation == 'TABLE ACCESS' and options == 'FULL' and object_name:
+                        estimate.full_scans.append(object_name)
+                cursor.execute("DELETE FROM PLAN_TABLE WHERE STATEMENT_ID = :statement_id",
+                               {'statement_id': statement_id})
+                conn.commit()
+                span.set(round_trips=4)
+                return estimate
+            finally:
+                cursor.close()
     
     def get_table_info(self, table_name: str) -> List[Dict]:
         """Get table structure information"""
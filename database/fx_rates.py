@@ -0,0 +1,186 @@
+# database/fx_rates.py
+import logging
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from database.db_manager import DatabaseManager
+
+RATE_TYPES = ('SPOT', 'AVERAGE', 'HISTORICAL')
+
+_RATES_QUERY = """
+SELECT FROM_CURRENCY, TO_CURRENCY, RATE_TYPE, RATE_DATE, RATE
+FROM fx_rates
+"""
+
+
+class RateNotFoundError(LookupError):
+    """No rate is effective for a currency pair, rate type and date"""
+
+
+class _RateSeries:
+    """Rates for one (from, to, type) key as sorted, parallel NumPy arrays"""
+
+    def __init__(self, dates: np.ndarray, rates: np.ndarray):
+        order = np.argsort(dates, kind='stable')
+        self.dates = dates[order]
+        self.rates = rates[order]
+
+    def merge(self, dates: np.ndarray, rates: np.ndarray) -> "_RateSeries":
+        # Newer rows replace older ones for the same date
+        all_dates = np.concatenate([self.dates, dates])
+        all_rates = np.concatenate([self.rates, rates])
+        _, last = np.unique(all_dates[::-1], return_index=True)
+        keep = len(all_dates) - 1 - last
+        return _RateSeries(all_dates[keep], all_rates[keep])
+
+    def lookup(self, dates: np.ndarray) -> np.ndarray:
+        """Rate effective on each date (latest rate dated on or before it); NaN before the first"""
+        idx = np.searchsorted(self.dates, dates, side='right') - 1
+        found = idx >= 0
+        result = np.full(len(dates), np.nan)
+        result[found] = self.rates[idx[found]]
+        return result
+
+
+class FXRateService:
+    """Singleton, in-memory FX rate tables keyed by currency pair and rate type.
+
+    Each (from, to, type) key holds date-sorted arrays, so a rate lookup is a
+    binary search and a whole column of dates is resolved in one vectorized
+    call. Rates come from the ``fx_rates`` table, refreshed incrementally by
+    RATE_DATE watermark, and/or from local CSV files re-read when modified.
+    """
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls, db_manager: Optional[DatabaseManager] = None):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self, db_manager: Optional[DatabaseManager] = None):
+        if not hasattr(self, 'initialized'):
+            self.db_manager = db_manager or DatabaseManager()
+            self.logger = logging.getLogger(__name__)
+            self._series: Dict[Tuple[str, str, str], _RateSeries] = {}
+            self._watermark = None
+            self._loaded_at: Optional[float] = None
+            self._files: Dict[str, float] = {}
+            self._refresh_lock = threading.Lock()
+            self.initialized = True
+
+    def _add_frame(self, df: pd.DataFrame, series: Optional[Dict[Tuple[str, str, str], _RateSeries]] = None):
+        series = self._series if series is None else series
+        df = df.rename(columns=str.upper)
+        df = df.assign(
+            FROM_CURRENCY=df['FROM_CURRENCY'].str.upper(),
+            TO_CURRENCY=df['TO_CURRENCY'].str.upper(),
+            RATE_TYPE=df['RATE_TYPE'].str.upper(),
+            RATE_DATE=pd.to_datetime(df['RATE_DATE']).values.astype('datetime64[D]'),
+            RATE=pd.to_numeric(df['RATE'], errors='coerce'),
+        ).dropna(subset=['RATE'])
+        for key, group in df.groupby(['FROM_CURRENCY', 'TO_CURRENCY', 'RATE_TYPE'], sort=False):
+            dates = group['RATE_DATE'].to_numpy(dtype='datetime64[D]')
+            rates = group['RATE'].to_numpy(dtype=float)
+            existing = series.get(key)
+            series[key] = existing.merge(dates, rates) if existing else _RateSeries(dates, rates)
+
+    def load(self):
+        """Full reload of the fx_rates table; rates from local files are merged back on top"""
+        with self._refresh_lock:
+            rows = self.db_manager.execute_query(_RATES_QUERY)
+            # Build aside and swap, so a failed query leaves the current rates in place
+            series: Dict[Tuple[str, str, str], _RateSeries] = {}
+            watermark = None
+            if rows:
+                df = pd.DataFrame(rows)
+                self._add_frame(df, series)
+                watermark = df['RATE_DATE'].max()
+            for path in list(self._files):
+                if os.path.exists(path):
+                    self._files[path] = os.path.getmtime(path)
+                    self._add_frame(pd.read_csv(path), series)
+            self._series = series
+            self._watermark = watermark
+            self._loaded_at = time.monotonic()
+            self.logger.info(f"Loaded {len(rows)} FX rates for {len(self._series)} rate series")
+
+    def refresh(self):
+        """Incremental refresh: fetch only rates dated on or after the last loaded date"""
+        if self._loaded_at is None:
+            return self.load()
+
+        with self._refresh_lock:
+            if self._watermark is None:
+                rows = self.db_manager.execute_query(_RATES_QUERY)
+            else:
+                # Re-read the watermark date itself: late rows for that day replace earlier ones
+                rows = self.db_manager.execute_query(_RATES_QUERY + "WHERE RATE_DATE >= :since",
+                                                     {'since': self._watermark})
+            if rows:
+                df = pd.DataFrame(rows)
+                self._add_frame(df)
+                self._watermark = df['RATE_DATE'].max()
+                self.logger.info(f"Refreshed {len(rows)} FX rates")
+            self._loaded_at = time.monotonic()
+
+    def load_file(self, path: str) -> bool:
+        """Merge rates from a CSV file (same columns as fx_rates); skipped if unchanged"""
+        mtime = os.path.getmtime(path)
+        if self._files.get(path) == mtime:
+            return False
+        with self._refresh_lock:
+            self._add_frame(pd.read_csv(path))
+            self._files[path] = mtime
+        self.logger.info(f"Loaded FX rates from {path}")
+        return True
+
+    def ensure_fresh(self, max_age_seconds: float = 3600):
+        """Load on first use, refresh once older than ``max_age_seconds``, re-check local files"""
+        if self._loaded_at is None:
+            self.load()
+        elif time.monotonic() - self._loaded_at >= max_age_seconds:
+            self.refresh()
+        for path in list(self._files):
+            if os.path.exists(path):
+                self.load_file(path)
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._loaded_at is not None
+
+    def currencies(self) -> List[str]:
+        return sorted({c for key in self._series for c in key[:2]})
+
+    def rates(self, from_currency: str, to_currency: str, rate_type: str,
+              dates: Iterable) -> np.ndarray:
+        """Vectorized lookup of the rate effective on each date.
+
+        Falls back to the inverse pair when only that is loaded. Dates with no
+        effective rate come back as NaN.
+        """
+        from_currency, to_currency, rate_type = from_currency.upper(), to_currency.upper(), rate_type.upper()
+        dates = pd.to_datetime(pd.Series(list(dates))).values.astype('datetime64[D]')
+        if from_currency == to_currency:
+            return np.ones(len(dates))
+        series = self._series.get((from_currency, to_currency, rate_type))
+        if series is not None:
+            return series.lookup(dates)
+        inverse = self._series.get((to_currency, from_currency, rate_type))
+        if inverse is not None:
+            with np.errstate(divide='ignore'):
+                return 1.0 / inverse.lookup(dates)
+        return np.full(len(dates), np.nan)
+
+    def rate(self, from_currency: str, to_currency: str, rate_type: str, date) -> float:
+        value = self.rates(from_currency, to_currency, rate_type, [date])[0]
+        if np.isnan(value):
+            raise RateNotFoundError(f"No {rate_type} rate {from_currency}/{to_currency} on {date}")
+        return float(value)
@@ -0,0 +1,177 @@
+# database/kpi_engine.py
+import logging
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from database.db_manager import DatabaseManager
+from diagnostics.tracing import Tracer
+
+_BIND_RE = re.compile(r"(?<![:\w]):([A-Za-z_]\w*)")
+
+
+@dataclass
+class KPI:
+    """A dashboard metric backed by a scalar SQL expression"""
+    name: str
+    label: str
+    sql: str
+    params: Dict[str, Any] = field(default_factory=dict)
+    max_age_seconds: int = 300
+
+
+@dataclass
+class KPIResult:
+    name: str
+    value: Any = None
+    fetched_at: Optional[float] = None
+    latency_ms: float = 0.0
+    batched: bool = False
+    error: Optional[str] = None
+
+    def age_seconds(self) -> Optional[float]:
+        if self.fetched_at is None:
+            return None
+        return time.time() - self.fetched_at
+
+    def is_stale(self, max_age_seconds: int) -> bool:
+        age = self.age_seconds()
+        return age is None or age >= max_age_seconds or self.error is not None
+
+
+DEFAULT_DASHBOARD_KPIS = [
+    KPI("table_count", "Tables", "SELECT COUNT(*) FROM user_tables", max_age_seconds=3600),
+    KPI("entity_count", "Entities", "SELECT COUNT(*) FROM entities"),
+    KPI("open_eliminations", "Open Eliminations",
+        "SELECT COUNT(*) FROM elimination_entries WHERE status = :status", {'status': 'OPEN'}),
+    KPI("last_consolidation", "Last Consolidation", "SELECT MAX(run_date) FROM consolidation_runs"),
+]
+
+
+class KPIEngine:
+    """Evaluate dashboard KPIs with as few round trips as possible.
+
+    In ``batch`` mode every stale KPI becomes a scalar subquery of a single
+    ``SELECT ... FROM DUAL`` statement. If that statement fails (for example
+    because one KPI references a missing table) the engine falls back to
+    running the KPIs in parallel over the connection pool so one broken tile
+    does not blank the others; failing KPIs stay out of the batch until they
+    succeed again. Results are cached per KPI with their age and latency.
+    """
+
+    def __init__(self, db_manager: DatabaseManager, kpis: Optional[List[KPI]] = None,
+                 mode: str = "batch", max_workers: int = 4):
+        if mode not in ("batch", "parallel"):
+            raise ValueError(f"Unknown KPI mode: {mode}")
+        self.db_manager = db_manager
+        self.mode = mode
+        self.max_workers = max_workers
+        self.logger = logging.getLogger(__name__)
+        self._kpis: Dict[str, KPI] = {}
+        self._results: Dict[str, KPIResult] = {}
+        self._lock = threading.Lock()
+        for kpi in kpis or []:
+            self.register(kpi)
+
+    def register(self, kpi: KPI):
+        self._kpis[kpi.name] = kpi
+
+    @property
+    def kpis(self) -> List[KPI]:
+        return list(self._kpis.values())
+
+    def get(self, name: str) -> KPIResult:
+        with self._lock:
+            return self._results.get(name, KPIResult(name))
+
+    def stale_kpis(self) -> List[KPI]:
+        return [k for k in self._kpis.values() if self.get(k.name).is_stale(k.max_age_seconds)]
+
+    def refresh(self, names: Optional[List[str]] = None, force: bool = False) -> Dict[str, KPIResult]:
+        """Re-evaluate stale (or all, if ``force``) KPIs and return every cached result"""
+        kpis = [self._kpis[n] for n in names] if names else self.kpis
+        if not force:
+            kpis = [k for k in kpis if self.get(k.name).is_stale(k.max_age_seconds)]
+
+        if self.mode == "batch":
+            # KPIs that failed last time run on their own so they cannot break the batch
+            batchable = [k for k in kpis if not self.get(k.name).error]
+            isolated = [k for k in kpis if self.get(k.name).error]
+            if len(batchable) > 1:
+                try:
+                    self._store(self._run_batch(batchable))
+                except Exception as e:
+                    self.logger.warning(f"Batched KPI query failed, falling back to parallel: {e}")
+                    isolated += batchable
+            else:
+                isolated += batchable
+            kpis = isolated
+        if kpis:
+            self._store(self._run_parallel(kpis))
+
+        with self._lock:
+            return {k: self._results.get(k, KPIResult(k)) for k in self._kpis}
+
+    def build_batch_query(self, kpis: List[KPI]) -> Tuple[str, Dict[str, Any]]:
+        """Combine KPIs into one multi-aggregate statement with namespaced binds"""
+        columns = []
+        params = {}
+        for i, kpi in enumerate(kpis):
+            prefix = f"k{i}_"
+            sql = _BIND_RE.sub(lambda m: f":{prefix}{m.group(1)}", kpi.sql)
+            columns.append(f"({sql}) AS KPI_{i}")
+            params.update({f"{prefix}{key}": value for key, value in kpi.params.items()})
+        return "SELECT " + ",\n       ".join(columns) + "\nFROM DUAL", params
+
+    def latency_report(self) -> List[Dict[str, Any]]:
+        """Per-KPI latency and staleness, slowest first"""
+        report = []
+        for kpi in self._kpis.values():
+            result = self.get(kpi.name)
+            report.append({
+                'kpi': kpi.name,
+                'latency_ms': round(result.latency_ms, 1),
+                'batched': result.batched,
+                'age_seconds': result.age_seconds(),
+                'stale': result.is_stale(kpi.max_age_seconds),
+                'error': result.error,
+            })
+        return sorted(report, key=lambda r: r['latency_ms'], reverse=True)
+
+    def _run_batch(self, kpis: List[KPI]) -> List[KPIResult]:
+        query, params = self.build_batch_query(kpis)
+        start = time.perf_counter()
+        row = self.db_manager.execute_query(query, params)[0]
+        latency_ms = (time.perf_counter() - start) * 1000
+        fetched_at = time.time()
+        return [
+            KPIResult(kpi.name, row[f"KPI_{i}"], fetched_at, latency_ms, batched=True)
+            for i, kpi in enumerate(kpis)
+        ]
+
+    def _run_one(self, kpi: KPI) -> KPIResult:
+        start = time.perf_counter()
+        try:
+            rows = self.db_manager.execute_query(kpi.sql, kpi.params)
+            value = next(iter(rows[0].values())) if rows else None
+            return KPIResult(kpi.name, value, time.time(), (time.perf_counter() - start) * 1000)
+        except Exception as e:
+            self.logger.error(f"KPI {kpi.name} failed: {e}")
+            return KPIResult(kpi.name, latency_ms=(time.perf_counter() - start) * 1000, error=str(e))
+
+    def _run_parallel(self, kpis: List[KPI]) -> List[KPIResult]:
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(kpis))) as executor:
+            return list(executor.map(Tracer.bind(self._run_one), kpis))
+
+    def _store(self, results: List[KPIResult]):
+        with self._lock:
+            for result in results:
+                previous = self._results.get(result.name)
+                if result.error and previous and previous.fetched_at is not None:
+                    # Keep serving the last good value; the error marks it stale
+                    result.value = previous.value
+                    result.fetched_at = previous.fetched_at
+                self._results[result.name] = result
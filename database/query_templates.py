@@ -0,0 +1,212 @@
+# database/query_templates.py
+import logging
+import re
+import string
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from database.db_manager import DatabaseManager
+
+_IDENTIFIER_RE = re.compile(r"^[A-Za-z][A-Za-z0-9_$#]{0,127}$")
+
+
+class QueryTemplateError(ValueError):
+    """Raised when a template is rendered with an unsafe or unknown identifier"""
+
+
+@dataclass
+class QueryTemplate:
+    """SQL text with ``{placeholder}`` identifiers and ``:bind`` values.
+
+    Only identifiers (table names, aliases) are substituted into the text,
+    and only after validation; every value must be passed as a bind so the
+    statement text stays identical across calls and is parsed once.
+    ``table_placeholders`` must name tables of the current schema;
+    ``column_placeholders`` only need to be plain identifiers;
+    ``choice_placeholders`` must take one of the listed values.
+    """
+    name: str
+    sql: str
+    table_placeholders: Tuple[str, ...] = ()
+    column_placeholders: Tuple[str, ...] = ()
+    choice_placeholders: Dict[str, Tuple[str, ...]] = field(default_factory=dict)
+
+    def placeholders(self) -> List[str]:
+        return [f for _, f, _, _ in string.Formatter().parse(self.sql) if f]
+
+    def render(self, allowed_tables: Optional[Iterable[str]] = None, **identifiers) -> str:
+        expected = set(self.placeholders())
+        if set(identifiers) != expected:
+            raise QueryTemplateError(f"Template {self.name} expects identifiers {sorted(expected)}")
+
+        allowed = {t.upper() for t in allowed_tables} if allowed_tables is not None else None
+        rendered = {}
+        for key, value in identifiers.items():
+            value = str(value)
+            if not _IDENTIFIER_RE.match(value):
+                raise QueryTemplateError(f"Invalid identifier for {key}: {value!r}")
+            if key in self.choice_placeholders:
+                if value not in self.choice_placeholders[key]:
+                    raise QueryTemplateError(f"{key} must be one of {self.choice_placeholders[key]}")
+            elif key in self.table_placeholders:
+                value = value.upper()
+                if allowed is not None and value not in allowed:
+                    raise QueryTemplateError(f"Unknown table for {key}: {value}")
+            elif key in self.column_placeholders:
+                value = value.upper()
+            else:
+                raise QueryTemplateError(f"Placeholder {key} is not declared")
+            rendered[key] = value
+        return self.sql.format(**rendered)
+
+
+@dataclass
+class TemplateStats:
+    renders: int = 0
+    prepares: int = 0
+    executions: int = 0
+    distinct_statements: int = 0
+
+
+class QueryTemplateRegistry:
+    """Render, cache and execute QueryTemplates while counting parses.
+
+    Rendered SQL text is cached per (template, identifiers), so repeated calls
+    hand the pool the exact same statement and hit its statement cache.
+    ``prepares`` counts statements sent for (at most soft) parsing and
+    ``distinct_statements`` bounds the number of hard parses; compare them
+    with ``executions`` to see how well cursors are being reused.
+    """
+
+    def __init__(self, db_manager: DatabaseManager,
+                 allowed_tables: Optional[Callable[[], Iterable[str]]] = None):
+        self.db_manager = db_manager
+        self.allowed_tables = allowed_tables
+        self.logger = logging.getLogger(__name__)
+        self._templates: Dict[str, QueryTemplate] = {}
+        self._rendered: Dict[Tuple[str, Tuple], str] = {}
+        self._stats: Dict[str, TemplateStats] = {}
+        self._lock = threading.Lock()
+
+    def register(self, template: QueryTemplate):
+        self._templates[template.name] = template
+        self._stats.setdefault(template.name, TemplateStats())
+
+    def render(self, name: str, **identifiers) -> str:
+        key = (name, tuple(sorted((k, str(v).upper()) for k, v in identifiers.items())))
+        with self._lock:
+            self._stats[name].renders += 1
+            sql = self._rendered.get(key)
+        if sql is None:
+            allowed = self.allowed_tables() if self.allowed_tables else None
+            sql = self._templates[name].render(allowed, **identifiers)
+            with self._lock:
+                if sql not in self._rendered.values():
+                    self._stats[name].distinct_statements += 1
+                self._rendered[key] = sql
+        return sql
+
+    def execute(self, name: str, params: Dict, **identifiers) -> List[Dict]:
+        """Run a template once with bind ``params``"""
+        sql = self.render(name, **identifiers)
+        with self._lock:
+            self._stats[name].prepares += 1
+            self._stats[name].executions += 1
+        return self.db_manager.execute_query(sql, params)
+
+    def execute_batch(self, name: str, params_list: List[Dict], **identifiers) -> List[List[Dict]]:
+        """Run a template for many bind sets on one prepared cursor"""
+        sql = self.render(name, **identifiers)
+        with self._lock:
+            self._stats[name].prepares += 1
+            self._stats[name].executions += len(params_list)
+        return self.db_manager.execute_query_batch(sql, params_list)
+
+    def stats(self) -> Dict[str, TemplateStats]:
+        with self._lock:
+            return {name: TemplateStats(**vars(s)) for name, s in self._stats.items()}
+
+    def session_parse_counts(self) -> Dict[str, int]:
+        """Server-side parse counters for a pooled session (needs V$MYSTAT access)"""
+        query = """
+        SELECT n.NAME, s.VALUE
+        FROM V$MYSTAT s JOIN V$STATNAME n ON n.STATISTIC# = s.STATISTIC#
+        WHERE n.NAME IN ('parse count (total)', 'parse count (hard)', 'execute count')
+        """
+        try:
+            return {row['NAME']: int(row['VALUE']) for row in self.db_manager.execute_query(query)}
+        except Exception as e:
+            self.logger.warning(f"Parse statistics unavailable: {e}")
+            return {}
+
+
+VARIANCE_TEMPLATE = QueryTemplate(
+    name="variance",
+    sql="""
+    SELECT /*+ LEADING({lead}) */
+        NVL(a.account_code, b.account_code) AS account_code,
+        NVL(a.account_name, b.account_name) AS account_name,
+        a.amount AS actual_amount,
+        b.amount AS budget_amount,
+        (NVL(a.amount, 0) - NVL(b.amount, 0)) AS variance,
+        CASE
+            WHEN b.amount != 0 THEN ROUND(((NVL(a.amount, 0) - b.amount) / b.amount) * 100, 2)
+            ELSE NULL
+        END AS variance_percentage
+    FROM (SELECT account_code, account_name, amount FROM {actual_table} WHERE period = :period) a
+    FULL OUTER JOIN (SELECT account_code, account_name, amount FROM {budget_table} WHERE period = :period) b
+        ON a.account_code = b.account_code
+    ORDER BY ABS(NVL(a.amount, 0) - NVL(b.amount, 0)) DESC
+    """,
+    table_placeholders=("actual_table", "budget_table"),
+    choice_placeholders={"lead": ("a", "b")}
+)
+
+
+# Number of period binds per batched variance statement. Short lists are
+# padded with their last period so the statement text never changes.
+PERIOD_CHUNK_SIZE = 12
+
+
+def period_binds(periods: List[str]) -> List[Dict[str, str]]:
+    """Split periods into fixed-size bind sets for the variance_periods templates"""
+    bind_sets = []
+    for i in range(0, len(periods), PERIOD_CHUNK_SIZE):
+        chunk = list(periods[i:i + PERIOD_CHUNK_SIZE])
+        chunk += [chunk[-1]] * (PERIOD_CHUNK_SIZE - len(chunk))
+        bind_sets.append({f"p{j}": period for j, period in enumerate(chunk)})
+    return bind_sets
+
+
+def _variance_periods_template(name: str, with_entity: bool) -> QueryTemplate:
+    in_list = ", ".join(f":p{j}" for j in range(PERIOD_CHUNK_SIZE))
+    entity_select = "NVL(a.{entity_column}, b.{entity_column}) AS entity," if with_entity else ""
+    entity_col = "{entity_column}," if with_entity else ""
+    entity_filter = "AND {entity_column} = :entity" if with_entity else ""
+    entity_join = "AND a.{entity_column} = b.{entity_column}" if with_entity else ""
+    sql = f"""
+    SELECT /*+ LEADING({{lead}}) */
+        NVL(a.period, b.period) AS period,
+        {entity_select}
+        NVL(a.account_code, b.account_code) AS account_code,
+        NVL(a.account_name, b.account_name) AS account_name,
+        a.amount AS actual_amount,
+        b.amount AS budget_amount
+    FROM (SELECT {entity_col} period, account_code, account_name, amount FROM {{actual_table}}
+          WHERE period IN ({in_list}) {entity_filter}) a
+    FULL OUTER JOIN (SELECT {entity_col} period, account_code, account_name, amount FROM {{budget_table}}
+          WHERE period IN ({in_list}) {entity_filter}) b
+        ON a.account_code = b.account_code AND a.period = b.period {entity_join}
+    """
+    return QueryTemplate(
+        name=name,
+        sql=sql,
+        table_placeholders=("actual_table", "budget_table"),
+        column_placeholders=("entity_column",) if with_entity else (),
+        choice_placeholders={"lead": ("a", "b")}
+    )
+
+
+VARIANCE_PERIODS_TEMPLATE = _variance_periods_template("variance_periods", with_entity=False)
+VARIANCE_PERIODS_ENTITY_TEMPLATE = _variance_periods_template("variance_periods_entity", with_entity=True)
@@ -0,0 +1,151 @@
+# database/table_stats.py
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from database.db_manager import DatabaseManager
+
+_STATS_QUERY = """
+SELECT t.TABLE_NAME, t.NUM_ROWS, t.BLOCKS, t.AVG_ROW_LEN, t.LAST_ANALYZED,
+       NVL(s.BYTES, 0) AS SEGMENT_BYTES
+FROM USER_TABLES t
+LEFT JOIN (
+    SELECT SEGMENT_NAME, SUM(BYTES) AS BYTES
+    FROM USER_SEGMENTS
+    WHERE SEGMENT_TYPE LIKE 'TABLE%'
+    GROUP BY SEGMENT_NAME
+) s ON s.SEGMENT_NAME = t.TABLE_NAME
+"""
+
+# Oracle limits IN lists to 1000 expressions
+_IN_LIST_CHUNK = 1000
+
+
+@dataclass
+class TableStats:
+    table_name: str
+    num_rows: Optional[int]
+    blocks: Optional[int]
+    avg_row_len: Optional[int]
+    segment_bytes: int
+    last_analyzed: Any
+
+    @property
+    def estimated_rows(self) -> int:
+        """Optimizer row count, or a size-based estimate for unanalyzed tables"""
+        if self.num_rows is not None:
+            return int(self.num_rows)
+        if self.avg_row_len:
+            return int(self.segment_bytes // self.avg_row_len)
+        return 0
+
+
+class TableStatsService:
+    """Singleton cache of table sizes and row estimates for the current schema.
+
+    Reads USER_TABLES / USER_SEGMENTS once, then refreshes incrementally by
+    comparing LAST_ANALYZED per table and reloading only new, re-analyzed or
+    never-analyzed tables. Nothing here touches ALL_TABLES, so cost does not
+    grow with the number of schemas on a shared instance.
+    """
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls, db_manager: Optional[DatabaseManager] = None):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self, db_manager: Optional[DatabaseManager] = None):
+        if not hasattr(self, 'initialized'):
+            self.db_manager = db_manager or DatabaseManager()
+            self.logger = logging.getLogger(__name__)
+            self._stats: Dict[str, TableStats] = {}
+            self._loaded_at: Optional[float] = None
+            self._refresh_lock = threading.Lock()
+            self.initialized = True
+
+    @staticmethod
+    def _to_stats(row: Dict) -> TableStats:
+        return TableStats(
+            table_name=row['TABLE_NAME'],
+            num_rows=row['NUM_ROWS'],
+            blocks=row['BLOCKS'],
+            avg_row_len=row['AVG_ROW_LEN'],
+            segment_bytes=int(row['SEGMENT_BYTES'] or 0),
+            last_analyzed=row['LAST_ANALYZED']
+        )
+
+    def load(self):
+        """Full reload of all table statistics"""
+        with self._refresh_lock:
+            rows = self.db_manager.execute_query(_STATS_QUERY)
+            self._stats = {row['TABLE_NAME']: self._to_stats(row) for row in rows}
+            self._loaded_at = time.monotonic()
+            self.logger.info(f"Loaded statistics for {len(self._stats)} tables")
+
+    def refresh(self):
+        """Incremental refresh: reload only changed tables, drop removed ones"""
+        if self._loaded_at is None:
+            return self.load()
+
+        with self._refresh_lock:
+            current = self.db_manager.execute_query("SELECT TABLE_NAME, LAST_ANALYZED FROM USER_TABLES")
+            current = {row['TABLE_NAME']: row['LAST_ANALYZED'] for row in current}
+
+            # Unanalyzed tables are estimated from segment size, which can grow at any time
+            changed = [name for name, analyzed in current.items()
+                       if name not in self._stats or analyzed is None
+                       or self._stats[name].last_analyzed != analyzed]
+            stats = {name: s for name, s in self._stats.items() if name in current}
+
+            for i in range(0, len(changed), _IN_LIST_CHUNK):
+                chunk = changed[i:i + _IN_LIST_CHUNK]
+                binds = {f"t{j}": name for j, name in enumerate(chunk)}
+                query = _STATS_QUERY + "WHERE t.TABLE_NAME IN (" + ", ".join(f":{b}" for b in binds) + ")"
+                for row in self.db_manager.execute_query(query, binds):
+                    stats[row['TABLE_NAME']] = self._to_stats(row)
+
+            self._stats = stats
+            self._loaded_at = time.monotonic()
+            if changed:
+                self.logger.info(f"Refreshed statistics for {len(changed)} tables")
+
+    def ensure_fresh(self, max_age_seconds: float = 600):
+        """Load on first use and refresh once the cache is older than ``max_age_seconds``"""
+        if self._loaded_at is None:
+            self.load()
+        elif time.monotonic() - self._loaded_at >= max_age_seconds:
+            self.refresh()
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._loaded_at is not None
+
+    def get(self, table_name: str) -> Optional[TableStats]:
+        return self._stats.get(table_name.upper())
+
+    def estimated_rows(self, table_name: str) -> Optional[int]:
+        stats = self.get(table_name)
+        return stats.estimated_rows if stats else None
+
+    def table_names(self) -> List[str]:
+        return list(self._stats)
+
+    def table_count(self) -> int:
+        return len(self._stats)
+
+    def top_tables(self, n: int = 5, by: str = "rows") -> List[TableStats]:
+        key = (lambda s: s.estimated_rows) if by == "rows" else (lambda s: s.segment_bytes)
+        return sorted(self._stats.values(), key=key, reverse=True)[:n]
+
+    def order_by_size(self, table_names: List[str]) -> List[str]:
+        """Sort tables smallest first; tables without statistics go last"""
+        def size(name):
+            rows = self.estimated_rows(name)
+            return (rows is None, rows or 0)
+        return sorted(table_names, key=size)
@@ -0,0 +1,234 @@
+# diagnostics/model_telemetry.py
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from diagnostics.tracing import Tracer, estimate_tokens
+
+DEFAULT_DB_PATH = os.path.join("logs", "model_calls.sqlite")
+
+# Estimated USD per million tokens (input, output); longest matching prefix wins
+MODEL_PRICING = {
+    'gemini-2.5-pro': (1.25, 10.00),
+    'gemini-2.5-flash-lite': (0.10, 0.40),
+    'gemini-2.5-flash': (0.30, 2.50),
+    'gemini-2.0-flash-lite': (0.075, 0.30),
+    'gemini-2.0-flash': (0.10, 0.40),
+    'gemini-1.5-pro': (1.25, 5.00),
+    'gemini-1.5-flash': (0.075, 0.30),
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS model_calls (
+    ts INTEGER NOT NULL,
+    feature TEXT NOT NULL,
+    model TEXT NOT NULL,
+    prompt_tokens INTEGER,
+    response_tokens INTEGER,
+    ttft_ms INTEGER,
+    latency_ms INTEGER NOT NULL,
+    retries INTEGER NOT NULL DEFAULT 0,
+    cost_micro_usd INTEGER,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_model_calls_ts ON model_calls (ts);
+"""
+
+
+def estimate_cost(model: str, prompt_tokens: Optional[int], response_tokens: Optional[int]) -> Optional[float]:
+    """Estimated USD cost of one call, or None for an unpriced model"""
+    name = model.split('/')[-1]
+    prefix = max((p for p in MODEL_PRICING if name.startswith(p)), key=len, default=None)
+    if prefix is None:
+        return None
+    input_price, output_price = MODEL_PRICING[prefix]
+    return ((prompt_tokens or 0) * input_price + (response_tokens or 0) * output_price) / 1e6
+
+
+def _chunk_text(chunk) -> str:
+    try:
+        return chunk.text
+    except ValueError:
+        # Chunks without text parts (e.g. a final usage-only chunk)
+        return ""
+
+
+def _percentile(ordered: List[int], q: float) -> Optional[int]:
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class ModelTelemetry:
+    """Singleton recorder for Gemini calls, stored as a compact SQLite time series.
+
+    ``generate`` is the instrumented call path: it streams the response to
+    measure time-to-first-token, reads token counts from ``usage_metadata``
+    (estimating the prompt side when absent), prices the call, traces it and
+    appends one integer-encoded row per call. Rows older than
+    ``retention_days`` are pruned on start-up.
+    """
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, retention_days: int = 90):
+        if not hasattr(self, 'initialized'):
+            self.db_path = db_path
+            self.retention_days = retention_days
+            self.logger = logging.getLogger(__name__)
+            self.tracer = Tracer()
+            self._conn: Optional[sqlite3.Connection] = None
+            self._db_lock = threading.Lock()
+            self.initialized = True
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            conn.execute("DELETE FROM model_calls WHERE ts < ?",
+                         (int(time.time()) - self.retention_days * 86400,))
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def record(self, feature: str, model: str, latency_ms: float, prompt_tokens: Optional[int] = None,
+               response_tokens: Optional[int] = None, ttft_ms: Optional[float] = None, retries: int = 0,
+               error: Optional[str] = None):
+        cost = estimate_cost(model, prompt_tokens, response_tokens)
+        row = (int(time.time()), feature, model.split('/')[-1], prompt_tokens, response_tokens,
+               None if ttft_ms is None else int(ttft_ms), int(latency_ms), retries,
+               None if cost is None else int(round(cost * 1e6)), error)
+        try:
+            with self._db_lock:
+                conn = self._connection()
+                conn.execute("INSERT INTO model_calls VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", row)
+                conn.commit()
+        except sqlite3.Error as e:
+            self.logger.warning(f"Could not record model call telemetry: {e}")
+
+    def generate(self, model, prompt: str, feature: str, retries: int = 0,
+                 on_stream: Optional[Callable[[], Callable[[str], None]]] = None, **kwargs):
+        """Call ``model.generate_content`` with streaming and record latency, TTFT, tokens and cost.
+
+        Returns the fully consumed response, so ``.text`` behaves exactly as
+        for a non-streamed call. ``on_stream()``, if given, is called once per
+        call and returns a sink that receives each chunk's text as it arrives.
+        """
+        model_name = getattr(model, 'model_name', 'unknown')
+        started = time.perf_counter()
+        ttft_ms = None
+        with self.tracer.span("ai.generate_content", feature=feature, model=model_name,
+                              prompt_chars=len(prompt)) as span:
+            try:
+                response = model.generate_content(prompt, stream=True, **kwargs)
+                sink = on_stream() if on_stream else None
+                for chunk in response:
+                    if ttft_ms is None:
+                        ttft_ms = (time.perf_counter() - started) * 1000
+                    if sink is not None:
+                        sink(_chunk_text(chunk))
+            except Exception as e:
+                self.record(feature, model_name, (time.perf_counter() - started) * 1000,
+                            prompt_tokens=estimate_tokens(prompt), ttft_ms=ttft_ms, retries=retries,
+                            error=f"{type(e).__name__}: {e}"[:200])
+                raise
+            usage = getattr(response, 'usage_metadata', None)
+            prompt_tokens = getattr(usage, 'prompt_token_count', None) or estimate_tokens(prompt)
+            response_tokens = getattr(usage, 'candidates_token_count', None)
+            latency_ms = (time.perf_counter() - started) * 1000
+            span.set(prompt_tokens=prompt_tokens, response_tokens=response_tokens,
+                     ttft_ms=None if ttft_ms is None else round(ttft_ms, 1), retries=retries)
+        self.record(feature, model_name, latency_ms, prompt_tokens, response_tokens, ttft_ms, retries)
+        return response
+
+    def report(self, days: float = 7, group_by: str = 'feature') -> List[Dict[str, Any]]:
+        """Calls, latency percentiles, TTFT, tokens and cost per feature (or model), costliest first"""
+        if group_by not in ('feature', 'model'):
+            raise ValueError("group_by must be 'feature' or 'model'")
+        since = int(time.time() - days * 86400)
+        with self._db_lock:
+            rows = self._connection().execute(
+                f"SELECT {group_by}, latency_ms, ttft_ms, prompt_tokens, response_tokens, retries, "
+                f"cost_micro_usd, error FROM model_calls WHERE ts >= ? ORDER BY {group_by}", (since,)
+            ).fetchall()
+
+        groups: Dict[str, Dict[str, Any]] = {}
+        for key, latency, ttft, prompt_tokens, response_tokens, retries, cost, error in rows:
+            g = groups.setdefault(key, {'latencies': [], 'ttfts': [], 'prompt_tokens': 0, 'response_tokens': 0,
+                                        'retries': 0, 'cost_micro_usd': 0, 'errors': 0})
+            g['latencies'].append(latency)
+            if ttft is not None:
+                g['ttfts'].append(ttft)
+            g['prompt_tokens'] += prompt_tokens or 0
+            g['response_tokens'] += response_tokens or 0
+            g['retries'] += retries
+            g['cost_micro_usd'] += cost or 0
+            g['errors'] += error is not None
+
+        report = []
+        for key, g in groups.items():
+            latencies, ttfts = sorted(g['latencies']), sorted(g['ttfts'])
+            report.append({
+                group_by: key,
+                'calls': len(latencies),
+                'errors': g['errors'],
+                'retries': g['retries'],
+                'p50_ms': _percentile(latencies, 0.50),
+                'p95_ms': _percentile(latencies, 0.95),
+                'ttft_p50_ms': _percentile(ttfts, 0.50),
+                'total_latency_s': round(sum(latencies) / 1000, 1),
+                'prompt_tokens': g['prompt_tokens'],
+                'response_tokens': g['response_tokens'],
+                'cost_usd': round(g['cost_micro_usd'] / 1e6, 6),
+            })
+        return sorted(report, key=lambda r: (r['cost_usd'], r['total_latency_s']), reverse=True)
+
+    def close(self):
+        with self._db_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(prog="python -m diagnostics.model_telemetry",
+                                     description="Latency and spend report for Gemini calls")
+    sub = parser.add_subparsers(dest="command", required=True)
+    report = sub.add_parser("report", help="latency, tokens and estimated cost per feature")
+    report.add_argument("--db", default=DEFAULT_DB_PATH)
+    report.add_argument("--days", type=float, default=7)
+    report.add_argument("--by", choices=("feature", "model"), default="feature")
+    report.add_argument("--json", action="store_true", help="print raw JSON")
+    args = parser.parse_args(argv)
+
+    rows = ModelTelemetry(db_path=args.db).report(days=args.days, group_by=args.by)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    if not rows:
+        print(f"No model calls recorded in the last {args.days:g} days")
+        return
+    print(f"{args.by:<28} {'calls':>6} {'p50 ms':>8} {'p95 ms':>8} {'ttft':>7} {'total s':>8} "
+          f"{'in tok':>9} {'out tok':>9} {'cost $':>10}")
+    for row in rows:
+        print(f"{row[args.by]:<28} {row['calls']:>6} {row['p50_ms'] or 0:>8} {row['p95_ms'] or 0:>8} "
+              f"{row['ttft_p50_ms'] or 0:>7} {row['total_latency_s']:>8} {row['prompt_tokens']:>9} "
+              f"{row['response_tokens']:>9} {row['cost_usd']:>10.6f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+# diagnostics/query_log.py
+import argparse
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import defaultdict, deque
+from dataclasses import asdict, dataclass
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+from diagnostics.tracing import Tracer, sql_hash
+
+DEFAULT_SLOW_LOG = os.path.join("logs", "slow_queries.jsonl")
+
+_COMMENT_RE = re.compile(r"/\*.*?\*/|--[^\n]*", re.DOTALL)
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"(?<![\w:$#])-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?\b")
+_BIND_RE = re.compile(r":\w+")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+
+
+def normalize_sql(sql: str) -> str:
+    """Statement shape with literals and binds replaced, so variants group together.
+
+    ``WHERE id IN (:t0, :t1, :t2)`` and ``WHERE id IN (7, 8)`` both become
+    ``where id in (?+)``.
+    """
+    sql = _COMMENT_RE.sub(" ", sql)
+    sql = _STRING_RE.sub("?", sql)
+    sql = _BIND_RE.sub("?", sql)
+    sql = _NUMBER_RE.sub("?", sql)
+    sql = " ".join(sql.split()).lower()
+    return _IN_LIST_RE.sub("(?+)", sql)
+
+
+def fingerprint(sql: str) -> str:
+    return sql_hash(normalize_sql(sql))
+
+
+def percentile(ordered: List[float], q: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+@dataclass
+class QueryRecord:
+    timestamp: float
+    fingerprint: str
+    statement: str
+    operation: str
+    elapsed_ms: float
+    wait_ms: float
+    rows: int
+    round_trips: int
+    caller: str
+    error: Optional[str] = None
+
+
+class _FingerprintStats:
+    def __init__(self, statement: str, sample_size: int):
+        self.statement = statement
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.total_rows = 0
+        self.total_round_trips = 0
+        self.total_wait_ms = 0.0
+        self.samples: Deque[float] = deque(maxlen=sample_size)
+        self.callers: Dict[str, int] = defaultdict(int)
+
+    def add(self, record: QueryRecord):
+        self.count += 1
+        self.errors += record.error is not None
+        self.total_ms += record.elapsed_ms
+        self.total_rows += record.rows
+        self.total_round_trips += record.round_trips
+        self.total_wait_ms += record.wait_ms
+        self.samples.append(record.elapsed_ms)
+        self.callers[record.caller] += 1
+
+
+def aggregate(records: Iterable[Dict[str, Any]], sample_size: int = 1000) -> List[Dict[str, Any]]:
+    """Per-fingerprint count, latency percentiles, rows, round trips and top callers"""
+    stats: Dict[str, _FingerprintStats] = {}
+    for record in records:
+        record = record if isinstance(record, QueryRecord) else QueryRecord(**record)
+        entry = stats.get(record.fingerprint)
+        if entry is None:
+            entry = stats[record.fingerprint] = _FingerprintStats(record.statement, sample_size)
+        entry.add(record)
+    return _report(stats)
+
+
+def _report(stats: Dict[str, _FingerprintStats]) -> List[Dict[str, Any]]:
+    rows = []
+    for key, entry in stats.items():
+        ordered = sorted(entry.samples)
+        rows.append({
+            'fingerprint': key,
+            'statement': entry.statement,
+            'count': entry.count,
+            'errors': entry.errors,
+            'total_ms': round(entry.total_ms, 1),
+            'p50_ms': round(percentile(ordered, 0.50), 1),
+            'p95_ms': round(percentile(ordered, 0.95), 1),
+            'p99_ms': round(percentile(ordered, 0.99), 1),
+            'mean_rows': round(entry.total_rows / entry.count, 1),
+            'mean_round_trips': round(entry.total_round_trips / entry.count, 1),
+            'mean_wait_ms': round(entry.total_wait_ms / entry.count, 1),
+            'callers': dict(sorted(entry.callers.items(), key=lambda c: c[1], reverse=True)[:3]),
+        })
+    return sorted(rows, key=lambda r: r['total_ms'], reverse=True)
+
+
+class QueryLog:
+    """Singleton per-statement performance log for DatabaseManager.
+
+    Every statement is aggregated in memory by SQL fingerprint (bounded
+    latency samples per fingerprint for p50/p95/p99). Statements slower than
+    ``slow_threshold_ms`` are also appended to a size-rotated JSONL file that
+    the ``report`` CLI reads. The caller is the root span of the current
+    trace, e.g. ``page.fetch:dashboard`` or ``agent.smart_insights``.
+    """
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self, slow_log_path: str = DEFAULT_SLOW_LOG, slow_threshold_ms: float = 500.0,
+                 max_log_bytes: int = 5 * 1024 * 1024, sample_size: int = 1000, recent_size: int = 500):
+        if not hasattr(self, 'initialized'):
+            self.slow_log_path = slow_log_path
+            self.slow_threshold_ms = slow_threshold_ms
+            self.max_log_bytes = max_log_bytes
+            self.sample_size = sample_size
+            self.logger = logging.getLogger(__name__)
+            self._stats: Dict[str, _FingerprintStats] = {}
+            self._recent: Deque[QueryRecord] = deque(maxlen=recent_size)
+            self._statements: Dict[str, str] = {}
+            self._stats_lock = threading.Lock()
+            self._file_lock = threading.Lock()
+            self.initialized = True
+
+    def _fingerprint(self, sql: str) -> Tuple[str, str]:
+        # Normalizing is regex work; remember it per distinct statement text
+        normalized = self._statements.get(sql)
+        if normalized is None:
+            normalized = normalize_sql(sql)
+            if len(self._statements) < 10000:
+                self._statements[sql] = normalized
+        return sql_hash(normalized), normalized
+
+    def record(self, sql: str, operation: str, elapsed_ms: float, rows: int = 0, round_trips: int = 1,
+               wait_ms: float = 0.0, error: Optional[str] = None) -> QueryRecord:
+        key, normalized = self._fingerprint(sql)
+        current = Tracer().current()
+        record = QueryRecord(
+            timestamp=time.time(), fingerprint=key, statement=normalized[:500], operation=operation,
+            elapsed_ms=round(elapsed_ms, 2), wait_ms=round(wait_ms, 2), rows=rows, round_trips=round_trips,
+            caller=(current.root if current else None) or "unattributed", error=error,
+        )
+        with self._stats_lock:
+            entry = self._stats.get(key)
+            if entry is None:
+                entry = self._stats[key] = _FingerprintStats(record.statement, self.sample_size)
+            entry.add(record)
+            self._recent.append(record)
+        if elapsed_ms >= self.slow_threshold_ms:
+            self._append_slow(record)
+        return record
+
+    def _append_slow(self, record: QueryRecord):
+        try:
+            with self._file_lock:
+                os.makedirs(os.path.dirname(self.slow_log_path) or ".", exist_ok=True)
+                if os.path.exists(self.slow_log_path) and os.path.getsize(self.slow_log_path) > self.max_log_bytes:
+                    os.replace(self.slow_log_path, self.slow_log_path + ".1")
+                with open(self.slow_log_path, 'a') as f:
+                    f.write(json.dumps(asdict(record)) + "\n")
+        except OSError as e:
+            self.logger.warning(f"Could not write slow query log: {e}")
+
+    def report(self) -> List[Dict[str, Any]]:
+        """Aggregates for every statement seen in this process, heaviest first"""
+        with self._stats_lock:
+            return _report(self._stats)
+
+    def recent(self, n: int = 50) -> List[QueryRecord]:
+        with self._stats_lock:
+            return list(self._recent)[-n:]
+
+    def by_caller(self) -> List[Dict[str, Any]]:
+        """Total statement time per caller, to see which page or agent method loads the DB"""
+        totals: Dict[str, Dict[str, float]] = defaultdict(lambda: {'count': 0, 'total_ms': 0.0})
+        with self._stats_lock:
+            for entry in self._stats.values():
+                mean = entry.total_ms / entry.count
+                for caller, count in entry.callers.items():
+                    totals[caller]['count'] += count
+                    totals[caller]['total_ms'] += count * mean
+        return sorted(({'caller': c, 'count': int(t['count']), 'total_ms': round(t['total_ms'], 1)}
+                       for c, t in totals.items()), key=lambda r: r['total_ms'], reverse=True)
+
+    def reset(self):
+        with self._stats_lock:
+            self._stats.clear()
+            self._recent.clear()
+
+
+def read_slow_log(path: str = DEFAULT_SLOW_LOG) -> List[Dict[str, Any]]:
+    records = []
+    for candidate in (path + ".1", path):
+        if os.path.exists(candidate):
+            with open(candidate) as f:
+                records.extend(json.loads(line) for line in f if line.strip())
+    return records
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(prog="python -m diagnostics.query_log",
+                                     description="Slow query report from the rolling slow-query log")
+    sub = parser.add_subparsers(dest="command", required=True)
+    # Only statements over the slow threshold reach the file, so these percentiles describe the slow tail;
+    # QueryLog().report() in the running process has them over every execution
+    report = sub.add_parser("report", help="p50/p95/p99 per SQL fingerprint, over slow executions only")
+    report.add_argument("--log", default=DEFAULT_SLOW_LOG)
+    report.add_argument("--top", type=int, default=20)
+    report.add_argument("--caller", help="only statements issued under this caller")
+    report.add_argument("--json", action="store_true", help="print raw JSON")
+    args = parser.parse_args(argv)
+
+    records = read_slow_log(args.log)
+    if args.caller:
+        records = [r for r in records if r.get('caller') == args.caller]
+    rows = aggregate(records)[:args.top]
+    if args.json:
+        print(json.dumps({'scope': 'slow executions only', 'fingerprints': rows}, indent=2))
+        return
+    if not rows:
+        print(f"No slow queries logged in {args.log}")
+        return
+    print("Slow executions only: counts and percentiles cover statements logged at or above the slow\n"
+          "threshold, not all executions (see the Diagnostics page for every statement).\n")
+    print(f"{'slow n':>6} {'slow p50':>9} {'slow p95':>9} {'slow p99':>9} {'rows':>8} {'trips':>6}  "
+          f"caller / statement")
+    for row in rows:
+        caller = next(iter(row['callers']), "")
+        print(f"{row['count']:>6} {row['p50_ms']:>9.1f} {row['p95_ms']:>9.1f} {row['p99_ms']:>9.1f} "
+              f"{row['mean_rows']:>8.0f} {row['mean_round_trips']:>6.1f}  {caller}")
+        print(f"{'':>52}{row['statement'][:120]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+# diagnostics/tracing.py
+import contextvars
+import functools
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+
+
+def sql_hash(sql: str) -> str:
+    """Short stable hash of a statement's text, for grouping spans without logging SQL"""
+    return hashlib.sha1(" ".join(sql.split()).encode()).hexdigest()[:12]
+
+
+def span_label(name: str, attributes: Dict[str, Any]) -> str:
+    for key in ('page', 'feature'):
+        if attributes.get(key):
+            return f"{name}:{attributes[key]}"
+    return name
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token) when the API reports none"""
+    return max(1, len(text) // 4)
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    start_us: int
+    thread_id: int
+    thread_name: str
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    duration_us: Optional[int] = None
+    error: Optional[str] = None
+    # Label of the trace's root span (e.g. "page.fetch:dashboard"), for attributing work
+    root: Optional[str] = None
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.duration_us or 0) / 1000.0
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+
+class Tracer:
+    """Singleton, in-process tracer built on context variables.
+
+    ``span(name, **attrs)`` nests under whatever span is current in this
+    context. Worker threads do not inherit context by themselves; submit work
+    through ``bind`` to keep a worker's spans under the caller's trace.
+    Finished spans go into a bounded ring buffer and can be written out in
+    Chrome trace-event JSON (chrome://tracing, Perfetto).
+    """
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self, max_spans: int = 10000):
+        if not hasattr(self, 'initialized'):
+            self.logger = logging.getLogger(__name__)
+            self.enabled = True
+            self._spans: deque = deque(maxlen=max_spans)
+            self._listeners: List[Callable[[Span], None]] = []
+            self._buffer_lock = threading.Lock()
+            # Wall-clock anchor so perf_counter timestamps line up across exports
+            self._epoch_us = int(time.time() * 1e6) - int(time.perf_counter() * 1e6)
+            self.initialized = True
+
+    def now_us(self) -> int:
+        return self._epoch_us + int(time.perf_counter() * 1e6)
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        if not self.enabled:
+            yield Span(name, "", "", None, 0, 0, "", attributes)
+            return
+        parent = _current_span.get()
+        thread = threading.current_thread()
+        span = Span(
+            name=name,
+            trace_id=parent.trace_id if parent else uuid.uuid4().hex[:16],
+            span_id=uuid.uuid4().hex[:16],
+            parent_id=parent.span_id if parent else None,
+            start_us=self.now_us(),
+            thread_id=thread.ident or 0,
+            thread_name=thread.name,
+            attributes=dict(attributes),
+            root=parent.root if parent else span_label(name, attributes),
+        )
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current_span.reset(token)
+            span.duration_us = self.now_us() - span.start_us
+            self._finish(span)
+
+    def record(self, name: str, start_us: int, duration_us: int, **attributes) -> Span:
+        """Add an already-timed span under the current one.
+
+        For work that cannot hold a context-manager span open, such as a
+        generator whose body runs across the caller's ``yield`` points.
+        """
+        parent = _current_span.get()
+        thread = threading.current_thread()
+        span = Span(name, parent.trace_id if parent else uuid.uuid4().hex[:16], uuid.uuid4().hex[:16],
+                    parent.span_id if parent else None, start_us, thread.ident or 0, thread.name,
+                    dict(attributes), duration_us,
+                    root=parent.root if parent else span_label(name, attributes))
+        if self.enabled:
+            self._finish(span)
+        return span
+
+    def _finish(self, span: Span):
+        with self._buffer_lock:
+            self._spans.append(span)
+        for listener in list(self._listeners):
+            try:
+                listener(span)
+            except Exception as e:
+                self.logger.debug(f"Span listener failed: {e}")
+
+    def current(self) -> Optional[Span]:
+        return _current_span.get()
+
+    def add_listener(self, listener: Callable[[Span], None]):
+        """Call ``listener`` with every finished span (on the finishing thread)"""
+        self._listeners.append(listener)
+
+    @staticmethod
+    def bind(fn: Callable) -> Callable:
+        """Wrap ``fn`` to run in a copy of the caller's context (for executor submits)"""
+        context = contextvars.copy_context()
+
+        @functools.wraps(fn)
+        def run(*args, **kwargs):
+            # A context can only be entered by one thread at a time, so copy per call
+            return context.copy().run(fn, *args, **kwargs)
+        return run
+
+    def spans(self, trace_id: Optional[str] = None) -> List[Span]:
+        with self._buffer_lock:
+            spans = list(self._spans)
+        return [s for s in spans if trace_id is None or s.trace_id == trace_id]
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """Count, mean, p95 and max duration per span name, slowest total first"""
+        by_name: Dict[str, List[float]] = {}
+        for span in self.spans():
+            by_name.setdefault(span.name, []).append(span.duration_ms)
+        rows = []
+        for name, durations in by_name.items():
+            durations.sort()
+            rows.append({
+                'name': name,
+                'count': len(durations),
+                'total_ms': round(sum(durations), 1),
+                'mean_ms': round(sum(durations) / len(durations), 1),
+                'p95_ms': round(durations[min(len(durations) - 1, int(0.95 * len(durations)))], 1),
+                'max_ms': round(durations[-1], 1),
+            })
+        return sorted(rows, key=lambda r: r['total_ms'], reverse=True)
+
+    def clear(self):
+        with self._buffer_lock:
+            self._spans.clear()
+
+    def to_chrome_trace(self, spans: Optional[List[Span]] = None) -> Dict[str, Any]:
+        """Spans as Chrome trace-event JSON ("X" complete events, microsecond timestamps)"""
+        pid = os.getpid()
+        events = []
+        threads = {}
+        for span in spans if spans is not None else self.spans():
+            threads[span.thread_id] = span.thread_name
+            args = dict(span.attributes, trace_id=span.trace_id, span_id=span.span_id,
+                        parent_id=span.parent_id)
+            if span.error:
+                args['error'] = span.error
+            events.append({
+                'name': span.name, 'cat': span.name.split('.')[0], 'ph': 'X',
+                'ts': span.start_us, 'dur': span.duration_us or 0,
+                'pid': pid, 'tid': span.thread_id, 'args': args,
+            })
+        for tid, thread_name in threads.items():
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid,
+                           'args': {'name': thread_name}})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def export(self, path: Optional[str] = None) -> str:
+        """Write buffered spans as a Chrome trace file and return its path"""
+        path = path or os.path.join("traces", f"trace-{time.strftime('%Y%m%d-%H%M%S')}.json")
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(self.to_chrome_trace(), f, default=str)
+        self.logger.info(f"Exported trace to {path}")
+        return path
+
+
+def traced(name: str, **attributes):
+    """Decorator form of Tracer().span"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with Tracer().span(name, **attributes):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
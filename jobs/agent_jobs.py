@@ -0,0 +1,78 @@
+# jobs/agent_jobs.py
+from typing import Any, Dict
+
+from jobs.job_queue import JobContext, JobQueue
+
+
+class AgentJobError(RuntimeError):
+    """An agent operation reported an error instead of a result"""
+
+
+_PROSE_ERRORS = ("Error processing file:", "Unable to process file")
+
+
+def _checked(result: Any) -> Any:
+    # Agent methods report failures as {'error': ...} or an error sentence rather than raising
+    if isinstance(result, dict) and 'error' in result:
+        raise AgentJobError(result['error'])
+    if isinstance(result, str) and result.startswith(_PROSE_ERRORS):
+        raise AgentJobError(result)
+    return result
+
+
+def register_agent_jobs(queue: JobQueue, agent) -> JobQueue:
+    """Register the heavy FinancialAIAgent operations as resumable job kinds"""
+
+    def variance_periods(params: Dict[str, Any], context: JobContext):
+        # One unit of work per period; finished periods are checkpointed and skipped on resume
+        done = dict(context.checkpoint or {})
+        periods = params['periods']
+        for i, period in enumerate(periods):
+            if period in done:
+                continue
+            context.progress(i / len(periods), f"Period {period}")
+            done[period] = _checked(agent.analyze_variances(params['actual_table'], params['budget_table'], period))
+            context.save_checkpoint(done)
+        return done
+
+    def variance_batch(params: Dict[str, Any], context: JobContext):
+        context.progress(0.0, "Fetching variances")
+        return _checked(agent.analyze_variances_batch(
+            params['actual_table'], params['budget_table'], params['periods'],
+            entity_column=params.get('entity_column'), entities=params.get('entities'),
+            top_n=params.get('top_n', 5)))
+
+    def consolidation(params: Dict[str, Any], context: JobContext):
+        received = []
+
+        def on_entry(entry):
+            received.append(entry)
+            context.progress(0.5, f"{len(received)} entries received")
+
+        context.progress(0.0, "Generating entries")
+        return agent.generate_consolidation_entries(
+            params['subsidiary_data'], params['parent_company'],
+            reporting_currency=params.get('reporting_currency'), period_date=params.get('period_date'),
+            on_entry=on_entry)
+
+    def anomalies(params: Dict[str, Any], context: JobContext):
+        context.progress(0.0, "Scoring periods")
+        return _checked(agent.detect_anomalies(max_rows=params.get('max_rows', 5000000),
+                                               explain=params.get('explain', True),
+                                               top_n=params.get('top_n', 25)))
+
+    def chat(params: Dict[str, Any], context: JobContext):
+        context.progress(0.0, "Waiting for the model")
+        return agent.chat(params['prompt'], message=params.get('message', ''))
+
+    def process_file(params: Dict[str, Any], context: JobContext):
+        context.progress(0.0, "Analyzing document")
+        return _checked(agent.process_uploaded_file(params['file_content'], params.get('file_type', 'text')))
+
+    queue.register('variance_periods', variance_periods)
+    queue.register('variance_batch', variance_batch)
+    queue.register('consolidation', consolidation)
+    queue.register('detect_anomalies', anomalies)
+    queue.register('chat', chat)
+    queue.register('process_file', process_file)
+    return queue
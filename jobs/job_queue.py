@@ -0,0 +1,382 @@
+# jobs/job_queue.py
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from diagnostics.tracing import Tracer
+
+DEFAULT_DB_PATH = os.path.join("data", "jobs.sqlite")
+
+QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED = 'queued', 'running', 'succeeded', 'failed', 'cancelled'
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+# Processes sharing the queue file refresh their running jobs' heartbeat this often;
+# a running job whose heartbeat is older than HEARTBEAT_STALE_S lost its owner
+HEARTBEAT_S = 10.0
+HEARTBEAT_STALE_S = 60.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    params TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    message TEXT,
+    checkpoint TEXT,
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    owner_pid INTEGER,
+    heartbeat_at REAL
+);
+CREATE INDEX IF NOT EXISTS ix_jobs_claim ON jobs (status, priority DESC, id);
+"""
+
+
+# BaseException subclasses: they are raised from callbacks deep inside agent calls, whose
+# ``except Exception`` handlers would otherwise turn them into an empty "successful" result
+
+
+class JobCancelled(BaseException):
+    """Raised inside a handler when its job was cancelled"""
+
+
+class JobInterrupted(BaseException):
+    """Raised inside a handler when the queue shuts down; the job resumes on next start"""
+
+
+@dataclass
+class Job:
+    id: int
+    kind: str
+    params: Dict[str, Any]
+    priority: int
+    status: str
+    progress: float
+    message: Optional[str]
+    checkpoint: Any
+    result: Any
+    error: Optional[str]
+    attempts: int
+    created_at: float
+    started_at: Optional[float]
+    finished_at: Optional[float]
+
+    @property
+    def elapsed_s(self) -> Optional[float]:
+        if self.started_at is None:
+            return None
+        return round((self.finished_at or time.time()) - self.started_at, 1)
+
+
+def _loads(text: Optional[str]) -> Any:
+    return None if text is None else json.loads(text)
+
+
+def _job(row: sqlite3.Row) -> Job:
+    return Job(
+        id=row['id'], kind=row['kind'], params=json.loads(row['params']), priority=row['priority'],
+        status=row['status'], progress=row['progress'], message=row['message'],
+        checkpoint=_loads(row['checkpoint']), result=_loads(row['result']), error=row['error'],
+        attempts=row['attempts'], created_at=row['created_at'], started_at=row['started_at'],
+        finished_at=row['finished_at'],
+    )
+
+
+class JobContext:
+    """Handed to a job handler: progress reporting, cancellation checks and checkpoints.
+
+    Handlers should call ``check()`` (or ``progress``) between units of work
+    and ``save_checkpoint`` after each one; an interrupted job restarts with
+    ``checkpoint`` set to the last saved state.
+    """
+
+    def __init__(self, queue: "JobQueue", job: Job):
+        self.queue = queue
+        self.job_id = job.id
+        self.params = job.params
+        self.checkpoint = job.checkpoint
+
+    def check(self):
+        if self.queue._stopping.is_set():
+            raise JobInterrupted()
+        if self.queue._cancel_requested(self.job_id):
+            raise JobCancelled()
+
+    def progress(self, fraction: float, message: Optional[str] = None):
+        self.check()
+        fields = {'progress': max(0.0, min(1.0, fraction))}
+        if message is not None:
+            fields['message'] = message
+        self.queue._update(self.job_id, **fields)
+
+    def save_checkpoint(self, state: Any):
+        self.checkpoint = state
+        self.queue._update(self.job_id, checkpoint=json.dumps(state, default=str))
+
+
+class JobQueue:
+    """Singleton SQLite-backed job queue with a pool of worker threads.
+
+    Jobs are claimed highest priority first (then oldest). Results,
+    progress and checkpoints are stored as JSON, so finished results survive
+    restarts. Several processes (the app and the batch CLI) may share the
+    file: claims are atomic, each process heartbeats the jobs it runs, and
+    only running jobs whose owner stopped heartbeating are requeued. A worker
+    only claims kinds that have a registered handler, so jobs can be queued
+    before their handler exists.
+    """
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, retention_days: int = 30):
+        if not hasattr(self, 'initialized'):
+            self.db_path = db_path
+            self.retention_days = retention_days
+            self.logger = logging.getLogger(__name__)
+            self.tracer = Tracer()
+            self._handlers: Dict[str, Callable[[Dict[str, Any], JobContext], Any]] = {}
+            self._listeners: List[Callable[[Job], None]] = []
+            self._conn: Optional[sqlite3.Connection] = None
+            self._db_lock = threading.Lock()
+            self._wakeup = threading.Condition()
+            self._stopping = threading.Event()
+            self._workers: List[threading.Thread] = []
+            self.initialized = True
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            # Queue files created before jobs had an owner
+            columns = {row['name'] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for column, kind in (('owner_pid', 'INTEGER'), ('heartbeat_at', 'REAL')):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+            conn.execute("DELETE FROM jobs WHERE status IN (?, ?, ?) AND finished_at < ?",
+                         (*FINISHED, time.time() - self.retention_days * 86400))
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _execute(self, sql: str, params=()) -> List[sqlite3.Row]:
+        with self._db_lock:
+            conn = self._connection()
+            rows = conn.execute(sql, params).fetchall()
+            conn.commit()
+            return rows
+
+    # --- Handlers and listeners ---
+
+    def register(self, kind: str, handler: Callable[[Dict[str, Any], JobContext], Any]):
+        """Register ``handler(params, context) -> JSON-serializable result`` for a job kind"""
+        self._handlers[kind] = handler
+        with self._wakeup:
+            self._wakeup.notify_all()
+
+    def add_listener(self, callback: Callable[[Job], None]):
+        """Call ``callback(job)`` on every status or progress change (from worker threads)"""
+        self._listeners.append(callback)
+
+    def _notify(self, job_id: int):
+        if not self._listeners:
+            return
+        job = self.get(job_id)
+        for callback in self._listeners:
+            try:
+                callback(job)
+            except Exception as e:
+                self.logger.warning(f"Job listener failed: {e}")
+
+    # --- Public API ---
+
+    def submit(self, kind: str, params: Optional[Dict[str, Any]] = None, priority: int = 0) -> int:
+        """Queue a job; returns its id"""
+        with self._db_lock:
+            conn = self._connection()
+            cursor = conn.execute(
+                "INSERT INTO jobs (kind, params, priority, status, created_at) VALUES (?, ?, ?, ?, ?)",
+                (kind, json.dumps(params or {}, default=str), priority, QUEUED, time.time()))
+            conn.commit()
+            job_id = cursor.lastrowid
+        self._notify(job_id)
+        with self._wakeup:
+            self._wakeup.notify()
+        return job_id
+
+    def get(self, job_id: int) -> Optional[Job]:
+        rows = self._execute("SELECT * FROM jobs WHERE id = ?", (job_id,))
+        return _job(rows[0]) if rows else None
+
+    def jobs(self, status: Optional[str] = None, limit: int = 50) -> List[Job]:
+        """Most recent jobs first, optionally filtered by status"""
+        if status:
+            rows = self._execute("SELECT * FROM jobs WHERE status = ? ORDER BY id DESC LIMIT ?", (status, limit))
+        else:
+            rows = self._execute("SELECT * FROM jobs ORDER BY id DESC LIMIT ?", (limit,))
+        return [_job(row) for row in rows]
+
+    def cancel(self, job_id: int) -> bool:
+        """Cancel a queued job now, or ask a running one to stop at its next check"""
+        with self._db_lock:
+            conn = self._connection()
+            cancelled = conn.execute("UPDATE jobs SET status = ?, finished_at = ? WHERE id = ? AND status = ?",
+                                     (CANCELLED, time.time(), job_id, QUEUED)).rowcount
+            requested = conn.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = ?",
+                                     (job_id, RUNNING)).rowcount
+            conn.commit()
+        self._notify(job_id)
+        return bool(cancelled or requested)
+
+    def wait(self, job_id: int, timeout: Optional[float] = None, poll_s: float = 0.2) -> Job:
+        """Block until the job finishes (or ``timeout`` passes); returns its latest state"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            job = self.get(job_id)
+            if job is None or job.status in FINISHED or (deadline is not None and time.monotonic() >= deadline):
+                return job
+            time.sleep(poll_s)
+
+    # --- Workers ---
+
+    def start(self, workers: int = 2):
+        """Requeue jobs orphaned by a stopped process and start the worker and heartbeat threads"""
+        if self._workers:
+            return
+        self._stopping.clear()
+        self._recover()
+        for i in range(workers):
+            worker = threading.Thread(target=self._work, daemon=True, name=f"job-worker-{i}")
+            worker.start()
+            self._workers.append(worker)
+        heartbeat = threading.Thread(target=self._heartbeat, daemon=True, name="job-heartbeat")
+        heartbeat.start()
+        self._workers.append(heartbeat)
+
+    def _recover(self):
+        """Requeue running jobs whose owner stopped heartbeating; cancel those with a pending cancel"""
+        stale = time.time() - HEARTBEAT_STALE_S
+        orphaned = "status = ? AND owner_pid IS NOT ? AND (heartbeat_at IS NULL OR heartbeat_at < ?)"
+        with self._db_lock:
+            conn = self._connection()
+            # Jobs whose cancel was requested before their owner stopped finish as cancelled instead of rerunning
+            conn.execute(f"UPDATE jobs SET status = ?, finished_at = ? WHERE {orphaned} AND cancel_requested = 1",
+                         (CANCELLED, time.time(), RUNNING, os.getpid(), stale))
+            requeued = conn.execute(f"UPDATE jobs SET status = ?, owner_pid = NULL WHERE {orphaned}",
+                                    (QUEUED, RUNNING, os.getpid(), stale)).rowcount
+            conn.commit()
+        if requeued:
+            self.logger.info(f"Requeued {requeued} job(s) left running by a stopped process")
+            with self._wakeup:
+                self._wakeup.notify_all()
+
+    def _heartbeat(self):
+        while not self._stopping.wait(HEARTBEAT_S):
+            try:
+                self._execute("UPDATE jobs SET heartbeat_at = ? WHERE status = ? AND owner_pid = ?",
+                              (time.time(), RUNNING, os.getpid()))
+                self._recover()
+            except sqlite3.Error as e:
+                self.logger.warning(f"Job heartbeat failed: {e}")
+
+    def shutdown(self, timeout: float = 5.0):
+        """Stop the workers; running jobs stop at their next check and resume on the next start"""
+        self._stopping.set()
+        with self._wakeup:
+            self._wakeup.notify_all()
+        deadline = time.monotonic() + timeout
+        for worker in self._workers:
+            worker.join(max(0.0, deadline - time.monotonic()))
+        self._workers = []
+
+    def _claim(self) -> Optional[Job]:
+        kinds = list(self._handlers)
+        if not kinds:
+            return None
+        marks = ", ".join("?" * len(kinds))
+        with self._db_lock:
+            conn = self._connection()
+            while True:
+                row = conn.execute(f"SELECT id FROM jobs WHERE status = ? AND kind IN ({marks}) "
+                                   f"ORDER BY priority DESC, id LIMIT 1", (QUEUED, *kinds)).fetchone()
+                if row is None:
+                    conn.commit()
+                    return None
+                # Another process may claim the same row between the SELECT and the UPDATE
+                now = time.time()
+                claimed = conn.execute(
+                    "UPDATE jobs SET status = ?, started_at = COALESCE(started_at, ?), attempts = attempts + 1, "
+                    "owner_pid = ?, heartbeat_at = ? WHERE id = ? AND status = ?",
+                    (RUNNING, now, os.getpid(), now, row['id'], QUEUED)).rowcount
+                conn.commit()
+                if claimed:
+                    return _job(conn.execute("SELECT * FROM jobs WHERE id = ?", (row['id'],)).fetchone())
+
+    def _work(self):
+        while not self._stopping.is_set():
+            job = self._claim()
+            if job is None:
+                with self._wakeup:
+                    self._wakeup.wait(1.0)
+                continue
+            self._notify(job.id)
+            self._run(job)
+
+    def _run(self, job: Job):
+        context = JobContext(self, job)
+        with self.tracer.span(f"job.{job.kind}", job_id=job.id, attempt=job.attempts) as span:
+            try:
+                result = self._handlers[job.kind](job.params, context)
+                self._finish(job.id, SUCCEEDED, result=json.dumps(result, default=str), progress=1.0)
+            except JobInterrupted:
+                span.set(interrupted=True)
+                self._update(job.id, status=QUEUED)
+            except JobCancelled:
+                self._finish(job.id, CANCELLED)
+            except Exception as e:
+                self.logger.error(f"Job {job.id} ({job.kind}) failed: {e}")
+                self._finish(job.id, FAILED, error=f"{type(e).__name__}: {e}")
+        self._notify(job.id)
+
+    def _finish(self, job_id: int, status: str, **fields):
+        self._update(job_id, status=status, finished_at=time.time(), **fields)
+
+    def _update(self, job_id: int, **fields):
+        if not fields:
+            return
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        self._execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+        if 'progress' in fields:
+            self._notify(job_id)
+
+    def _cancel_requested(self, job_id: int) -> bool:
+        rows = self._execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,))
+        return bool(rows and rows[0]['cancel_requested'])
+
+    def close(self):
+        self.shutdown()
+        with self._db_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
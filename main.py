@@ -13,29 +13,46 @@ from PySide6.QtGui import QFont
 from pages.ai_assistant_page import AIAssistantPage
 from pages.dashboard_page import DashboardPage
 from pages.analytics_page import AnalyticsPage
-from database.db_manager import DatabaseManager, DatabaseConfig
+from pages.diagnostics_page import DiagnosticsPage
+from database.db_manager import DatabaseManager
 from ai.financial_agent import FinancialAIAgent
 from config.config_manager import ConfigManager
 from ui.base_window import BaseWindow
+from ui.bootstrap import StartupBootstrap
+from ui.refresh_scheduler import RefreshScheduler
+from diagnostics.tracing import Tracer
+from jobs.job_queue import JobQueue
+from jobs.agent_jobs import register_agent_jobs
+from service.client import ServiceClient, RemoteDatabaseManager
 
 
 class MainApplication(BaseWindow):
     def __init__(self):
         super().__init__()
         self.config_manager = ConfigManager()
-        self.db_manager = DatabaseManager()
+        app_config = self.config_manager.get_config()
+        service_url = app_config.service_url
+        # With a shared service, this window opens no Oracle sessions or model clients of its own
+        self.service_client = ServiceClient(service_url, app_config.service_token) if service_url else None
+        self.db_manager = RemoteDatabaseManager(self.service_client) if service_url else DatabaseManager()
         self.ai_agent: Optional[FinancialAIAgent] = None
+        self.job_queue = JobQueue()
+        self._db_error_shown = False
 
         self.setup_logging()
+        self.setup_bootstrap()
         self.setup_pages()
-        self.setup_database()
-        self.setup_ai_agent()
         self.setup_navigation()
 
         self.connection_timer = QTimer()
         self.connection_timer.timeout.connect(self.check_database_connection)
         self.connection_timer.start(30000)
 
+        # Connect DB and AI once the event loop is running so the window shows first
+        QTimer.singleShot(0, self.bootstrap.start)
+        # Jobs left over from the last session resume once their handlers are registered
+        self.job_queue.start(workers=2)
+
     def setup_logging(self):
         config = self.config_manager.get_config()
         logging.basicConfig(
@@ -46,41 +63,40 @@ class MainApplication(BaseWindow):
         self.logger = logging.getLogger(__name__)
 
     def setup_pages(self):
+        config = self.config_manager.get_config()
+        self.refresh_scheduler = RefreshScheduler(
+            interval_seconds=config.refresh_interval_seconds,
+            idle_seconds=config.prefetch_idle_seconds
+        )
+        self.content_changed.connect(self.refresh_scheduler.on_content_changed)
+        self.bootstrap.database_ready.connect(self.refresh_scheduler.set_enabled)
+
         self.dashboard_page = DashboardPage(self)
         self.ai_assistant_page = AIAssistantPage(self)
         self.analytics_page = AnalyticsPage(self)
+        self.diagnostics_page = DiagnosticsPage(self)
+        self.refresh_scheduler.register('dashboard', self.dashboard_page)
+        self.refresh_scheduler.register('analytics', self.analytics_page)
         self.set_main_content(self.dashboard_page)
         self.set_active_page('dashboard')
 
-    def setup_database(self):
-        try:
-            config = self.config_manager.get_config()
-            db_config = DatabaseConfig(
-                host=config.database.host,
-                port=config.database.port,
-                service_name=config.database.service_name,
-                username=config.database.username,
-                password=config.database.password
-            )
-            success = self.db_manager.configure(db_config, pool_size=10)
-            self.update_connection_status(success)
-            if success:
-                self.logger.info("Database connection established successfully")
-            else:
-                self.logger.error("Database connection failed")
-                self.show_database_error()
-        except Exception as e:
-            self.logger.error(f"DB setup error: {e}")
+    def setup_bootstrap(self):
+        self.bootstrap = StartupBootstrap(self.config_manager, self.db_manager, pool_size=10,
+                                          service_client=self.service_client)
+        self.bootstrap.database_ready.connect(self.on_database_ready)
+        self.bootstrap.ai_agent_ready.connect(self.on_ai_agent_ready)
+        self.bootstrap.status_changed.connect(self.update_status)
+
+    def on_database_ready(self, success: bool):
+        self.update_connection_status(success)
+        if not success and not self._db_error_shown:
+            self._db_error_shown = True
             self.show_database_error()
 
-    def setup_ai_agent(self):
-        try:
-            config = self.config_manager.get_config()
-            if config.ai.gemini_api_key:
-                self.ai_agent = FinancialAIAgent(config.ai.gemini_api_key)
-                self.logger.info("AI Agent initialized successfully")
-        except Exception as e:
-            self.logger.error(f"AI setup error: {e}")
+    def on_ai_agent_ready(self, success: bool):
+        self.ai_agent = self.bootstrap.ai_agent
+        if self.ai_agent is not None:
+            register_agent_jobs(self.job_queue, self.ai_agent)
 
     def setup_navigation(self): 
         self.navigate_to_dashboard.connect(lambda: self.navigate("dashboard"))
@@ -90,12 +106,14 @@ class MainApplication(BaseWindow):
         self.navigate_to_reports.connect(lambda: self.navigate("reports"))
         self.navigate_to_company_setup.connect(lambda: self.navigate("company_setup"))
         self.navigate_to_settings.connect(lambda: self.show_message("Settings page not implemented"))
+        self.navigate_to_diagnostics.connect(lambda: self.navigate("diagnostics"))
 
     def navigate(self, page_name: str):
         page_map = {
             'dashboard': self.dashboard_page,
             'ai_assistant': self.ai_assistant_page,
             'analytics': self.analytics_page,
+            'diagnostics': self.diagnostics_page,
         }
         page = page_map.get(page_name)
         if page:
@@ -109,6 +127,11 @@ class MainApplication(BaseWindow):
         box.exec()
 
     def check_database_connection(self):
+        if not self.bootstrap.is_database_ready:
+            # Initial connect failed or is still running; retry in the background
+            self.bootstrap.start_database()
+            return
+
         def check():
             is_connected = self.db_manager.test_connection()
             self.update_connection_status(is_connected)
@@ -121,10 +144,24 @@ class MainApplication(BaseWindow):
             self.current_page.update_db_status(is_connected)
 
     def show_database_error(self):
-        QMessageBox.critical(self, "DB Error", "Failed to connect to Oracle DB.")
+        # Non-modal so the rest of the UI stays usable while reconnecting
+        box = QMessageBox(QMessageBox.Critical, "DB Error",
+                          "Failed to connect to Oracle DB. Retrying in the background.", parent=self)
+        box.setModal(False)
+        box.show()
+
+    def closeEvent(self, event):
+        self.refresh_scheduler.shutdown()
+        # Running jobs stop at their next checkpoint and resume on the next start
+        self.job_queue.shutdown()
+        if Tracer().spans():
+            # Keep the session's trace for offline inspection
+            Tracer().export()
+        super().closeEvent(event)
 
     def get_database_manager(self): return self.db_manager
     def get_ai_agent(self): return self.ai_agent
+    def get_job_queue(self): return self.job_queue
 
 def main():
     app = QApplication(sys.argv)
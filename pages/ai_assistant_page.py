@@ -1,21 +1,41 @@
 from PySide6.QtWidgets import QWidget, QMessageBox, QFileDialog, QVBoxLayout, QLabel, QTextEdit, QPushButton, QHBoxLayout, QFrame
-from PySide6.QtCore import Qt, QSize, QEvent
+from PySide6.QtCore import Qt, QSize, QEvent, Signal
 from PySide6.QtGui import QPixmap, QFont, QIcon
+import os
 import threading
-import google.generativeai as genai
-genai.configure(api_key="YOUR_API_KEY")
+from diagnostics.tracing import Tracer
+from ai.model_router import ModelRouter
+from ai.tabular_extraction import extract_from_file, to_html, commentary_context
+from ai.data_profiler import to_prompt
+from jobs.job_queue import QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED
 
-
-model = genai.GenerativeModel("gemini-2.5-flash")
+# Job kinds whose results this page renders into the conversation
+CHAT_JOB_KINDS = ('chat', 'process_file')
 
 class AIAssistantPage(QWidget):
+    # Queue listeners run on worker threads; results are rendered on the GUI thread
+    job_changed = Signal(object)
+
     def __init__(self, main_window):
         super().__init__()
         self.main_window = main_window
         self.ai_agent = main_window.get_ai_agent()
+        self.job_queue = main_window.get_job_queue()
         self.uploaded_file_content = ""
+        self.extracted_tables = []
 
         self.init_ui()
+        main_window.bootstrap.subscribe_ai_agent(self.on_ai_agent_ready)
+
+        # Replies still pending from the last session are shown once their jobs finish
+        self.pending_jobs = {job.id for status in (QUEUED, RUNNING)
+                             for job in self.job_queue.jobs(status=status, limit=100)
+                             if job.kind in CHAT_JOB_KINDS}
+        self.job_changed.connect(self.on_job_changed)
+        self.job_queue.add_listener(self.job_changed.emit)
+
+    def on_ai_agent_ready(self, success: bool):
+        self.ai_agent = self.main_window.get_ai_agent()
 
     def init_ui(self):
         layout = QVBoxLayout()
@@ -408,31 +428,68 @@ class AIAssistantPage(QWidget):
             self.chat_display.append(f"<b style='color:#03a9f4;'>You:</b> {message}")
             self.textbox.clear()
 
-            # If file content exists, send it with the message
-            if self.uploaded_file_content:
+            # Tables were already extracted and rendered locally: send only their summary
+            if self.extracted_tables:
+                summary = to_prompt([commentary_context(table) for table in self.extracted_tables])
+                full_prompt = f"{message}\n\n[Uploaded Table Summary:]\n{summary}"
+            elif self.uploaded_file_content:
                 full_prompt = f"{message}\n\n[Uploaded File Content Below:]\n{self.uploaded_file_content}"
             else:
                 full_prompt = message
 
-            threading.Thread(target=self.get_ai_response, args=(full_prompt,), daemon=True).start()
-
-    def get_ai_response(self, message):
-        try:
-            # Wrap user message with a prompt to simplify the language
-            simple_prompt = (
+            tabulated = bool(self.extracted_tables)
+            if self.ai_agent is not None:
+                # Queued and persisted: the reply survives closing the app mid-request
+                self.submit_job('chat', {'prompt': self.chat_prompt(full_prompt, tabulated), 'message': full_prompt})
+            else:
+                threading.Thread(target=self.get_ai_response, args=(full_prompt, tabulated), daemon=True).start()
+
+    def submit_job(self, kind, params):
+        self.pending_jobs.add(self.job_queue.submit(kind, params, priority=1))
+
+    def on_job_changed(self, job):
+        if job is None or job.id not in self.pending_jobs or job.status in (QUEUED, RUNNING):
+            return
+        self.pending_jobs.discard(job.id)
+        if job.status == SUCCEEDED and job.result:
+            self.chat_display.append(f"<b style='color:#00c853;'>AI:</b> {job.result}")
+        elif job.status == FAILED:
+            self.chat_display.append(f"<span style='color:red;'>[Error: {job.error}]</span>")
+        elif job.status == CANCELLED:
+            self.chat_display.append("<span style='color:#777777;'>[Request cancelled]</span>")
+
+    def chat_prompt(self, message, tabulated=False):
+        if tabulated:
+            return (
                 "You are a financial AI assistant.\n"
-                "And if the user attach a excel file then make a table of it.\n"
-                "Summarize the data.\n"
-                "If the user's input contains financial entries or accounting balances, convert it into a clean, structured table with relevant columns like Account Code, Account Name, Account Type, Debit, Credit, Currency, Month, Year, etc.\n"
-                "Always try to guess appropriate headers based on data and explain the table briefly.\n"
-                "If no table is possible, just respond normally in simple sentences.\n\n"
+                "The user's uploaded table is already shown to them; do not reproduce it.\n"
+                "Using the table summary (column roles, totals, largest items, outliers), answer the user's "
+                "question and give brief commentary: balance check, notable accounts and anything unusual.\n"
+                "Respond in simple sentences.\n\n"
                 f"User's input:\n{message}"
             )
+        # Wrap user message with a prompt to simplify the language
+        return (
+            "You are a financial AI assistant.\n"
+            "And if the user attach a excel file then make a table of it.\n"
+            "Summarize the data.\n"
+            "If the user's input contains financial entries or accounting balances, convert it into a clean, structured table with relevant columns like Account Code, Account Name, Account Type, Debit, Credit, Currency, Month, Year, etc.\n"
+            "Always try to guess appropriate headers based on data and explain the table briefly.\n"
+            "If no table is possible, just respond normally in simple sentences.\n\n"
+            f"User's input:\n{message}"
+        )
+
+    def get_ai_response(self, message, tabulated=False):
+        with Tracer().span("chat.response", message_chars=len(message), tabulated=tabulated):
+            self._get_ai_response(message, tabulated)
 
-            response = model.generate_content(simple_prompt)
+    def _get_ai_response(self, message, tabulated=False):
+        try:
+            response = ModelRouter().generate(self.chat_prompt(message, tabulated), "chat", task="chat",
+                                              message=message)
+            plain_text = response.text.strip() if response.text else ""
 
-            if response.text:
-                plain_text = response.text.strip()
+            if plain_text:
                 self.chat_display.append(f"<b style='color:#00c853;'>AI:</b> {plain_text}")
 
         except Exception as e:
@@ -446,7 +503,15 @@ class AIAssistantPage(QWidget):
         
         if file_path:
             try:
-                content = self.read_file_content(file_path)
+                with Tracer().span("file.parse", file_type=os.path.splitext(file_path)[1].lower(),
+                                   bytes=os.path.getsize(file_path)) as span:
+                    content = self.read_file_content(file_path)
+                    try:
+                        self.extracted_tables = extract_from_file(file_path)
+                    except Exception as e:
+                        self.extracted_tables = []
+                        span.set(extraction_error=str(e))
+                    span.set(chars=len(content), tables=len(self.extracted_tables))
                 self.uploaded_file_content = content
 
                 
@@ -456,6 +521,12 @@ class AIAssistantPage(QWidget):
                     📁 <b>{file_name}</b> uploaded successfully!
                     </div>
                 """)
+                for table in self.extracted_tables:
+                    self.chat_display.append(to_html(table))
+                # Documents without tables (PDF or text) get a queued analysis instead
+                if not self.extracted_tables and self.ai_agent is not None:
+                    self.submit_job('process_file', {'file_content': content,
+                                                     'file_type': os.path.splitext(file_path)[1].lstrip('.').lower()})
 
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"Could not read file:\n{str(e)}")  
@@ -496,46 +567,6 @@ class AIAssistantPage(QWidget):
         else:
             raise ValueError("Unsupported file type.")
         
-    def get_excel_table_html(self, file_path):
-        import pandas as pd
-        df_sheets = pd.read_excel(file_path, sheet_name=None)
-        html_output = ""
-        for sheet_name, df in df_sheets.items():
-            html_output += f"<h3>{sheet_name}</h3>"
-            html_output += df.to_html(index=False, border=0, classes='excel-table')
-        return html_output
-    
-    def convert_to_html_table(self, raw_text):
-        import re
-        rows = []
-        lines = raw_text.split('*')
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-            match = re.match(r'\*\*(.*?) \(Account (\d+)\):\*\* You have a (debit|credit) balance of \$(.*)\.', line)
-            if match:
-                name, account_number, balance_type, amount = match.groups()
-                rows.append((name, account_number, balance_type.capitalize(), f"${amount}"))
-
-        html_table = """
-        <table border="1" cellpadding="5" cellspacing="0" style="border-collapse: collapse; font-family: Segoe UI;">
-            <thead style="background-color: #36d399; color: black;">
-                <tr>
-                    <th>Account Name</th>
-                    <th>Account Number</th>
-                    <th>Type</th>
-                    <th>Amount</th>
-                </tr>
-            </thead>
-            <tbody>
-        """
-        for row in rows:
-            html_table += "<tr>" + "".join(f"<td>{cell}</td>" for cell in row) + "</tr>"
-        html_table += "</tbody></table>"
-        return html_table
-
-
     def clear_file(self):
         self.file_label.setText("")
         self.file_frame_widget.hide()   
@@ -1,11 +1,22 @@
 from PySide6.QtWidgets import QWidget, QVBoxLayout, QLabel, QTextEdit
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, Signal
+
+from database.analytics_engine import AnalyticsEngine, DEFAULT_ANALYTIC_QUERIES, top_tables_query
+from database.table_stats import TableStatsService
 
 class AnalyticsPage(QWidget):
+    # Emitted from the refresh worker as each analytic query finishes
+    result_ready = Signal(object)
+
     def __init__(self, main_window):
         super().__init__()
         self.main_window = main_window
         self.db = main_window.get_database_manager()
+        self.analytics_engine = AnalyticsEngine(
+            self.db, [top_tables_query(TableStatsService(self.db))] + DEFAULT_ANALYTIC_QUERIES
+        )
+        self.sections = {}
+        self.result_ready.connect(self.show_result)
         self.init_ui()
 
     def init_ui(self):
@@ -21,30 +32,41 @@ class AnalyticsPage(QWidget):
         layout.addWidget(self.output)
 
         self.setLayout(layout)
-        self.load_analytics()
+        self.output.setText("Waiting for database connection...")
+        self.main_window.bootstrap.subscribe_database(self.on_database_ready)
+
+    def on_database_ready(self, success: bool):
+        if not success:
+            self.output.setText("Database unavailable - retrying in the background...")
+
+    def fetch_data(self):
+        """Run the analytics queries; called on a RefreshScheduler worker thread"""
+        return self.analytics_engine.run_all(on_result=self.result_ready.emit)
+
+    def render_data(self, data, error=None):
+        if error is not None:
+            self.output.setText(f"Error loading analytics: {error}")
+            return
+        for result in data:
+            self.show_result(result)
+        slow = self.analytics_engine.slow_queries()
+        if slow:
+            names = ", ".join(f"{s['query']} ({s['median_ms']:.0f} ms)" for s in slow)
+            self.output.append(f"\nSlow analytics: {names}")
+
+    def show_result(self, result):
+        if result.error:
+            text = f"  Error: {result.error}"
+        else:
+            text = "\n".join("  - " + ", ".join(str(v) for v in row.values()) for row in result.rows)
+        self.sections[result.name] = f"{result.label} ({result.elapsed_ms:.0f} ms):\n{text}"
+
+        # Keep registry order regardless of completion order
+        ordered = [self.sections[q.name] for q in self.analytics_engine.queries if q.name in self.sections]
+        self.output.setText("\n\n".join(ordered))
 
     def load_analytics(self):
-        try:
-            if self.db:
-                queries = {
-                    "Top 5 Tables by Row Count":
-                        """SELECT table_name FROM (
-                             SELECT table_name
-                             FROM all_tables
-                             ORDER BY num_rows DESC
-                         ) WHERE ROWNUM <= 5"""
-                }
-
-                results = []
-                for label, query in queries.items():
-                    result = self.db.fetch_all(query)
-                    results.append(f"{label}:\n" + "\n".join([f"  - {row[0]}" for row in result]))
-
-                self.output.setText("\n\n".join(results))
-            else:
-                self.output.setText("DB not initialized.")
-        except Exception as e:
-            self.output.setText(f"Error loading analytics: {e}")
+        self.main_window.refresh_scheduler.refresh('analytics')
 
     def update_db_status(self, is_connected: bool):
         # Optionally add a "refresh" or grey out content if disconnected
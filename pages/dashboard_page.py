@@ -2,15 +2,19 @@ from PySide6.QtWidgets import QWidget, QVBoxLayout, QLabel, QHBoxLayout, QPushBu
 from PySide6.QtGui import QFont
 from PySide6.QtCore import Qt, QSize, QPropertyAnimation, QEasingCurve
 
+from database.kpi_engine import KPIEngine, DEFAULT_DASHBOARD_KPIS
+
 class DashboardPage(QWidget):
     def __init__(self, main_window):
         super().__init__()
         self.main_window = main_window
         self.db = main_window.get_database_manager()
+        self.kpi_engine = KPIEngine(self.db, DEFAULT_DASHBOARD_KPIS)
+        self.kpi_tiles = {}
         self.setStyleSheet("background-color: #cccccc;")
 
         self.init_ui()
-        self.refresh()
+        main_window.bootstrap.subscribe_database(self.on_database_ready)
 
     def init_ui(self):
         main_layout = QVBoxLayout(self)
@@ -122,17 +126,79 @@ class DashboardPage(QWidget):
         main_layout.addWidget(header_frame)
 
         # --- DB Status Label ---
-        self.status_label = QLabel("Loading database stats...")
+        self.status_label = QLabel("Connecting to database...")
         self.status_label.setStyleSheet("color: gray; margin-left: 20px;")
         main_layout.addWidget(self.status_label)
 
+        # --- KPI Tiles ---
+        tiles_layout = QHBoxLayout()
+        tiles_layout.setContentsMargins(20, 10, 20, 10)
+        tiles_layout.setSpacing(15)
+        for kpi in self.kpi_engine.kpis:
+            tiles_layout.addWidget(self.create_kpi_tile(kpi.name, kpi.label))
+        main_layout.addLayout(tiles_layout)
+        main_layout.addStretch()
+
+    def create_kpi_tile(self, name: str, label: str) -> QFrame:
+        tile = QFrame()
+        tile.setMinimumHeight(110)
+        tile.setStyleSheet("background-color: #ffffff; border-radius: 8px;")
+        tile_layout = QVBoxLayout(tile)
+        tile_layout.setContentsMargins(15, 10, 15, 10)
+
+        title_label = QLabel(label)
+        title_label.setStyleSheet("color: #555555; font-size: 13px; font-weight: bold;")
+
+        value_label = QLabel("--")
+        value_label.setStyleSheet("color: #000000; font-size: 26px; font-weight: bold;")
+
+        footer_label = QLabel("")
+        footer_label.setStyleSheet("color: #888888; font-size: 11px;")
+
+        tile_layout.addWidget(title_label)
+        tile_layout.addWidget(value_label)
+        tile_layout.addWidget(footer_label)
+        self.kpi_tiles[name] = (value_label, footer_label)
+        return tile
+
+    def fetch_data(self):
+        """Load dashboard data; called on a RefreshScheduler worker thread"""
+        return self.kpi_engine.refresh()
+
+    def render_data(self, data, error=None):
+        if error is not None:
+            self.status_label.setText(f"Error fetching DB data: {error}")
+            return
+        self.status_label.setText("")
+        for name, result in data.items():
+            value_label, footer_label = self.kpi_tiles[name]
+            kpi = next(k for k in self.kpi_engine.kpis if k.name == name)
+            if result.fetched_at is not None:
+                value_label.setText(self.format_kpi_value(result.value))
+            age = result.age_seconds()
+            footer = "never loaded" if age is None else f"updated {int(age // 60)}m ago"
+            if result.is_stale(kpi.max_age_seconds):
+                footer += " (stale)"
+            footer_label.setText(footer)
+            footer_label.setToolTip(result.error or f"{result.latency_ms:.0f} ms"
+                                    + (" (batched)" if result.batched else ""))
+
+    @staticmethod
+    def format_kpi_value(value) -> str:
+        if value is None:
+            return "--"
+        if hasattr(value, 'strftime'):
+            return value.strftime("%Y-%m-%d %H:%M")
+        if isinstance(value, (int, float)) or hasattr(value, 'is_finite'):
+            return f"{value:,}"
+        return str(value)
+
     def refresh(self):
-        if self.db:
-            try:
-                row = self.db.fetch_one("SELECT COUNT(*) FROM all_tables")
-                self.status_label.setText(f"Total Tables in DB: {row[0]}")
-            except Exception as e:
-                self.status_label.setText(f"Error fetching DB data: {e}")
+        self.main_window.refresh_scheduler.refresh('dashboard')
+
+    def on_database_ready(self, success: bool):
+        if not success:
+            self.status_label.setText("Database unavailable - retrying in the background...")
 
     def update_db_status(self, is_connected: bool):
         status = "Connected" if is_connected else "Disconnected"
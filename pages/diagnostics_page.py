@@ -0,0 +1,212 @@
+from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTextEdit,
+                               QTableWidget, QTableWidgetItem, QHeaderView)
+from PySide6.QtCore import Qt
+
+from diagnostics.tracing import Tracer
+from diagnostics.query_log import QueryLog
+from diagnostics.model_telemetry import ModelTelemetry
+from ai.model_router import ModelRouter
+from jobs.job_queue import JobQueue, RUNNING, QUEUED
+
+# Span names that start a user-visible request
+ROOT_PREFIXES = ("chat.", "page.", "agent.", "file.")
+
+
+class DiagnosticsPage(QWidget):
+    """Where the time goes: span totals by name and a breakdown of recent requests"""
+
+    def __init__(self, main_window):
+        super().__init__()
+        self.main_window = main_window
+        self.tracer = Tracer()
+        self.query_log = QueryLog()
+        self.telemetry = ModelTelemetry()
+        self.router = ModelRouter()
+        self.job_queue = JobQueue()
+        self.init_ui()
+
+    def init_ui(self):
+        layout = QVBoxLayout()
+        layout.setContentsMargins(20, 20, 20, 20)
+
+        title = QLabel("🩺 Diagnostics")
+        title.setStyleSheet("font-size: 24px; font-weight: bold;")
+        layout.addWidget(title)
+
+        button_layout = QHBoxLayout()
+        refresh_btn = QPushButton("Refresh")
+        refresh_btn.clicked.connect(self.load_diagnostics)
+        export_btn = QPushButton("Export Trace")
+        export_btn.clicked.connect(self.export_trace)
+        clear_btn = QPushButton("Clear")
+        clear_btn.clicked.connect(self.clear_traces)
+        for button in (refresh_btn, export_btn, clear_btn):
+            button_layout.addWidget(button)
+        button_layout.addStretch()
+        self.export_label = QLabel("")
+        self.export_label.setStyleSheet("color: #555555;")
+        button_layout.addWidget(self.export_label)
+        layout.addLayout(button_layout)
+
+        self.summary_table = QTableWidget(0, 6)
+        self.summary_table.setHorizontalHeaderLabels(["Span", "Count", "Total ms", "Mean ms", "p95 ms", "Max ms"])
+        self.summary_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.summary_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        layout.addWidget(self.summary_table)
+
+        self.requests_output = QTextEdit()
+        self.requests_output.setReadOnly(True)
+        layout.addWidget(self.requests_output)
+
+        queries_title = QLabel("Statements by fingerprint")
+        queries_title.setStyleSheet("font-size: 16px; font-weight: bold;")
+        layout.addWidget(queries_title)
+
+        self.query_table = QTableWidget(0, 8)
+        self.query_table.setHorizontalHeaderLabels(
+            ["Statement", "Count", "p50 ms", "p95 ms", "p99 ms", "Rows", "Round trips", "Top caller"])
+        self.query_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.query_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        layout.addWidget(self.query_table)
+
+        self.caller_label = QLabel("")
+        self.caller_label.setStyleSheet("color: #555555;")
+        self.caller_label.setWordWrap(True)
+        layout.addWidget(self.caller_label)
+
+        self.model_label = QLabel("")
+        self.model_label.setStyleSheet("color: #555555;")
+        self.model_label.setWordWrap(True)
+        layout.addWidget(self.model_label)
+
+        self.route_label = QLabel("")
+        self.route_label.setStyleSheet("color: #555555;")
+        self.route_label.setWordWrap(True)
+        layout.addWidget(self.route_label)
+
+        jobs_header = QHBoxLayout()
+        jobs_title = QLabel("Background jobs")
+        jobs_title.setStyleSheet("font-size: 16px; font-weight: bold;")
+        jobs_header.addWidget(jobs_title)
+        jobs_header.addStretch()
+        cancel_btn = QPushButton("Cancel Selected")
+        cancel_btn.clicked.connect(self.cancel_selected_job)
+        jobs_header.addWidget(cancel_btn)
+        layout.addLayout(jobs_header)
+
+        self.jobs_table = QTableWidget(0, 7)
+        self.jobs_table.setHorizontalHeaderLabels(["ID", "Kind", "Priority", "Status", "Progress", "Elapsed s", "Message"])
+        self.jobs_table.horizontalHeader().setSectionResizeMode(6, QHeaderView.Stretch)
+        self.jobs_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.jobs_table.setSelectionBehavior(QTableWidget.SelectRows)
+        layout.addWidget(self.jobs_table)
+
+        self.setLayout(layout)
+
+    def showEvent(self, event):
+        self.load_diagnostics()
+        super().showEvent(event)
+
+    def load_diagnostics(self):
+        summary = self.tracer.summary()
+        self.summary_table.setRowCount(len(summary))
+        for i, row in enumerate(summary):
+            values = [row['name'], row['count'], row['total_ms'], row['mean_ms'], row['p95_ms'], row['max_ms']]
+            for j, value in enumerate(values):
+                item = QTableWidgetItem(str(value))
+                if j:
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.summary_table.setItem(i, j, item)
+        self.requests_output.setText(self.format_recent_requests())
+        self.load_query_report()
+        self.load_model_report()
+        self.load_route_report()
+        self.load_jobs()
+
+    def load_jobs(self, limit: int = 20):
+        jobs = self.job_queue.jobs(limit=limit)
+        self.jobs_table.setRowCount(len(jobs))
+        for i, job in enumerate(jobs):
+            values = [job.id, job.kind, job.priority, job.status, f"{job.progress:.0%}",
+                      "" if job.elapsed_s is None else job.elapsed_s, job.error or job.message or ""]
+            for j, value in enumerate(values):
+                item = QTableWidgetItem(str(value))
+                if j in (0, 2, 4, 5):
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.jobs_table.setItem(i, j, item)
+
+    def cancel_selected_job(self):
+        for index in self.jobs_table.selectionModel().selectedRows():
+            status = self.jobs_table.item(index.row(), 3).text()
+            if status in (QUEUED, RUNNING):
+                self.job_queue.cancel(int(self.jobs_table.item(index.row(), 0).text()))
+        self.load_jobs()
+
+    def load_route_report(self):
+        routes = [r for r in self.router.report() if r['calls']]
+        self.route_label.setText("Model routes: " + ", ".join(
+            f"{r['route']} {r['calls']}x p50 {r['p50_ms']} ms p95 {r['p95_ms']} ms "
+            f"quality {r['quality']:.0%} escalated {r['escalated']}" for r in routes
+        ) if routes else "")
+
+    def load_model_report(self, days: float = 7):
+        try:
+            report = self.telemetry.report(days=days)
+        except Exception as e:
+            self.model_label.setText(f"Model telemetry unavailable: {e}")
+            return
+        self.model_label.setText(f"Model calls, last {days:g} days: " + ", ".join(
+            f"{r['feature']} {r['calls']}x p95 {r['p95_ms']} ms ${r['cost_usd']:.4f}" for r in report[:6]
+        ) if report else "No model calls recorded yet.")
+
+    def load_query_report(self, limit: int = 20):
+        report = self.query_log.report()[:limit]
+        self.query_table.setRowCount(len(report))
+        for i, row in enumerate(report):
+            values = [row['statement'], row['count'], row['p50_ms'], row['p95_ms'], row['p99_ms'],
+                      row['mean_rows'], row['mean_round_trips'], next(iter(row['callers']), "")]
+            for j, value in enumerate(values):
+                item = QTableWidgetItem(str(value))
+                if j == 0:
+                    item.setToolTip(str(value))
+                elif j < 7:
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.query_table.setItem(i, j, item)
+        callers = self.query_log.by_caller()[:5]
+        self.caller_label.setText("DB time by caller: " + ", ".join(
+            f"{c['caller']} {c['total_ms']:.0f} ms ({c['count']})" for c in callers) if callers else "")
+
+    def format_recent_requests(self, limit: int = 10) -> str:
+        """Latest root spans with time per child span name"""
+        spans = self.tracer.spans()
+        roots = [s for s in spans if s.parent_id is None and s.name.startswith(ROOT_PREFIXES)][-limit:]
+        if not roots:
+            return "No requests traced yet."
+        blocks = []
+        for root in reversed(roots):
+            children = {}
+            for span in spans:
+                if span.trace_id == root.trace_id and span is not root:
+                    children[span.name] = children.get(span.name, 0.0) + span.duration_ms
+            lines = [f"{root.name} - {root.duration_ms:.0f} ms"
+                     + (f" [{root.error}]" if root.error else "")]
+            for name, ms in sorted(children.items(), key=lambda c: c[1], reverse=True):
+                lines.append(f"    {name}: {ms:.0f} ms ({ms / max(root.duration_ms, 0.001) * 100:.0f}%)")
+            blocks.append("\n".join(lines))
+        return "\n\n".join(blocks)
+
+    def export_trace(self):
+        try:
+            path = self.tracer.export()
+            self.export_label.setText(f"Saved {path} (open in chrome://tracing or Perfetto)")
+        except Exception as e:
+            self.export_label.setText(f"Export failed: {e}")
+
+    def clear_traces(self):
+        self.tracer.clear()
+        self.query_log.reset()
+        self.router.reset()
+        self.load_diagnostics()
+
+    def update_db_status(self, is_connected: bool):
+        pass
@@ -0,0 +1,194 @@
+# service/client.py
+"""Desktop-side proxies for the shared service.
+
+``RemoteDatabaseManager`` and ``RemoteAgent`` duck-type ``DatabaseManager``
+and ``FinancialAIAgent`` so pages, engines and job handlers work unchanged
+when ``service_url`` is configured.
+"""
+import itertools
+import logging
+import socket
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+from database.db_manager import PlanEstimate
+from diagnostics.tracing import Tracer
+from service.protocol import RPCError, encode, decode, parse_url, read_token
+
+
+class ServiceClient:
+    """JSON-RPC client with one persistent connection per calling thread"""
+
+    def __init__(self, url: str, token: Optional[str] = None, timeout: float = 300.0):
+        self.host, self.port = parse_url(url)
+        self.token = token or read_token()
+        self.timeout = timeout
+        self.tracer = Tracer()
+        self.logger = logging.getLogger(__name__)
+        self._local = threading.local()
+        self._ids = itertools.count(1)
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            conn = self._local.conn = (sock, sock.makefile('rb'))
+        return conn
+
+    def _drop_connection(self):
+        conn = getattr(self._local, 'conn', None)
+        self._local.conn = None
+        if conn is not None:
+            conn[1].close()
+            conn[0].close()
+
+    def call(self, method: str, cache: bool = False, **params) -> Any:
+        """Call ``method``; ``cache`` accepts a result shared from another client's recent identical call"""
+        request_id = next(self._ids)
+        payload = encode({'jsonrpc': '2.0', 'id': request_id, 'method': method, 'params': params,
+                          'token': self.token, 'cache': cache})
+        with self.tracer.span(f"rpc.{method}", bytes_out=len(payload)) as span:
+            # A stale connection (service restarted) is retried once on a fresh socket
+            for attempt in (1, 2):
+                try:
+                    sock, reader = self._connection()
+                    sock.sendall(payload)
+                    line = reader.readline()
+                    if not line:
+                        raise ConnectionError("Service closed the connection")
+                    break
+                except OSError:
+                    self._drop_connection()
+                    if attempt == 2:
+                        raise
+            span.set(bytes_in=len(line))
+            response = decode(line)
+        if 'error' in response:
+            error = response['error']
+            raise RPCError(error['code'], error['message'], (error.get('data') or {}).get('type'))
+        return response['result']
+
+    def close(self):
+        self._drop_connection()
+
+
+class RemoteDatabaseManager:
+    """DatabaseManager API backed by the service's shared Oracle pool"""
+
+    def __init__(self, client: ServiceClient):
+        self.client = client
+        self.logger = logging.getLogger(__name__)
+        self.connected = False
+
+    @property
+    def connection_pool(self):
+        # Callers only test this for None to see whether the database is set up
+        return self if self.connected else None
+
+    def configure(self, config=None, pool_size: int = 5) -> bool:
+        """The service owns the pool; local connection settings are ignored"""
+        try:
+            self.connected = bool(self.client.call('service.ping')['database'])
+        except Exception as e:
+            self.logger.error(f"Service connection failed: {e}")
+            self.connected = False
+        return self.connected
+
+    def execute_query(self, query: str, params: Optional[Dict] = None) -> List[Dict]:
+        return self.client.call('db.execute_query', query=query, params=params)
+
+    def iter_query(self, query: str, params: Optional[Dict] = None, batch_size: int = 500,
+                   max_rows: Optional[int] = None, timeout_ms: Optional[int] = None):
+        result = self.client.call('db.iter_query', query=query, params=params, batch_size=batch_size,
+                                  max_rows=max_rows, timeout_ms=timeout_ms)
+        rows = [tuple(row) for row in result['rows']]
+        for start in range(0, len(rows), batch_size):
+            yield result['columns'], rows[start:start + batch_size]
+
+    def execute_query_batch(self, query: str, params_list: List[Dict]) -> List[List[Dict]]:
+        return self.client.call('db.execute_query_batch', query=query, params_list=params_list)
+
+    def execute_non_query(self, query: str, params: Optional[Dict] = None) -> int:
+        return self.client.call('db.execute_non_query', query=query, params=params)
+
+    def execute_many(self, query: str, params_list: List[Dict]) -> int:
+        return self.client.call('db.execute_many', query=query, params_list=params_list)
+
+    def get_dataframe(self, query: str, params: Optional[Dict] = None) -> pd.DataFrame:
+        return self.client.call('db.get_dataframe', query=query, params=params)
+
+    def explain_plan(self, query: str) -> PlanEstimate:
+        return PlanEstimate(**self.client.call('db.explain_plan', cache=True, query=query))
+
+    # Dictionary metadata changes rarely, so a shared recent result is acceptable
+    def get_table_info(self, table_name: str) -> List[Dict]:
+        return self.client.call('db.get_table_info', cache=True, table_name=table_name)
+
+    def get_all_tables(self) -> List[str]:
+        return self.client.call('db.get_all_tables', cache=True)
+
+    def test_connection(self) -> bool:
+        try:
+            return bool(self.client.call('db.test_connection'))
+        except Exception as e:
+            self.logger.error(f"Connection test failed: {e}")
+            return False
+
+    def close_pool(self):
+        self.client.close()
+        self.connected = False
+
+
+class RemoteAgent:
+    """FinancialAIAgent operations run by the service's agent and model gateway"""
+
+    def __init__(self, client: ServiceClient):
+        self.client = client
+
+    def warm_up(self, timeout: float = 10.0):
+        self.client.call('agent.warm_up', timeout=timeout)
+
+    def chat(self, prompt: str, message: str = "") -> str:
+        return self.client.call('agent.chat', prompt=prompt, message=message)
+
+    def analyze_financial_data(self, query: str, table_context: Optional[Dict] = None) -> str:
+        return self.client.call('agent.analyze_financial_data', query=query, table_context=table_context)
+
+    def generate_sql_query(self, natural_language_query: str, available_tables: List[str]) -> str:
+        return self.client.call('agent.generate_sql_query', cache=True, natural_language_query=natural_language_query,
+                                available_tables=available_tables)
+
+    def analyze_variances(self, actual_table: str, budget_table: str, period: str) -> Dict[str, Any]:
+        return self.client.call('agent.analyze_variances', cache=True, actual_table=actual_table,
+                                budget_table=budget_table, period=period)
+
+    def analyze_variances_batch(self, actual_table: str, budget_table: str, periods: List[str],
+                                entity_column: Optional[str] = None, entities: Optional[List[str]] = None,
+                                max_workers: int = 4, top_n: int = 5) -> Dict[str, Any]:
+        return self.client.call('agent.analyze_variances_batch', cache=True, actual_table=actual_table,
+                                budget_table=budget_table, periods=periods, entity_column=entity_column,
+                                entities=entities, max_workers=max_workers, top_n=top_n)
+
+    def generate_consolidation_entries(self, subsidiary_data: List[Dict], parent_company: str,
+                                       reporting_currency: Optional[str] = None, period_date: Optional[str] = None,
+                                       on_entry: Optional[Callable[[Dict], None]] = None) -> List[Dict]:
+        # Entries are not streamed over the wire; on_entry sees them once the call returns
+        entries = self.client.call('agent.generate_consolidation_entries', subsidiary_data=subsidiary_data,
+                                   parent_company=parent_company, reporting_currency=reporting_currency,
+                                   period_date=period_date)
+        if on_entry is not None:
+            for entry in entries:
+                on_entry(entry)
+        return entries
+
+    def smart_insights(self, query: str, max_rows: int = 500000) -> Dict[str, Any]:
+        return self.client.call('agent.smart_insights', query=query, max_rows=max_rows)
+
+    def detect_anomalies(self, max_rows: int = 5000000, explain: bool = True, top_n: int = 25) -> Dict[str, Any]:
+        return self.client.call('agent.detect_anomalies', max_rows=max_rows, explain=explain, top_n=top_n)
+
+    def process_uploaded_file(self, file_content: str, file_type: str) -> str:
+        return self.client.call('agent.process_uploaded_file', file_content=file_content, file_type=file_type)
@@ -0,0 +1,94 @@
+# service/protocol.py
+"""Wire format: one JSON-RPC 2.0 message per line over TCP.
+
+Every request carries the service's shared secret in ``token`` and may set
+``cache: true`` to allow a shared cached result for cacheable methods.
+
+DataFrames travel as ``{"__dataframe__": <to_json orient=split>}``;
+decimals, dates, numpy scalars and dataclasses are converted to plain JSON.
+"""
+import dataclasses
+import datetime
+import decimal
+import json
+import os
+import secrets
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_PORT = 8770
+# Shared secret written by the service when none is configured; readable only by its owner
+DEFAULT_TOKEN_PATH = os.path.join("data", "service.token")
+
+# JSON-RPC error codes
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INTERNAL_ERROR = -32603
+APPLICATION_ERROR = -32000
+UNAUTHORIZED = -32001
+
+
+class RPCError(Exception):
+    """An error returned by the service; ``type`` is the remote exception class name"""
+
+    def __init__(self, code: int, message: str, type: Optional[str] = None):
+        super().__init__(message)
+        self.code = code
+        self.type = type
+
+
+def _default(value: Any):
+    if isinstance(value, pd.DataFrame):
+        return {'__dataframe__': json.loads(value.to_json(orient='split', date_format='iso', index=False))}
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, (datetime.datetime, datetime.date, pd.Timestamp)):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return dataclasses.asdict(value)
+    return str(value)
+
+
+def _object_hook(obj: Dict[str, Any]):
+    if '__dataframe__' in obj and len(obj) == 1:
+        split = obj['__dataframe__']
+        return pd.DataFrame(split['data'], columns=split['columns'])
+    return obj
+
+
+def encode(message: Dict[str, Any]) -> bytes:
+    return json.dumps(message, default=_default, separators=(',', ':')).encode() + b"\n"
+
+
+def decode(line: bytes) -> Dict[str, Any]:
+    return json.loads(line, object_hook=_object_hook)
+
+
+def parse_url(url: str) -> Tuple[str, int]:
+    """``tcp://host:port``, ``host:port`` or ``host`` to (host, port)"""
+    parsed = urlparse(url if "//" in url else f"tcp://{url}")
+    return parsed.hostname or "127.0.0.1", parsed.port or DEFAULT_PORT
+
+
+def read_token(path: str = DEFAULT_TOKEN_PATH) -> Optional[str]:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def create_token(path: str = DEFAULT_TOKEN_PATH) -> str:
+    """Generate a token and store it with owner-only permissions"""
+    token = secrets.token_urlsafe(32)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(token)
+    return token
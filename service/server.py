@@ -0,0 +1,325 @@
+# service/server.py
+"""Local service owning one Oracle pool, shared result caches and the model gateway.
+
+Desktop clients set ``service_url`` in their configuration and talk to it
+over newline-delimited JSON-RPC instead of opening their own sessions.
+Every request must present the shared token (``service_token`` / SERVICE_TOKEN,
+or the generated ``data/service.token``). Binding beyond loopback requires
+an explicitly configured token, and database writes are only exposed with
+``--allow-writes``.
+
+    python -m service.server --port 8770 [--config config/config.json] [--pool-size 10]
+"""
+import argparse
+import asyncio
+import hashlib
+import hmac
+import ipaddress
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from config.config_manager import ConfigManager
+from database.db_manager import DatabaseManager, DatabaseConfig
+from diagnostics.tracing import Tracer
+from service.protocol import (DEFAULT_PORT, DEFAULT_TOKEN_PATH, PARSE_ERROR, INVALID_REQUEST, METHOD_NOT_FOUND,
+                              APPLICATION_ERROR, INTERNAL_ERROR, UNAUTHORIZED, RPCError, encode, decode,
+                              read_token, create_token)
+
+# Read-only methods whose results may be shared between clients for ``cache_ttl`` seconds;
+# a request opts in with ``"cache": true``
+DB_READ_METHODS = ('execute_query', 'execute_query_batch', 'get_dataframe', 'get_table_info', 'get_all_tables',
+                   'explain_plan')
+DB_WRITE_METHODS = ('execute_non_query', 'execute_many')
+AGENT_METHODS = ('analyze_variances', 'analyze_variances_batch', 'generate_consolidation_entries',
+                 'generate_sql_query', 'analyze_financial_data', 'smart_insights', 'detect_anomalies',
+                 'process_uploaded_file', 'chat', 'warm_up')
+AGENT_CACHED_METHODS = ('analyze_variances', 'analyze_variances_batch', 'generate_sql_query')
+
+
+def _is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+class ResultCache:
+    """TTL + LRU cache of RPC results with single-flight for identical concurrent requests"""
+
+    def __init__(self, ttl: float = 60.0, max_entries: int = 512):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self.hits = self.misses = self.coalesced = 0
+
+    @staticmethod
+    def key(method: str, params: Dict[str, Any]) -> str:
+        payload = json.dumps([method, params], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            return await asyncio.shield(future)
+
+        self.misses += 1
+        future = self._in_flight[key] = asyncio.get_running_loop().create_future()
+        try:
+            value = await compute()
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark retrieved so a failure nobody else awaited is not logged as unhandled
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return value
+        finally:
+            self._in_flight.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses,
+                'coalesced': self.coalesced, 'ttl_s': self.ttl}
+
+
+class ServiceServer:
+    """Asyncio JSON-RPC server; blocking DB and model work runs on a thread pool.
+
+    Methods are ``db.<DatabaseManager method>``, ``agent.<FinancialAIAgent
+    method>`` and ``service.ping`` / ``service.stats`` / ``service.clear_cache``.
+    Reads and selected agent analyses are cached when the request asks for
+    it; writes (only with ``allow_writes``) clear the cache.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT, config_path: str = "config/config.json",
+                 pool_size: int = 10, cache_ttl: float = 60.0, token: Optional[str] = None,
+                 allow_writes: bool = False):
+        if not token and not _is_loopback(host):
+            raise ValueError(f"Refusing to listen on {host} without a configured service token")
+        self.host = host
+        self.port = port
+        self.config_manager = ConfigManager(config_path)
+        self.pool_size = pool_size
+        self.db_manager = DatabaseManager()
+        self.cache = ResultCache(ttl=cache_ttl)
+        self.tracer = Tracer()
+        self.logger = logging.getLogger(__name__)
+        self.executor = ThreadPoolExecutor(max_workers=pool_size * 2, thread_name_prefix="service")
+        self.token = token or read_token() or create_token()
+        self.allow_writes = allow_writes
+        self._agent = None
+        self._agent_lock = threading.Lock()
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._clients = 0
+        self._requests = 0
+        self._started = time.time()
+
+    # --- Backends ---
+
+    def connect_database(self) -> bool:
+        config = self.config_manager.get_config().database
+        return self.db_manager.configure(DatabaseConfig(config.host, config.port, config.service_name,
+                                                        config.username, config.password,
+                                                        connect_timeout=config.connect_timeout),
+                                         pool_size=self.pool_size)
+
+    def agent(self):
+        # First calls arrive concurrently on executor threads; only one may build the agent
+        with self._agent_lock:
+            if self._agent is None:
+                from ai.financial_agent import FinancialAIAgent
+                from ai.model_registry import ModelRegistry
+
+                config = self.config_manager.get_config().ai
+                registry = ModelRegistry()
+                registry.configure(config)
+                self._agent = FinancialAIAgent(registry, max_query_cost=config.sql_max_cost,
+                                               query_row_limit=config.sql_row_limit)
+            return self._agent
+
+    def _resolve(self, method: str) -> Tuple[Callable[..., Any], bool]:
+        """(callable, cacheable) for an RPC method name"""
+        target, _, name = method.partition('.')
+        if target == 'db' and name in DB_READ_METHODS:
+            return getattr(self.db_manager, name), True
+        if target == 'db' and name in DB_WRITE_METHODS and self.allow_writes:
+            return getattr(self.db_manager, name), False
+        if target == 'agent' and name in AGENT_METHODS:
+            return (lambda **params: getattr(self.agent(), name)(**params)), name in AGENT_CACHED_METHODS
+        if method == 'db.test_connection':
+            return self.db_manager.test_connection, False
+        if method == 'db.iter_query':
+            return self._iter_query, False
+        if method == 'service.ping':
+            return (lambda: {'pid': os.getpid(), 'database': self.db_manager.connection_pool is not None}), False
+        if method == 'service.stats':
+            return self.stats, False
+        if method == 'service.clear_cache':
+            return self.cache.clear, False
+        raise RPCError(METHOD_NOT_FOUND, f"Unknown method {method}")
+
+    def _iter_query(self, query: str, params: Optional[Dict] = None, batch_size: int = 500,
+                    max_rows: Optional[int] = None, timeout_ms: Optional[int] = None) -> Dict[str, Any]:
+        # Generators cannot cross the wire; the bounded result is sent once and re-batched by the client
+        columns, rows = [], []
+        for columns, batch in self.db_manager.iter_query(query, params, batch_size=batch_size, max_rows=max_rows,
+                                                         timeout_ms=timeout_ms):
+            rows.extend(batch)
+        return {'columns': columns, 'rows': rows}
+
+    # --- RPC ---
+
+    async def dispatch(self, method: str, params: Dict[str, Any], cache: bool = False) -> Any:
+        function, cacheable = self._resolve(method)
+        loop = asyncio.get_running_loop()
+
+        async def compute():
+            with self.tracer.span(f"rpc.{method}"):
+                return await loop.run_in_executor(self.executor, lambda: function(**params))
+
+        if cacheable and cache:
+            return await self.cache.get_or_compute(self.cache.key(method, params), compute)
+        result = await compute()
+        if method.startswith('db.') and method.partition('.')[2] in DB_WRITE_METHODS:
+            self.cache.clear()
+        return result
+
+    async def _respond(self, request: Dict[str, Any], writer: asyncio.StreamWriter, write_lock: asyncio.Lock):
+        request_id = request.get('id')
+        try:
+            if not hmac.compare_digest(str(request.get('token') or '').encode(), self.token.encode()):
+                raise RPCError(UNAUTHORIZED, "Invalid or missing service token")
+            result = await self.dispatch(request['method'], request.get('params') or {},
+                                         cache=bool(request.get('cache')))
+            response = {'jsonrpc': '2.0', 'id': request_id, 'result': result}
+        except RPCError as e:
+            response = {'jsonrpc': '2.0', 'id': request_id, 'error': {'code': e.code, 'message': str(e)}}
+        except Exception as e:
+            self.logger.warning(f"RPC {request.get('method')} failed: {e}")
+            response = {'jsonrpc': '2.0', 'id': request_id,
+                        'error': {'code': APPLICATION_ERROR, 'message': str(e), 'data': {'type': type(e).__name__}}}
+        try:
+            payload = encode(response)
+        except (TypeError, ValueError) as e:
+            payload = encode({'jsonrpc': '2.0', 'id': request_id,
+                              'error': {'code': INTERNAL_ERROR, 'message': f"Unserializable result: {e}"}})
+        async with write_lock:
+            writer.write(payload)
+            await writer.drain()
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._clients += 1
+        write_lock = asyncio.Lock()
+        tasks = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                self._requests += 1
+                try:
+                    request = decode(line)
+                except ValueError:
+                    async with write_lock:
+                        writer.write(encode({'jsonrpc': '2.0', 'id': None,
+                                             'error': {'code': PARSE_ERROR, 'message': "Invalid JSON"}}))
+                    continue
+                if not isinstance(request, dict) or 'method' not in request:
+                    async with write_lock:
+                        writer.write(encode({'jsonrpc': '2.0', 'id': None,
+                                             'error': {'code': INVALID_REQUEST, 'message': "Missing method"}}))
+                    continue
+                # Requests on one connection run concurrently; responses carry the request id
+                task = asyncio.create_task(self._respond(request, writer, write_lock))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except ConnectionError:
+            pass
+        finally:
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+            self._clients -= 1
+            writer.close()
+
+    def stats(self) -> Dict[str, Any]:
+        from ai.model_gateway import ModelGateway
+
+        pool = self.db_manager.connection_pool
+        return {
+            'uptime_s': round(time.time() - self._started, 1),
+            'clients': self._clients,
+            'requests': self._requests,
+            'cache': self.cache.stats(),
+            'db_sessions': {'open': pool.opened, 'busy': pool.busy, 'max': pool.max} if pool is not None else None,
+            'gateway': ModelGateway().stats(),
+        }
+
+    async def serve(self):
+        self._server = await asyncio.start_server(self.handle_client, self.host, self.port, limit=2 ** 26)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self.logger.info(f"Service listening on {self.host}:{self.port}")
+        async with self._server:
+            await self._server.serve_forever()
+
+    def close(self):
+        if self._server is not None:
+            self._server.close()
+        self.executor.shutdown(wait=False)
+        self.db_manager.close_pool()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(prog="python -m service.server", description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="non-loopback addresses require --token, service_token or SERVICE_TOKEN")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--config", default="config/config.json")
+    parser.add_argument("--pool-size", type=int, default=10)
+    parser.add_argument("--cache-ttl", type=float, default=60.0)
+    parser.add_argument("--token", help=f"shared secret (default: configured, else {DEFAULT_TOKEN_PATH})")
+    parser.add_argument("--allow-writes", action="store_true", help="expose db.execute_non_query/execute_many")
+    parser.add_argument("--log-level", default="INFO")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=getattr(logging, args.log_level),
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    token = args.token or ConfigManager(args.config).get_config().service_token
+    try:
+        server = ServiceServer(args.host, args.port, args.config, args.pool_size, args.cache_ttl, token,
+                               args.allow_writes)
+    except ValueError as e:
+        parser.error(str(e))
+    if not server.connect_database():
+        logging.getLogger(__name__).error("Database unavailable; db.* calls will fail until restarted")
+    try:
+        asyncio.run(server.serve())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+# tests/test_tabular_extraction.py
+import pandas as pd
+
+from ai.tabular_extraction import extract_table
+
+
+def _sheet(rows):
+    return pd.DataFrame([["Account Code", "Account Name", "Debit", "Credit"]] + rows)
+
+
+def test_parenthesized_credit_is_a_credit():
+    extracted = extract_table(_sheet([
+        ["1000", "Cash", "500.00", ""],
+        ["4000", "Revenue", "", "(500.00)"],
+    ]))
+
+    assert extracted.table['credit'].tolist()[1] == 500.0
+    assert extracted.table['amount'].tolist() == [500.0, -500.0]
+    totals = extracted.totals()
+    assert totals['debit'] == totals['credit'] == 500.0
+    assert totals['balanced']
+
+
+def test_negative_debit_is_a_debit():
+    extracted = extract_table(_sheet([
+        ["1000", "Cash", "-250.00", ""],
+        ["2000", "Payables", "", "250.00"],
+    ]))
+
+    assert extracted.table['amount'].tolist() == [250.0, -250.0]
+    assert extracted.totals()['balanced']
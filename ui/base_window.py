@@ -15,6 +15,10 @@ class BaseWindow(QMainWindow):
     navigate_to_reports = Signal()
     navigate_to_company_setup = Signal()
     navigate_to_settings = Signal()
+    navigate_to_diagnostics = Signal()
+
+    # Emitted with the new widget whenever the main content is swapped
+    content_changed = Signal(object)
     
     def __init__(self):
         super().__init__()
@@ -230,7 +234,8 @@ class BaseWindow(QMainWindow):
             ("Analytics", "ui/icons/analytics_icon.png",self.navigate_to_analytics ),
             ("Reports", "ui/icons/reports_icon.png", self.navigate_to_reports),
             ("Company Setup", "ui/icons/company_icon.png", self.navigate_to_company_setup),
-            ("Settings", "ui/icons/settings_icon.png", self.navigate_to_settings)
+            ("Settings", "ui/icons/settings_icon.png", self.navigate_to_settings),
+            ("Diagnostics", "ui/icons/brain_icon.png", self.navigate_to_diagnostics)
         ]
         
         for text, icon, signal in nav_items:
@@ -319,6 +324,7 @@ class BaseWindow(QMainWindow):
                     
         # Add new content
         self.main_content.layout().addWidget(widget)
+        self.content_changed.emit(widget)
         
     
     def show_loading(self, message: str = "Loading..."):
@@ -0,0 +1,172 @@
+# ui/bootstrap.py
+import logging
+import threading
+import time
+from typing import Callable, Optional
+
+from PySide6.QtCore import QObject, Signal
+
+from ai.financial_agent import FinancialAIAgent
+from ai.model_registry import ModelRegistry
+from config.config_manager import ConfigManager
+from database.db_manager import DatabaseManager, DatabaseConfig
+from service.client import ServiceClient, RemoteAgent
+
+
+class StartupBootstrap(QObject):
+    """Staged background startup for the database pool and the AI agent.
+
+    Each stage runs on a worker thread with a connect timeout and a bounded
+    number of retries. Results are marshalled back to the GUI thread and
+    published through the ``database_ready`` / ``ai_agent_ready`` signals.
+    With a ``service_client`` the agent stage connects to the shared service
+    instead of configuring models locally.
+    """
+
+    database_ready = Signal(bool)
+    ai_agent_ready = Signal(bool)
+    status_changed = Signal(str)
+
+    # Internal signals emitted from worker threads; their slots run on the GUI thread
+    _database_finished = Signal(bool)
+    _ai_agent_finished = Signal(object)
+
+    def __init__(self, config_manager: ConfigManager, db_manager: DatabaseManager, pool_size: int = 10,
+                 service_client: Optional[ServiceClient] = None):
+        super().__init__()
+        self.config_manager = config_manager
+        self.db_manager = db_manager
+        self.service_client = service_client
+        self.pool_size = pool_size
+        self.logger = logging.getLogger(__name__)
+
+        self.ai_agent = None
+        self._database_state: Optional[bool] = None
+        self._ai_agent_state: Optional[bool] = None
+        self._database_running = False
+        self._ai_agent_running = False
+
+        self._database_finished.connect(self._on_database_finished)
+        self._ai_agent_finished.connect(self._on_ai_agent_finished)
+
+    def start(self):
+        """Start all stages in the background"""
+        self.start_database()
+        self.start_ai_agent()
+
+    def start_database(self):
+        """(Re)connect the database pool in the background"""
+        if self._database_running:
+            return
+        self._database_running = True
+        self.status_changed.emit("Connecting to Oracle DB...")
+        threading.Thread(target=self._connect_database, daemon=True).start()
+
+    def start_ai_agent(self):
+        """(Re)initialize the AI agent in the background"""
+        if self._ai_agent_running:
+            return
+        self._ai_agent_running = True
+        threading.Thread(target=self._init_ai_agent, daemon=True).start()
+
+    @property
+    def is_database_ready(self) -> bool:
+        return bool(self._database_state)
+
+    @property
+    def is_ai_agent_ready(self) -> bool:
+        return bool(self._ai_agent_state)
+
+    def subscribe_database(self, callback: Callable[[bool], None]):
+        """Call ``callback(success)`` whenever the database stage completes.
+
+        If the stage already completed, the callback is invoked immediately
+        with the last result so late subscribers do not miss the event.
+        """
+        self.database_ready.connect(callback)
+        if self._database_state is not None:
+            callback(self._database_state)
+
+    def subscribe_ai_agent(self, callback: Callable[[bool], None]):
+        """Call ``callback(success)`` whenever the AI agent stage completes"""
+        self.ai_agent_ready.connect(callback)
+        if self._ai_agent_state is not None:
+            callback(self._ai_agent_state)
+
+    # --- Worker threads ---
+
+    def _connect_database(self):
+        config = self.config_manager.get_config()
+        db_config = DatabaseConfig(
+            host=config.database.host,
+            port=config.database.port,
+            service_name=config.database.service_name,
+            username=config.database.username,
+            password=config.database.password,
+            connect_timeout=config.database.connect_timeout
+        )
+        success = False
+        for attempt in range(1, config.database.connect_retries + 1):
+            try:
+                success = self.db_manager.configure(db_config, pool_size=self.pool_size)
+            except Exception as e:
+                self.logger.error(f"DB setup error: {e}")
+                success = False
+            if success:
+                break
+            self.logger.warning(f"Database connection attempt {attempt}/{config.database.connect_retries} failed")
+            if attempt < config.database.connect_retries:
+                time.sleep(config.database.retry_delay * attempt)
+        self._database_finished.emit(success)
+
+    def _init_ai_agent(self):
+        config = self.config_manager.get_config()
+        agent = None
+        if self.service_client is not None:
+            try:
+                agent = RemoteAgent(self.service_client)
+                agent.warm_up(timeout=config.ai.connect_timeout)
+            except Exception as e:
+                self.logger.error(f"AI service unavailable: {e}")
+                agent = None
+        elif config.ai.gemini_api_key:
+            registry = ModelRegistry()
+            for attempt in range(1, config.ai.connect_retries + 1):
+                try:
+                    registry.configure(config.ai)
+                    agent = FinancialAIAgent(
+                        registry,
+                        max_query_cost=config.ai.sql_max_cost,
+                        query_row_limit=config.ai.sql_row_limit
+                    )
+                    agent.warm_up(timeout=config.ai.connect_timeout)
+                    break
+                except Exception as e:
+                    self.logger.error(f"AI setup error (attempt {attempt}/{config.ai.connect_retries}): {e}")
+                    agent = None
+                    if attempt < config.ai.connect_retries:
+                        time.sleep(config.ai.retry_delay * attempt)
+        else:
+            self.logger.warning("No Gemini API key configured; AI agent disabled")
+        self._ai_agent_finished.emit(agent)
+
+    # --- GUI thread slots ---
+
+    def _on_database_finished(self, success: bool):
+        self._database_running = False
+        self._database_state = success
+        if success:
+            self.logger.info("Database connection established successfully")
+            self.status_changed.emit("Oracle DB connected")
+        else:
+            self.logger.error("Database connection failed")
+            self.status_changed.emit("Oracle DB unavailable")
+        self.database_ready.emit(success)
+
+    def _on_ai_agent_finished(self, agent):
+        self._ai_agent_running = False
+        self.ai_agent = agent
+        self._ai_agent_state = agent is not None
+        if agent is not None:
+            self.logger.info("AI Agent initialized successfully")
+        self.ai_agent_ready.emit(agent is not None)
@@ -0,0 +1,122 @@
+# ui/refresh_scheduler.py
+import logging
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from PySide6.QtCore import QObject, QTimer, Signal
+from PySide6.QtWidgets import QWidget
+
+from diagnostics.tracing import Tracer
+
+
+class RefreshScheduler(QObject):
+    """Background data lifecycle for pages.
+
+    A page takes part by implementing ``fetch_data()`` (runs on a worker
+    thread, must not touch widgets) and ``render_data(data, error)`` (runs on
+    the GUI thread). The visible page is refreshed on a fixed cadence, hidden
+    pages are never polled, and once navigation has been idle for a while the
+    pages the user is most likely to open next are prefetched so switching to
+    them is instant.
+    """
+
+    _fetched = Signal(str, object, object)
+
+    def __init__(self, interval_seconds: int = 60, idle_seconds: float = 2.0,
+                 prefetch_count: int = 2, max_workers: int = 2):
+        super().__init__()
+        self.interval_seconds = interval_seconds
+        self.prefetch_count = prefetch_count
+        self.logger = logging.getLogger(__name__)
+        self.tracer = Tracer()
+
+        self._pages: Dict[str, QWidget] = {}
+        self._fetched_at: Dict[str, float] = {}
+        self._in_flight = set()
+        self._transitions: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self._visible: Optional[str] = None
+        self._enabled = False
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="page-refresh")
+
+        self._fetched.connect(self._on_fetched)
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.timeout.connect(self._refresh_visible)
+        self.refresh_timer.start(int(interval_seconds * 1000))
+
+        self.idle_timer = QTimer(self)
+        self.idle_timer.setSingleShot(True)
+        self.idle_timer.setInterval(int(idle_seconds * 1000))
+        self.idle_timer.timeout.connect(self._prefetch_likely_next)
+
+    def register(self, name: str, page: QWidget):
+        """Register a page that implements fetch_data/render_data"""
+        self._pages[name] = page
+
+    def set_enabled(self, enabled: bool):
+        """Start or pause all data loading (e.g. while the DB is unavailable)"""
+        self._enabled = enabled
+        if enabled:
+            self.refresh(self._visible)
+            self.idle_timer.start()
+
+    def on_content_changed(self, widget: QWidget):
+        """Track which registered page is visible after a content swap"""
+        name = next((n for n, p in self._pages.items() if p is widget), None)
+        if self._visible and name and name != self._visible:
+            self._transitions[self._visible][name] += 1
+        self._visible = name
+        if name and self.is_stale(name):
+            self.refresh(name)
+        # Every navigation restarts the idle countdown before prefetching
+        self.idle_timer.start()
+
+    def is_stale(self, name: str) -> bool:
+        fetched_at = self._fetched_at.get(name)
+        return fetched_at is None or time.monotonic() - fetched_at >= self.interval_seconds
+
+    def refresh(self, name: Optional[str]):
+        """Fetch data for a page in the background unless already in flight"""
+        if not self._enabled or name not in self._pages or name in self._in_flight:
+            return
+        self._in_flight.add(name)
+        self._executor.submit(self._fetch, name, self._pages[name])
+
+    def likely_next(self, name: Optional[str]) -> List[str]:
+        """Pages most often navigated to from ``name``, then registration order"""
+        counts = self._transitions.get(name, {})
+        ranked = sorted(counts, key=counts.get, reverse=True)
+        ranked += [n for n in self._pages if n not in ranked]
+        return [n for n in ranked if n != name][:self.prefetch_count]
+
+    def shutdown(self):
+        self.refresh_timer.stop()
+        self.idle_timer.stop()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _refresh_visible(self):
+        if self._visible:
+            self.refresh(self._visible)
+
+    def _prefetch_likely_next(self):
+        for name in self.likely_next(self._visible):
+            if self.is_stale(name):
+                self.refresh(name)
+
+    def _fetch(self, name: str, page: QWidget):
+        try:
+            with self.tracer.span("page.fetch", page=name):
+                data = page.fetch_data()
+            self._fetched.emit(name, data, None)
+        except Exception as e:
+            self.logger.error(f"Refresh of {name} failed: {e}")
+            self._fetched.emit(name, None, e)
+
+    def _on_fetched(self, name: str, data, error):
+        self._in_flight.discard(name)
+        if error is None:
+            self._fetched_at[name] = time.monotonic()
+        with self.tracer.span("page.render", page=name, error=error is not None):
+            self._pages[name].render_data(data, error)